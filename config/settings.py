@@ -3,17 +3,147 @@ DEFAULT_RESOLUTION = (640, 480)
 DEFAULT_FPS = 30
 QR_SCAN_INTERVAL_MS = 30
 
+# カメラ設定（camera_info のJSONリスト。ヘッドレス起動で使用）
+CAMERA_PROFILES_PATH = "config/camera_profiles.json"
+HEADLESS_REPORT_INTERVAL_SEC = 5.0
+
 # ログ
 LOG_DIR = "data/logs"
 LOG_FILE_BASENAME = "app.log"
 LOG_MAX_BYTES = 2 * 1024 * 1024  # 2MB
 LOG_BACKUP_COUNT = 3
+LOG_RATE_LIMIT_SEC = 10.0  # 同一の警告はこの間隔に1回だけ出力（0で無効）
+LOG_VIEW_MAX_LINES = 2000  # 画面のログ表示に残す最大行数
 
 # ONVIF/RTSP受信まわり
 RTSP_TRANSPORT = "tcp"  # "tcp" or "udp"
 RECONNECT_MAX_TRIES = 5
 RECONNECT_BASE_DELAY_SEC = 1.0  # バックオフ開始
 RECONNECT_MAX_DELAY_SEC = 10.0
+RTSP_TIMEOUT_SEC = 5  # ネットワークタイムアウト
+
+# FFmpegキャプチャプロファイル（カメラ毎に config["capture_profile"] で選択）
+# 値は OPENCV_FFMPEG_CAPTURE_OPTIONS に "key;value" として渡される
+FFMPEG_CAPTURE_PROFILES = {
+    "default": {},
+    "low_latency": {
+        "fflags": "nobuffer",
+        "flags": "low_delay",
+        "probesize": 32,
+        "analyzeduration": 0,
+        "max_delay": 0,
+        "reorder_queue_size": 0,
+        "buffer_size": 512 * 1024,
+    },
+}
+DEFAULT_CAPTURE_PROFILE = "default"
+DEFAULT_ONVIF_STREAM = "main"  # "main"（高解像度） or "sub"（低解像度）
+
+# ONVIFスナップショット取得モード（config["capture_mode"] = "snapshot"）
+# 動きの少ない場所向け。RTSP(H.264)を常時デコードせず、JPEGを一定間隔で取得する
+SNAPSHOT_INTERVAL_SEC = 1.0
+SNAPSHOT_REDUCE = 2            # JPEGの縮小デコード倍率（1/2/4/8、グレースケールで展開）
+SNAPSHOT_TIMEOUT_SEC = 5.0
+SNAPSHOT_ESCALATE_HOLD_SEC = 10.0  # コード検出後この秒数はRTSPで連続取得し、途切れたらスナップショットへ戻る
+
+# ONVIFデュアルストリームモード（config["capture_mode"] = "dual"）
+# 低解像度ストリームで候補領域を探し、候補があるときだけ高解像度フレームの該当部分をデコードする
+DUAL_MOTION_THRESHOLD = 12        # 64x36に縮小した画像のいずれかのセルが基準からこれ以上変われば動きあり（0で常に動きあり）
+DUAL_MAX_REGIONS = 4
+DUAL_MIN_AREA_RATIO = 0.0005       # 低解像度側で小さく写るコードも拾えるよう補正処理より小さくする
+DUAL_FULL_DECODE_INTERVAL_SEC = 5.0  # 検出漏れ対策としてこの間隔で全体をデコード（0で無効）
+
+# キャプチャ遅延の計測ログ間隔
+CAPTURE_LATENCY_LOG_INTERVAL_SEC = 10.0
 
 # ONVIF WSDLディレクトリ（空ならonvif-zeepデフォルトを使用）
 ONVIF_WSDL_DIR = ""  # 例: "wsdl"
+
+# ワーカー→GUIのフレームキュー上限（満杯時は結果なしフレームを破棄）
+FRAME_QUEUE_MAXSIZE = 8
+
+# 表示用に画像を送る上限fps（カメラ毎、camera_info["display_fps"] で上書き。0なら画像を送らない）
+# それ以外のフレームは結果だけを送り、BGR画像への展開も行わない
+DISPLAY_MAX_FPS = 15
+
+# メトリクス（Prometheusテキスト形式、localhostのみ）
+METRICS_ENABLED = True
+METRICS_HOST = "127.0.0.1"
+METRICS_PORT = 9464
+METRICS_REPORT_INTERVAL_SEC = 1.0
+
+# オンデマンドプロファイラ
+PROFILE_SAMPLE_INTERVAL_MS = 5
+PROFILE_MAX_DURATION_SEC = 300
+TRACEMALLOC_FRAMES = 25   # tracemalloc で保持するスタックの深さ
+TRACEMALLOC_TOP = 40      # スナップショット/差分の出力件数
+
+# ワーカー監視（死活/ハング検出と自動再起動）
+SUPERVISOR_ENABLED = True
+SUPERVISOR_INTERVAL_SEC = 1.0
+WORKER_STARTUP_GRACE_SEC = 60.0   # 起動直後（接続中）はハング判定しない
+WORKER_HANG_TIMEOUT_SEC = 90.0    # ハートビートがこれ以上途絶えたらハングとみなす（再接続バックオフより長く）
+WORKER_RESTART_BASE_DELAY_SEC = 1.0
+WORKER_RESTART_MAX_DELAY_SEC = 60.0
+WORKER_STABLE_SEC = 120.0         # これだけ安定稼働したら再起動回数をリセット
+# ワーカープロセスのメモリ上限（RSS, MB。0で無効。camera_info["config"]["memory_soft_mb"/"memory_hard_mb"]で個別指定）
+# soft: カメラを正常停止させてから再起動 / hard: 即座に強制終了して再起動
+WORKER_MEMORY_SOFT_MB = 0
+WORKER_MEMORY_HARD_MB = 0
+WORKER_DRAIN_TIMEOUT_SEC = 30.0   # soft超過で停止を指示してから強制終了に切り替えるまで
+
+# CPU固定: "off" / "auto"（カメラ毎に利用可能CPUを順番に割当）
+# 個別指定は camera_info["config"]["cpu_affinity"] = [0, 1]
+CPU_PINNING = "off"
+
+# 1プロセスあたりのカメラ台数（1ならカメラ毎に別プロセス）
+# 2以上にするとスレッドで相乗りし、OpenCV/zeep等のロードによるメモリ消費をまとめられる
+CAMERAS_PER_PROCESS = 1
+
+# 起動時の同時接続数（ONVIF接続はDNS/SOAP/RTSPで数秒かかるため、並列にしつつ上限を設ける）
+STARTUP_MAX_CONCURRENT_CONNECTS = 8
+# 一括起動で「サイト準備完了」とみなす割合（最初のフレームが届いたカメラ数 / 全台数）
+STARTUP_READY_QUORUM = 1.0
+STARTUP_READY_TIMEOUT_SEC = 120.0  # これを過ぎたら揃っていなくても結果を通知
+
+# 読み取り失敗時のフォールバック前処理（順に試す。カメラ毎に config["enhance_stages"] で上書き可、[]で無効）
+# 既定は軽い段だけ。"sharpen" / "adaptive_threshold" は重いので、効果のあるカメラだけで有効にする
+# （実行中は POST /enhance?camera=<id>&stages=... で変更できる）
+ENHANCE_STAGES = ["clahe", "invert"]
+ENHANCE_BUDGET_MS = 15.0   # 1フレームあたりの目安（段の開始前に確認するため、実行中の1段分は超えることがある）
+ENHANCE_MAX_REGIONS = 4    # 補正をかける候補領域の最大数
+ENHANCE_SEARCH_DOWNSCALE = 4     # フレーム全体から候補領域を探すときの縮小率
+ENHANCE_MOTION_THRESHOLD = 12    # 前回補正しても読めなかった画面から変わっていなければ補正しない（0で毎回補正）
+
+# デコード結果キャッシュ（静止しているコードは再デコードしない）
+DECODE_CACHE_SIZE = 64          # 保持するコード領域の数（LRU、0で無効）
+DECODE_CACHE_MAX_AGE_SEC = 1.0  # これより古い結果は使わずデコードし直す（新しく現れたコードの見落とし防止）
+DECODE_CACHE_TOLERANCE = 6.0    # コード領域の縮小画像の平均輝度差がこれ以下なら静止とみなす
+
+# デコード負荷の自動制御（予算はカメラのfps、未指定なら QR_SCAN_INTERVAL_MS）
+ADAPTIVE_DECODE_ENABLED = True
+ADAPTIVE_UP_FRAMES = 10          # 予算超過がこのフレーム数続いたら1段上げる
+ADAPTIVE_DOWN_FRAMES = 60        # 予算の半分未満がこのフレーム数続いたら1段戻す
+ADAPTIVE_RECENT_TYPES_SEC = 30.0 # 種別絞り込み時に「最近読めた」とみなす期間
+
+# 読み取り結果の外部出力先（空なら出力しない）
+# 例:
+#   {"type": "jsonl", "name": "file", "path": "data/exports/results.jsonl", "max_bytes": 10485760, "backup_count": 5}
+#   {"type": "unix", "name": "mes", "path": "/run/mes/qr.sock"}
+#   {"type": "webhook", "name": "hook", "url": "http://127.0.0.1:8080/qr", "timeout": 5.0}
+RESULT_SINKS = []
+SINK_BATCH_SIZE = 50
+SINK_FLUSH_INTERVAL_SEC = 0.5
+SINK_MAX_BUFFER = 10000            # メモリ上の上限（超過分はスプールへ）
+SINK_RETRY_BASE_DELAY_SEC = 1.0
+SINK_RETRY_MAX_DELAY_SEC = 60.0
+SINK_SPOOL_DIR = "data/spool"
+SINK_SPOOL_MAX_BYTES = 100 * 1024 * 1024
+
+# 読み取り結果の照合（その日の指示リスト＋パターン規則）
+# マニフェスト: 1行1コード（CSVなら1列目）。"#"始まりは無視。
+#   "prefix:ORD-" / "regex:SN\d{10}" の行は規則として扱う（ファイル更新で自動再読込）
+MANIFEST_PATH = "data/manifest.txt"
+MANIFEST_RELOAD_INTERVAL_SEC = 5.0
+# 設定ファイル側の固定規則。例: {"name": "order", "prefix": "ORD-"}, {"name": "serial", "regex": r"SN\d{10}"}
+MATCH_RULES = []
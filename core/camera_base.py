@@ -1,11 +1,15 @@
 """
 カメラ制御の共通インターフェース
 """
+import cv2
+
+
 class CameraBase:
     def __init__(self, camera_id, config):
         self.camera_id = camera_id
         self.config = config
         self.is_running = False
+        self._grabbed = None
 
     def connect(self):
         raise NotImplementedError
@@ -15,3 +19,31 @@ class CameraBase:
 
     def capture_frame(self):
         raise NotImplementedError
+
+    def grab_frame(self):
+        """
+        次のフレームを取り込むだけで、画像への展開は retrieve_frame() まで遅らせる。
+        間引くフレームは grab_frame() だけで捨てられる。
+        既定の実装は capture_frame() の結果を保持する（展開を分けられないカメラ用）。
+        """
+        self._grabbed = self.capture_frame()
+        return self._grabbed is not None
+
+    def retrieve_frame(self, color=True):
+        """直前に grab_frame() したフレームを返す。color=False ならグレースケール（輝度）"""
+        frame, self._grabbed = self._grabbed, None
+        if frame is not None and not color and frame.ndim == 3:
+            frame = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        return frame
+
+    def candidate_regions(self):
+        """
+        デコードすべき領域 [(x, y, w, h), ...] を retrieve_frame() の座標で返す（別の安価な手段で候補を探せるカメラ用）。
+        [] なら今回のフレームはデコード不要、None（既定）ならフレーム全体をデコードする。
+        grab_frame() の後、retrieve_frame() の前に呼ぶ。
+        """
+        return None
+
+    def notify_detections(self, results):
+        """デコード結果の通知（取得方法を切り替えるカメラ用。既定では何もしない）"""
+        pass
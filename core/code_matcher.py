@@ -0,0 +1,148 @@
+"""
+読み取り結果の照合
+マニフェスト（指示リスト）をハッシュ索引（set）に載せ、接頭辞/正規表現の規則は規則ごとにコンパイルして順に試す。
+各コードを matched（初回）/ duplicate（照合済みコードの再読取）/ unknown に分類する。
+マニフェストは別スレッドで読み込んでから参照を差し替えるため、再読込中もカメラ処理は止まらない。
+"""
+import csv
+import os
+import re
+import threading
+
+from config.settings import MANIFEST_PATH, MANIFEST_RELOAD_INTERVAL_SEC, MATCH_RULES
+from core.logger import get_logger
+
+logger = get_logger()
+
+MATCHED = "matched"
+DUPLICATE = "duplicate"
+UNKNOWN = "unknown"
+
+
+class _Index:
+    """読み込み済みの照合データ（作成後は変更しない）"""
+
+    def __init__(self, codes=frozenset(), rules=()):
+        self.codes = frozenset(codes)
+        # 1本にまとめると利用者の正規表現のグループ番号（\1 など）がずれるため、規則ごとに持って先頭から試す
+        self.rules = list(rules)  # [(規則名, コンパイル済みパターン), ...]
+
+    def lookup(self, code):
+        """マニフェストにあれば "manifest"、規則に合えば（先に書かれた）規則名、なければ None"""
+        if code in self.codes:
+            return "manifest"
+        for name, pattern in self.rules:
+            if pattern.fullmatch(code):
+                return name
+        return None
+
+
+def _rule_pattern(rule):
+    if "prefix" in rule:
+        return re.compile(re.escape(rule["prefix"]) + ".*", re.DOTALL)
+    return re.compile(rule["regex"])
+
+
+class CodeMatcher:
+    def __init__(self, manifest_path=MANIFEST_PATH, rules=MATCH_RULES):
+        self.manifest_path = manifest_path
+        self.static_rules = list(rules or [])
+        self.stats = {MATCHED: 0, DUPLICATE: 0, UNKNOWN: 0}
+        self._index = _Index()
+        self._seen = set()
+        self._lock = threading.Lock()  # _seen と stats の更新用
+        self._mtime = None
+        self._stop = threading.Event()
+        self._watcher = None
+        self.reload()
+
+    @property
+    def enabled(self):
+        idx = self._index
+        return bool(idx.codes or idx.rules)
+
+    def lookup(self, code):
+        """状態を変えずに照合だけ行う（"manifest"/規則名/None）"""
+        return self._index.lookup(code)
+
+    def register(self, code):
+        """
+        新たに記録するコードを分類して返す（照合が無効ならNone）。
+        照合済みのコードが再び記録されたら duplicate。
+        """
+        idx = self._index
+        if not (idx.codes or idx.rules):
+            return None
+        hit = idx.lookup(code)
+        with self._lock:
+            if hit is None:
+                status = UNKNOWN
+            elif code in self._seen:
+                status = DUPLICATE
+            else:
+                self._seen.add(code)
+                status = MATCHED
+            self.stats[status] += 1
+        return status
+
+    # ---- 読み込み ----------------------------------------------------------
+
+    def reload(self):
+        """マニフェストを読み直して索引を差し替える。失敗時は現在の索引を維持してFalse"""
+        try:
+            mtime = os.path.getmtime(self.manifest_path) if os.path.exists(self.manifest_path) else None
+            codes, rules = self._load_manifest()
+            rules = [(r.get("name", f"rule{i}"), _rule_pattern(r)) for i, r in enumerate(self.static_rules)] + rules
+            index = _Index(codes, rules)
+        except (OSError, re.error, KeyError, ValueError) as e:
+            logger.error(f"照合リストの読み込みに失敗しました（以前のリストを継続使用）: {e}")
+            return False
+
+        with self._lock:
+            # 日をまたいでリストが替わっても、引き続き載っているコードの照合済み状態は残す
+            self._seen = {c for c in self._seen if index.lookup(c) is not None}
+            self._index = index
+            self._mtime = mtime
+        logger.info(f"照合リストを読み込みました: コード {len(index.codes)} 件 / 規則 {len(rules)} 件")
+        return True
+
+    def _load_manifest(self):
+        codes = set()
+        rules = []
+        if not os.path.exists(self.manifest_path):
+            return codes, rules
+        with open(self.manifest_path, "r", encoding="utf-8-sig", newline="") as f:
+            is_csv = self.manifest_path.lower().endswith(".csv")
+            lines = (row[0] for row in csv.reader(f) if row) if is_csv else f
+            for line in lines:
+                line = line.strip()
+                if not line or line.startswith("#"):
+                    continue
+                if line.startswith("prefix:"):
+                    rules.append((line, _rule_pattern({"prefix": line[len("prefix:"):]})))
+                elif line.startswith("regex:"):
+                    rules.append((line, _rule_pattern({"regex": line[len("regex:"):]})))
+                else:
+                    codes.add(line)
+        return codes, rules
+
+    # ---- 自動再読込 --------------------------------------------------------
+
+    def start_watcher(self, interval=MANIFEST_RELOAD_INTERVAL_SEC):
+        """マニフェストの更新時刻を監視し、変わったら別スレッドで再読込する"""
+        if self._watcher is not None or interval <= 0:
+            return
+        self._watcher = threading.Thread(target=self._watch_loop, args=(interval,), name="manifest-watcher", daemon=True)
+        self._watcher.start()
+
+    def stop_watcher(self):
+        self._stop.set()
+
+    def _watch_loop(self, interval):
+        while not self._stop.wait(interval):
+            try:
+                mtime = os.path.getmtime(self.manifest_path) if os.path.exists(self.manifest_path) else None
+            except OSError:
+                continue
+            if mtime != self._mtime:
+                self.reload()
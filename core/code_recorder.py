@@ -0,0 +1,55 @@
+"""
+デコード結果の重複排除と履歴記録（GUI/ヘッドレス共通）
+"""
+import time
+from collections import OrderedDict
+
+from core.history_store import now_iso
+
+# 枠の色分け用に照合結果を覚えておくコード数（古いものから捨てる）
+MATCH_STATUS_MAX_CODES = 1000
+
+
+class CodeRecorder:
+    def __init__(self, history, expire_sec=15, sinks=None, matcher=None):
+        self.history = history
+        self.sinks = sinks
+        self.matcher = matcher
+        self.expire_sec = expire_sec
+        self.seen_codes = {}  # {コード文字列: 最終読み取り時刻}
+        self.match_status = OrderedDict()  # {コード文字列: 記録時の照合結果}（枠の色分け用、LRU）
+
+    def record(self, cam_id, cam_type, results):
+        """
+        同一コードは expire_sec 以内なら記録しない。
+        照合が有効なら記録時に matched/duplicate/unknown を判定し、result["match"] と履歴に残す。
+        戻り値: 新たに記録した [(ts, result), ...]
+        """
+        now_t = time.time()
+        ts = now_iso()
+        recorded = []
+        for res in results:
+            code = res.get("data") or ""
+            last = self.seen_codes.get(code, 0)
+            if code and (now_t - last >= self.expire_sec):
+                self.seen_codes[code] = now_t
+                status = self.matcher.register(code) if self.matcher is not None else None
+                if status is not None:
+                    self.match_status[code] = status
+                    self.match_status.move_to_end(code)
+                    while len(self.match_status) > MATCH_STATUS_MAX_CODES:
+                        self.match_status.popitem(last=False)
+                    res = dict(res, match=status)
+                self.history.add_record(ts, str(cam_id), cam_type, code, status)
+                if self.sinks is not None:
+                    self.sinks.publish({
+                        "ts": ts,
+                        "camera_id": str(cam_id),
+                        "camera_type": cam_type,
+                        "symbology": res.get("type", ""),
+                        "payload": code,
+                        "match_status": status,
+                    })
+                recorded.append((ts, res))
+        return recorded
+
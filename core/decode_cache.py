@@ -0,0 +1,112 @@
+"""
+デコード結果キャッシュ（静止しているコードは再デコードしない）
+前回のデコードで読めたコードの周辺領域を縮小して保持し、次のフレームで同じ領域の縮小画像との
+平均輝度差が許容値以内なら前回の結果を返す。比較は領域だけで行うため、コード以外の場所の動き
+（コンベアなど）やセンサーノイズではデコードし直さない。
+新しく現れたコードは max_age_sec ごとのデコードし直しで拾う。
+"""
+import time
+from collections import OrderedDict
+
+import cv2
+import numpy as np
+
+from config.settings import DECODE_CACHE_SIZE, DECODE_CACHE_MAX_AGE_SEC, DECODE_CACHE_TOLERANCE
+
+# 比較用の縮小サイズ（INTER_AREA の平均でノイズをならす）
+_REGION_THUMB = (16, 16)
+# 領域は格子に揃え、検出位置の数画素の揺れで別のキーにならないようにする
+_REGION_GRID = 16
+
+
+class DecodeCache:
+    """
+    領域ごとの結果を (mode, 領域) をキーに LRU で max_entries 件まで保持する（QRReader＝カメラ1台ごと）。
+    tolerance: 縮小画像どうしの平均絶対差（輝度）がこれ以下なら同じ画像とみなす
+    """
+
+    def __init__(self, max_entries=DECODE_CACHE_SIZE, max_age_sec=DECODE_CACHE_MAX_AGE_SEC,
+                 tolerance=DECODE_CACHE_TOLERANCE):
+        self.max_entries = max_entries
+        self.max_age_sec = max_age_sec
+        self.tolerance = tolerance
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0}
+        self._entries = OrderedDict()  # (mode, region) -> (登録時刻, 縮小画像, [result, ...])
+        self._regions = []  # 直前にデコードしたフレームで読めたコードの周辺領域
+        self._shape = None  # 直前にデコードしたフレームの (h, w)
+
+    @property
+    def enabled(self):
+        return self.max_entries > 0
+
+    def lookup(self, gray, mode):
+        """キャッシュの結果で済めばそのコピーを、デコードが必要なら None を返す"""
+        if not self._regions or gray.shape[:2] != self._shape:
+            self.stats["misses"] += 1
+            return None
+        now = time.monotonic()
+        results = []
+        for region in self._regions:
+            key = (mode, region)
+            entry = self._entries.get(key)
+            if (entry is None or now - entry[0] > self.max_age_sec
+                    or _distance(_thumbnail(gray, region), entry[1]) > self.tolerance):
+                self.stats["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            results.extend(dict(r) for r in entry[2])
+        self.stats["hits"] += 1
+        return results
+
+    def store(self, gray, mode, results):
+        """デコードした結果を領域ごとに登録する"""
+        self._regions = []
+        h, w = gray.shape[:2]
+        self._shape = (h, w)
+        groups = {}
+        for r in results:
+            region = _code_region(r, w, h)
+            if region is None:
+                # 位置の分からない結果はキャッシュから再現できないので、このフレームは登録しない
+                return
+            groups.setdefault(region, []).append(r)
+
+        now = time.monotonic()
+        for region, rs in groups.items():
+            key = (mode, region)
+            self._entries[key] = (now, _thumbnail(gray, region), [dict(r) for r in rs])
+            self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.stats["evictions"] += 1
+        self._regions = list(groups)
+
+    def clear(self):
+        self._entries.clear()
+        self._regions = []
+        self._shape = None
+
+
+def _code_region(result, width, height):
+    """コードの外接矩形に余白を付けて格子に揃えた領域 (x, y, w, h)。位置がなければ None"""
+    rect = result.get("rect")
+    if not rect:
+        return None
+    x, y, w, h = rect
+    pad = max(w, h) // 4 + 4
+    x0 = max(0, (x - pad) // _REGION_GRID * _REGION_GRID)
+    y0 = max(0, (y - pad) // _REGION_GRID * _REGION_GRID)
+    x1 = min(width, -(-(x + w + pad) // _REGION_GRID) * _REGION_GRID)
+    y1 = min(height, -(-(y + h + pad) // _REGION_GRID) * _REGION_GRID)
+    if x1 <= x0 or y1 <= y0:
+        return None
+    return x0, y0, x1 - x0, y1 - y0
+
+
+def _thumbnail(gray, region):
+    x, y, w, h = region
+    return cv2.resize(gray[y:y + h, x:x + w], _REGION_THUMB, interpolation=cv2.INTER_AREA).astype(np.int16)
+
+
+def _distance(a, b):
+    return float(np.abs(a - b).mean())
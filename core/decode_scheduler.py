@@ -0,0 +1,106 @@
+"""
+カメラ毎のデコード負荷制御
+デコード時間をフレーム間隔から決めた予算と比較し、超過が続けば
+  間引き（stride）→ 縮小（scale）→ 対象シンボル種別の絞り込み（narrow）
+の順に段階を上げ、余裕が続けば1段ずつ戻す。
+"""
+import time
+
+from config.settings import (
+    QR_SCAN_INTERVAL_MS,
+    ADAPTIVE_DECODE_ENABLED,
+    ADAPTIVE_UP_FRAMES,
+    ADAPTIVE_DOWN_FRAMES,
+    ADAPTIVE_RECENT_TYPES_SEC,
+)
+from core.qr_reader import mode_for_types
+
+# 段階ごとの設定（0が通常）
+LEVELS = (
+    {"stride": 1, "scale": 1.0, "narrow": False},
+    {"stride": 2, "scale": 1.0, "narrow": False},
+    {"stride": 2, "scale": 0.75, "narrow": False},
+    {"stride": 3, "scale": 0.5, "narrow": False},
+    {"stride": 3, "scale": 0.5, "narrow": True},
+)
+
+
+def budget_from_config(config):
+    """fps指定があればフレーム間隔、なければ QR_SCAN_INTERVAL_MS を予算(ms)とする"""
+    fps = config.get("fps")
+    if fps:
+        return 1000.0 / float(fps)
+    return float(QR_SCAN_INTERVAL_MS)
+
+
+class AdaptiveDecodeController:
+    def __init__(self, budget_ms, enabled=ADAPTIVE_DECODE_ENABLED, alpha=0.2):
+        self.budget_ms = budget_ms
+        self.enabled = enabled
+        self.alpha = alpha
+        self.level = 0
+        self.cost_ms = 0.0  # 1フレームあたりに換算したデコード時間(EWMA)
+        self._over = 0
+        self._under = 0
+        self._frame_no = 0
+        self._recent_types = {}  # 種別 -> 最終読み取り時刻
+
+    @property
+    def stride(self):
+        return LEVELS[self.level]["stride"]
+
+    @property
+    def scale(self):
+        return LEVELS[self.level]["scale"]
+
+    def should_decode(self):
+        """このフレームをデコードするか（間引き判定）"""
+        self._frame_no += 1
+        return self._frame_no % self.stride == 0
+
+    def decode_mode(self, base_mode):
+        """絞り込み段階なら最近読めた種別だけを対象にしたモードを返す"""
+        if not LEVELS[self.level]["narrow"] or base_mode != "all":
+            return base_mode
+        now = time.monotonic()
+        types = {t for t, ts in self._recent_types.items() if now - ts <= ADAPTIVE_RECENT_TYPES_SEC}
+        return mode_for_types(types) or base_mode
+
+    def observe(self, decode_ms, results):
+        """デコードしたフレームの所要時間と結果を記録し、必要なら段階を変える"""
+        now = time.monotonic()
+        for r in results:
+            self._recent_types[r.get("type")] = now
+
+        if not self.enabled:
+            return
+        cost = decode_ms / self.stride
+        self.cost_ms = cost if self.cost_ms == 0.0 else self.cost_ms + self.alpha * (cost - self.cost_ms)
+
+        if self.cost_ms > self.budget_ms:
+            self._over += 1
+            self._under = 0
+        elif self.cost_ms < self.budget_ms * 0.5:
+            self._under += 1
+            self._over = 0
+        else:
+            self._over = self._under = 0
+
+        if self._over >= ADAPTIVE_UP_FRAMES and self.level < len(LEVELS) - 1:
+            self._set_level(self.level + 1)
+        elif self._under >= ADAPTIVE_DOWN_FRAMES and self.level > 0:
+            self._set_level(self.level - 1)
+
+    def _set_level(self, level):
+        self.level = level
+        self._over = self._under = 0
+
+    def state(self):
+        return {
+            "decode_level": self.level,
+            "decode_stride": self.stride,
+            "decode_scale": self.scale,
+            "decode_narrow": int(LEVELS[self.level]["narrow"]),
+            "decode_cost_ms": round(self.cost_ms, 2),
+            "decode_budget_ms": round(self.budget_ms, 2),
+        }
@@ -0,0 +1,139 @@
+"""
+読み取り失敗時のフォールバック前処理
+通常のグレースケールでデコードできなかったフレームに対してのみ、
+コードらしい領域（候補領域）を切り出して段階的に補正をかけ再デコードする。
+フレーム全体を対象にするときは、前回補正しても読めなかった画面から変わっていなければ何もしない
+（コードのない静止した画面で毎フレーム予算を使い切らないように）。
+"""
+import time
+import cv2
+
+from config.settings import (
+    ENHANCE_STAGES, ENHANCE_BUDGET_MS, ENHANCE_MAX_REGIONS, ENHANCE_SEARCH_DOWNSCALE, ENHANCE_MOTION_THRESHOLD,
+)
+from core.qr_reader import offset_results
+
+AVAILABLE_STAGES = ("clahe", "adaptive_threshold", "sharpen", "invert")
+
+_clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8, 8))
+
+
+def _stage_clahe(roi):
+    return _clahe.apply(roi)
+
+
+def _stage_adaptive_threshold(roi):
+    return cv2.adaptiveThreshold(roi, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY, 31, 5)
+
+
+def _stage_sharpen(roi):
+    blur = cv2.GaussianBlur(roi, (0, 0), 3)
+    return cv2.addWeighted(roi, 1.5, blur, -0.5, 0)
+
+
+def _stage_invert(roi):
+    return cv2.bitwise_not(roi)
+
+
+_STAGE_FUNCS = {
+    "clahe": _stage_clahe,
+    "adaptive_threshold": _stage_adaptive_threshold,
+    "sharpen": _stage_sharpen,
+    "invert": _stage_invert,
+}
+
+
+# 画面の変化を見る縮小サイズ
+_MOTION_THUMB = (32, 18)
+
+
+def find_candidate_regions(gray, max_regions=ENHANCE_MAX_REGIONS, min_area_ratio=0.002, downscale=2):
+    """
+    エッジが密集している矩形領域をコード候補として返す [(x, y, w, h), ...]（面積の大きい順）
+    計算量を抑えるため 1/downscale に縮小して求める。
+    """
+    h, w = gray.shape[:2]
+    small = cv2.resize(gray, (w // downscale, h // downscale), interpolation=cv2.INTER_AREA)
+    kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (3, 3))
+    grad = cv2.morphologyEx(small, cv2.MORPH_GRADIENT, kernel)
+    _, bw = cv2.threshold(grad, 0, 255, cv2.THRESH_BINARY | cv2.THRESH_OTSU)
+    bw = cv2.morphologyEx(bw, cv2.MORPH_CLOSE, cv2.getStructuringElement(cv2.MORPH_RECT, (9, 9)))
+    contours, _ = cv2.findContours(bw, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+
+    min_area = min_area_ratio * small.shape[0] * small.shape[1]
+    boxes = [cv2.boundingRect(c) for c in contours]
+    boxes = [b for b in boxes if b[2] * b[3] >= min_area]
+    boxes.sort(key=lambda b: b[2] * b[3], reverse=True)
+
+    regions = []
+    for x, y, bw_, bh in boxes[:max_regions]:
+        # 元解像度に戻し、クワイエットゾーン分の余白を付ける
+        pad = max(bw_, bh) // 4 + 4
+        x0 = max(0, (x - pad) * downscale)
+        y0 = max(0, (y - pad) * downscale)
+        x1 = min(w, (x + bw_ + pad) * downscale)
+        y1 = min(h, (y + bh + pad) * downscale)
+        regions.append((x0, y0, x1 - x0, y1 - y0))
+    return regions
+
+
+class EnhancementPipeline:
+    def __init__(self, stages=ENHANCE_STAGES, budget_ms=ENHANCE_BUDGET_MS, max_regions=ENHANCE_MAX_REGIONS,
+                 motion_threshold=ENHANCE_MOTION_THRESHOLD):
+        self.budget_ms = budget_ms
+        self.max_regions = max_regions
+        self.motion_threshold = motion_threshold
+        self.stats = {}
+        self.skipped = 0  # 画面が変わっていないため補正しなかったフレーム数
+        self._failed_thumb = None  # 前回フレーム全体を補正しても読めなかったときの縮小画像
+        self.set_stages(stages)
+
+    def set_stages(self, stages):
+        """有効な段を順番付きで設定する（空なら無効）"""
+        self.stages = [s for s in (stages or []) if s in _STAGE_FUNCS]
+        for s in self.stages:
+            self.stats.setdefault(s, {"attempts": 0, "rescued": 0})
+        self._failed_thumb = None
+
+    def rescue(self, gray, decode_fn, regions=None):
+        """
+        decode_fn(img) -> results で候補領域を段階的に再デコードする。
+        最初に読めた段で打ち切り、結果には "stage" にその段名を入れる。
+        regions を省略するとフレーム全体から縮小画像で候補を探す（前回読めなかった画面のままなら何もしない）。
+        予算は各段の開始前に確認するため、実行中の1段（補正＋デコード）の分だけ超えることがある。
+        """
+        if not self.stages:
+            return []
+        if regions is None:
+            thumb = cv2.resize(gray, _MOTION_THUMB, interpolation=cv2.INTER_AREA)
+            if self._unchanged(thumb):
+                self.skipped += 1
+                return []
+            results = self._rescue_regions(
+                gray, decode_fn, find_candidate_regions(gray, self.max_regions, downscale=ENHANCE_SEARCH_DOWNSCALE))
+            self._failed_thumb = None if results else thumb
+            return results
+        return self._rescue_regions(gray, decode_fn, regions)
+
+    def _unchanged(self, thumb):
+        prev = self._failed_thumb
+        if prev is None or self.motion_threshold <= 0:
+            return False
+        return int(cv2.absdiff(thumb, prev).max()) < self.motion_threshold
+
+    def _rescue_regions(self, gray, decode_fn, regions):
+        deadline = time.perf_counter() + self.budget_ms / 1000.0
+        for x, y, w, h in regions:
+            roi = gray[y:y + h, x:x + w]
+            for stage in self.stages:
+                if time.perf_counter() >= deadline:
+                    return []
+                self.stats[stage]["attempts"] += 1
+                results = decode_fn(_STAGE_FUNCS[stage](roi))
+                if results:
+                    self.stats[stage]["rescued"] += 1
+                    results = offset_results(results, x, y)
+                    for r in results:
+                        r["stage"] = stage
+                    return results
+        return []
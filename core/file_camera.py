@@ -0,0 +1,121 @@
+"""
+録画ファイル/画像ディレクトリを再生するカメラ（ハードウェアなしでの負荷再現用）
+"""
+import glob
+import os
+import time
+import cv2
+
+from .camera_base import CameraBase
+from config.settings import DEFAULT_FPS
+from .logger import get_logger
+
+logger = get_logger()
+
+IMAGE_EXTS = (".png", ".jpg", ".jpeg", ".bmp", ".tif", ".tiff")
+
+
+class FileCamera(CameraBase):
+    """
+    必要なconfigキー:
+      - path: str  # 動画ファイル、画像ディレクトリ、またはglobパターン
+    任意:
+      - pace: "realtime" | "fast"  # realtimeはfps通りに待機、fastは待機なし（デフォルト: realtime）
+      - loop: bool  # 終端で先頭に戻る（デフォルト: True）
+      - fps: int  # realtime時のフレーム間隔（動画は未指定ならファイルのFPS）
+    """
+
+    def __init__(self, camera_id, config):
+        super().__init__(camera_id, config)
+        self.cap = None
+        self._images = []
+        self._index = 0
+        self._interval = 0.0
+        self._next_t = 0.0
+        self.end_of_stream = False
+
+    def connect(self):
+        path = self.config.get("path", "")
+        self.end_of_stream = False
+
+        if os.path.isdir(path):
+            self._images = sorted(
+                os.path.join(path, f) for f in os.listdir(path) if f.lower().endswith(IMAGE_EXTS)
+            )
+        elif any(ch in path for ch in "*?["):
+            self._images = sorted(p for p in glob.glob(path) if p.lower().endswith(IMAGE_EXTS))
+        else:
+            self._images = []
+
+        if self._images:
+            fps = float(self.config.get("fps", DEFAULT_FPS))
+            logger.info(f"[FILE:{self.camera_id}] 画像 {len(self._images)} 枚を再生: {path}")
+        else:
+            self.cap = cv2.VideoCapture(path)
+            if not self.cap.isOpened():
+                logger.error(f"[FILE:{self.camera_id}] ファイルを開けません: {path}")
+                self.cap = None
+                return False
+            fps = float(self.config.get("fps") or self.cap.get(cv2.CAP_PROP_FPS) or DEFAULT_FPS)
+            logger.info(f"[FILE:{self.camera_id}] 動画を再生: {path} ({fps:.1f}fps)")
+
+        self._index = 0
+        self._interval = 1.0 / fps if self.config.get("pace", "realtime") == "realtime" and fps > 0 else 0.0
+        self._next_t = time.perf_counter()
+        self.is_running = True
+        return True
+
+    def disconnect(self):
+        self.is_running = False
+        if self.cap:
+            self.cap.release()
+            self.cap = None
+
+    def capture_frame(self):
+        if not self.is_running:
+            return None
+
+        self._wait_pace()
+        frame = self._read_next()
+        if frame is None and self.config.get("loop", True):
+            self._rewind()
+            frame = self._read_next()
+        if frame is None:
+            logger.info(f"[FILE:{self.camera_id}] 再生終了")
+            self.end_of_stream = True
+            self.is_running = False
+        return frame
+
+    # ---- 内部メソッド ------------------------------------------------------
+
+    def _wait_pace(self):
+        if self._interval <= 0:
+            return
+        now = time.perf_counter()
+        if self._next_t > now:
+            time.sleep(self._next_t - now)
+            self._next_t += self._interval
+        else:
+            # 処理が追いつかない場合は遅れを持ち越さない
+            self._next_t = now + self._interval
+
+    def _read_next(self):
+        if self._images:
+            while self._index < len(self._images):
+                path = self._images[self._index]
+                self._index += 1
+                frame = cv2.imread(path, cv2.IMREAD_COLOR)
+                if frame is not None:
+                    return frame
+                logger.warning(f"[FILE:{self.camera_id}] 画像を読み込めません: {path}")
+            return None
+
+        if not self.cap:
+            return None
+        ret, frame = self.cap.read()
+        return frame if ret else None
+
+    def _rewind(self):
+        self._index = 0
+        if self.cap:
+            self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
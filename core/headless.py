@@ -0,0 +1,138 @@
+"""
+GUIなしでカメラを動かし、スループット（受信fps/デコード件数）を定期出力する
+"""
+import json
+import os
+import time
+
+from core.process_manager import ProcessManager
+from core.history_store import HistoryStore
+from core.code_recorder import CodeRecorder
+from core.code_matcher import CodeMatcher
+from core.result_sinks import SinkManager
+from core.metrics_server import MetricsServer
+from core.logger import get_logger, setup_logging
+from config.settings import (
+    CAMERA_PROFILES_PATH, HEADLESS_REPORT_INTERVAL_SEC, METRICS_ENABLED, METRICS_HOST, METRICS_PORT,
+)
+
+logger = get_logger()
+
+
+def load_camera_infos(path=CAMERA_PROFILES_PATH):
+    """カメラ設定（camera_info のリスト）をJSONから読み込む。空ファイルは空リスト扱い"""
+    if not os.path.exists(path):
+        return []
+    with open(path, "r", encoding="utf-8") as f:
+        text = f.read().strip()
+    if not text:
+        return []
+    infos = json.loads(text)
+    return infos if isinstance(infos, list) else [infos]
+
+
+class ThroughputCounter:
+    def __init__(self):
+        self.frames = {}
+        self.hits = {}
+        self._t0 = time.perf_counter()
+
+    def add(self, cam_id, results):
+        self.frames[cam_id] = self.frames.get(cam_id, 0) + 1
+        self.hits[cam_id] = self.hits.get(cam_id, 0) + len(results)
+
+    def report(self, reset=True):
+        elapsed = max(time.perf_counter() - self._t0, 1e-6)
+        lines = []
+        for cam_id in sorted(self.frames, key=str):
+            fps = self.frames[cam_id] / elapsed
+            lines.append(f"cam={cam_id} fps={fps:.1f} frames={self.frames[cam_id]} decoded={self.hits.get(cam_id, 0)}")
+        total = sum(self.frames.values()) / elapsed
+        lines.append(f"total fps={total:.1f} elapsed={elapsed:.1f}s")
+        if reset:
+            self.frames.clear()
+            self.hits.clear()
+            self._t0 = time.perf_counter()
+        return lines
+
+
+def run_headless(camera_infos, duration=None, report_interval=HEADLESS_REPORT_INTERVAL_SEC):
+    setup_logging()
+    pm = ProcessManager()
+    sinks = SinkManager.from_config()
+    matcher = CodeMatcher()
+    matcher.start_watcher()
+    recorder = CodeRecorder(HistoryStore(), sinks=sinks, matcher=matcher)
+    interval = ThroughputCounter()
+    overall = ThroughputCounter()
+    server = None
+    if METRICS_ENABLED:
+        server = MetricsServer(pm.metrics, METRICS_HOST, METRICS_PORT, pm=pm)
+        server.start()
+
+    for info in camera_infos:
+        info.setdefault("decode_mode", "all")
+        info.setdefault("display_fps", 0)  # 画面がないので画像は送らせない
+    pm.start_cameras(camera_infos)
+
+    active = {info["id"] for info in camera_infos}
+    t_start = time.perf_counter()
+    t_report = t_start
+    try:
+        while active:
+            frames = pm.wait_frames(timeout=0.5)
+            for data in frames:
+                if isinstance(data, tuple) and data[0] == "ERROR":
+                    logger.error(data[1])
+                    continue
+                if isinstance(data, tuple) and data[0] == "STATUS":
+                    logger.warning(f"[STATUS:{data[1]}] {data[2]}")
+                    continue
+                if isinstance(data, tuple) and data[0] == "PROFILE":
+                    logger.info(f"[PROFILE:{data[1]}] {data[2]}")
+                    continue
+                if isinstance(data, tuple) and data[0] == "EOS":
+                    active.discard(data[1])
+                    continue
+                if isinstance(data, tuple) and data[0] == "READY":
+                    logger.info(f"[READY:{data[1]}] 最初のフレームまで {data[2]:.0f} ms")
+                    continue
+                if isinstance(data, tuple) and data[0] == "SITE_READY":
+                    continue  # ProcessManager 側でログ出力済み
+                if isinstance(data, tuple) and data[0] == "PTZ_ACK":
+                    continue  # ヘッドレスではPTZ操作しない
+
+                cam_id, cam_type, _frame, results, meta = data
+                pm.metrics.observe_local(cam_id, "queue_transit", (time.time() - meta["sent_at"]) * 1000.0)
+                interval.add(cam_id, results)
+                overall.add(cam_id, results)
+                t0 = time.perf_counter()
+                recorded = recorder.record(cam_id, cam_type, results)
+                if recorded:
+                    pm.metrics.observe_local(cam_id, "history_write", (time.perf_counter() - t0) * 1000.0)
+                for ts, res in recorded:
+                    match = f" ({res['match']})" if res.get("match") else ""
+                    logger.info(f"[{res.get('type','')}][{ts}][{cam_type}:{cam_id}] {res['data']}{match}")
+
+            # 起動に失敗したプロセスも終了扱い
+            active = {cid for cid in active if pm.is_camera_running(cid)}
+
+            now = time.perf_counter()
+            if now - t_report >= report_interval:
+                t_report = now
+                for line in interval.report():
+                    logger.info(f"[THROUGHPUT] {line}")
+            if duration and now - t_start >= duration:
+                break
+    except KeyboardInterrupt:
+        pass
+    finally:
+        pm.shutdown()
+        matcher.stop_watcher()
+        if matcher.enabled:
+            logger.info(f"[MATCH] {matcher.stats}")
+        sinks.close()
+        if server:
+            server.stop()
+        for line in overall.report(reset=False):
+            logger.info(f"[THROUGHPUT:TOTAL] {line}")
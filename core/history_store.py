@@ -2,6 +2,7 @@ import sqlite3
 import os
 import csv
 from datetime import datetime
+from pathlib import Path
 
 DB_PATH = os.path.join("data", "history.db")
 
@@ -13,6 +14,8 @@ class HistoryStore:
 
     def _init_schema(self):
         with sqlite3.connect(self.db_path) as conn:
+            # WALにして、履歴検索（読み取り）中も記録（書き込み）が待たされないようにする（DBファイルに永続）
+            conn.execute("PRAGMA journal_mode=WAL")
             c = conn.cursor()
             c.execute("""
                 CREATE TABLE IF NOT EXISTS qr_history (
@@ -25,19 +28,39 @@ class HistoryStore:
             """)
             c.execute("CREATE INDEX IF NOT EXISTS idx_ts ON qr_history(ts)")
             c.execute("CREATE INDEX IF NOT EXISTS idx_cam ON qr_history(camera_id)")
+            # 既存DBへの列追加（照合結果: matched / duplicate / unknown、照合なしはNULL）
+            columns = {row[1] for row in c.execute("PRAGMA table_info(qr_history)")}
+            if "match_status" not in columns:
+                c.execute("ALTER TABLE qr_history ADD COLUMN match_status TEXT")
             conn.commit()
 
-    def add_record(self, ts: str, camera_id: str, camera_type: str, payload: str):
+    def add_record(self, ts: str, camera_id: str, camera_type: str, payload: str, match_status: str = None):
         with sqlite3.connect(self.db_path) as conn:
             c = conn.cursor()
             c.execute(
-                "INSERT INTO qr_history (ts, camera_id, camera_type, payload) VALUES (?, ?, ?, ?)",
-                (ts, str(camera_id), camera_type, payload),
+                "INSERT INTO qr_history (ts, camera_id, camera_type, payload, match_status) VALUES (?, ?, ?, ?, ?)",
+                (ts, str(camera_id), camera_type, payload, match_status),
             )
             conn.commit()
 
-    def query(self, ts_from: str = None, ts_to: str = None, camera_id: str = None, keyword: str = None, limit: int = 500):
-        query = "SELECT ts, camera_id, camera_type, payload FROM qr_history WHERE 1=1"
+    def add_records(self, rows):
+        """rows: [(ts, camera_id, camera_type, payload[, match_status]), ...] を1トランザクションで書き込む"""
+        with sqlite3.connect(self.db_path) as conn:
+            conn.executemany(
+                "INSERT INTO qr_history (ts, camera_id, camera_type, payload, match_status) VALUES (?, ?, ?, ?, ?)",
+                [(row[0], str(row[1]), row[2], row[3], row[4] if len(row) > 4 else None) for row in rows],
+            )
+            conn.commit()
+
+    def open_reader(self):
+        """検索用の読み取り専用接続（別スレッドから interrupt() で中断できるようスレッド制限なし）"""
+        uri = Path(os.path.abspath(self.db_path)).as_uri() + "?mode=ro"
+        return sqlite3.connect(uri, uri=True, check_same_thread=False)
+
+    def query(self, ts_from: str = None, ts_to: str = None, camera_id: str = None, keyword: str = None, limit: int = 500,
+              match_status: str = None, conn=None):
+        """conn を渡すとその接続で実行する（open_reader() の接続を使い回す場合）"""
+        query = "SELECT ts, camera_id, camera_type, payload, match_status FROM qr_history WHERE 1=1"
         params = []
         if ts_from:
             query += " AND ts >= ?"
@@ -45,15 +68,20 @@ class HistoryStore:
         if ts_to:
             query += " AND ts <= ?"
             params.append(ts_to)
-        if camera_id:
+        if camera_id is not None and camera_id != "":  # USBカメラのID 0 も条件にする
             query += " AND camera_id = ?"
             params.append(str(camera_id))
         if keyword:
             query += " AND payload LIKE ?"
             params.append(f"%{keyword}%")
+        if match_status:
+            query += " AND match_status = ?"
+            params.append(match_status)
         query += " ORDER BY ts DESC LIMIT ?"
         params.append(limit)
 
+        if conn is not None:
+            return conn.execute(query, params).fetchall()
         with sqlite3.connect(self.db_path) as conn:
             c = conn.cursor()
             c.execute(query, params)
@@ -63,7 +91,7 @@ class HistoryStore:
         os.makedirs(os.path.dirname(path), exist_ok=True)
         with open(path, "w", newline="", encoding="utf-8") as f:
             writer = csv.writer(f)
-            writer.writerow(["ts", "camera_id", "camera_type", "payload"])
+            writer.writerow(["ts", "camera_id", "camera_type", "payload", "match_status"])
             writer.writerows(rows)
 
 def now_iso():
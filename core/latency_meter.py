@@ -0,0 +1,64 @@
+"""
+キャプチャ遅延の計測
+  - read_ms: cap.read() でブロックした時間
+  - lag_ms : 壁時計とストリームPTSの差（観測最小値を0とした相対値）
+             FFmpeg側のバッファに溜まったフレーム分の遅れの目安になる
+"""
+import time
+
+
+class CaptureLatencyMeter:
+    def __init__(self, alpha=0.1):
+        self.alpha = alpha
+        self.frames = 0
+        self.read_ms_avg = 0.0
+        self.read_ms_max = 0.0
+        self.lag_ms_avg = 0.0
+        self.lag_ms_max = 0.0
+        self._min_offset_ms = None
+        self._last_log = time.monotonic()
+
+    def _ewma(self, avg, value):
+        if self.frames <= 1:
+            return value
+        return avg + self.alpha * (value - avg)
+
+    def record(self, read_ms, pts_ms=None):
+        """1フレーム分を記録する。pts_ms はストリーム上の位置（取得できなければNone）"""
+        self.frames += 1
+        self.read_ms_avg = self._ewma(self.read_ms_avg, read_ms)
+        self.read_ms_max = max(self.read_ms_max, read_ms)
+
+        if pts_ms is not None and pts_ms > 0:
+            offset = time.monotonic() * 1000.0 - pts_ms
+            if self._min_offset_ms is None or offset < self._min_offset_ms:
+                self._min_offset_ms = offset
+            lag = offset - self._min_offset_ms
+            self.lag_ms_avg = self._ewma(self.lag_ms_avg, lag)
+            self.lag_ms_max = max(self.lag_ms_max, lag)
+
+    def reset(self):
+        """再接続時など、PTSの基準が変わる場合に呼ぶ"""
+        self._min_offset_ms = None
+        self.read_ms_max = 0.0
+        self.lag_ms_max = 0.0
+
+    def snapshot(self) -> dict:
+        return {
+            "frames": self.frames,
+            "read_ms_avg": round(self.read_ms_avg, 2),
+            "read_ms_max": round(self.read_ms_max, 2),
+            "lag_ms_avg": round(self.lag_ms_avg, 2),
+            "lag_ms_max": round(self.lag_ms_max, 2),
+        }
+
+    def pop_snapshot(self, interval_sec):
+        """interval_sec経過していればスナップショットを返し最大値をリセット、未経過ならNone"""
+        now = time.monotonic()
+        if now - self._last_log < interval_sec:
+            return None
+        self._last_log = now
+        snap = self.snapshot()
+        self.read_ms_max = 0.0
+        self.lag_ms_max = 0.0
+        return snap
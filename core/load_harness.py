@@ -0,0 +1,265 @@
+"""
+合成カメラによる負荷試験（1台のPCで何台まで持続処理できるかの確認・性能劣化の検出用）
+台数を段階的に増やし、ProcessManager → GUIなしの受信側（履歴書き込みを含む）までを通して
+カメラあたりの持続fps・デコード遅延・破棄率・CPU・RSSを測る。
+使い方:
+  python -m core.load_harness --cameras 1 2 4 8 16 --resolution 1280x720 --fps 15 --duration 30
+  python -m core.load_harness --cameras 4 8 --output data/logs/load.json --baseline data/logs/load_prev.json
+"""
+import argparse
+import json
+import multiprocessing as mp
+import os
+import sys
+import time
+
+from core.process_manager import ProcessManager
+from core.history_store import HistoryStore
+from core.code_recorder import CodeRecorder
+from core.metrics import Histogram, process_usage
+from core.logger import setup_logging
+from config.settings import METRICS_REPORT_INTERVAL_SEC
+
+# fpsが目標のこの割合を下回るカメラがあれば飽和とみなす
+SATURATION_RATIO = 0.9
+# --baseline との比較で劣化とみなす変化
+REGRESSION_FPS_DROP = 0.10
+REGRESSION_LATENCY_RISE = 0.20
+
+
+def _pct(values, p):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p / 100.0))]
+
+
+class _Consumer:
+    """ヘッドレスと同じ受信処理（重複排除＋履歴書き込み）をしながら件数と遅延を集計する"""
+
+    def __init__(self, pm, recorder):
+        self.pm = pm
+        self.recorder = recorder
+        self.reset()
+
+    def reset(self):
+        self.frames = {}
+        self.hits = {}
+        self.transit_ms = {}
+        self.history_ms = []
+
+    def poll(self, timeout):
+        for data in self.pm.wait_frames(timeout=timeout):
+            if isinstance(data, tuple) and data[0] in ("ERROR", "STATUS", "PROFILE", "EOS", "READY", "SITE_READY", "PTZ_ACK"):
+                if data[0] in ("ERROR", "STATUS"):
+                    print(f"[WARN] {data[1:]}", file=sys.stderr)
+                continue
+            cam_id, cam_type, _frame, results, meta = data
+            self.frames[cam_id] = self.frames.get(cam_id, 0) + 1
+            self.hits[cam_id] = self.hits.get(cam_id, 0) + len(results)
+            self.transit_ms.setdefault(cam_id, []).append((time.time() - meta["sent_at"]) * 1000.0)
+            if results:
+                t0 = time.perf_counter()
+                if self.recorder.record(cam_id, cam_type, results):
+                    self.history_ms.append((time.perf_counter() - t0) * 1000.0)
+
+    def run_for(self, seconds):
+        end = time.perf_counter() + seconds
+        while True:
+            remaining = end - time.perf_counter()
+            if remaining <= 0:
+                return
+            self.poll(min(remaining, 0.5))
+
+
+def _worker_pids(pm):
+    return {p.pid for p in pm.processes.values() if p is not None and p.pid}
+
+
+def _sample_usage(pids):
+    return {pid: process_usage(pid) for pid in pids}
+
+
+def _decode_hist(snap):
+    if not snap or "decode" not in snap.get("histograms", {}):
+        return Histogram()
+    return Histogram.from_dict(snap["histograms"]["decode"])
+
+
+def _fresh_db(path):
+    """前回の実行/前の段で溜まった履歴を消す（DBの大きさで書き込み時間が変わり、基準との比較がずれるため）"""
+    for p in (path, path + "-wal", path + "-shm", path + "-journal"):
+        if os.path.exists(p):
+            os.remove(p)
+    return path
+
+
+def run_step(n, args):
+    w, h = args.resolution
+    infos = [{
+        "type": "synthetic",
+        "id": f"sim{i}",
+        "decode_mode": args.mode,
+        "display_fps": 0,
+        "config": {
+            "resolution": (w, h),
+            "fps": args.fps,
+            "codes": args.codes,
+            "code_size": args.code_size,
+            "payload_interval": args.payload_interval,
+        },
+    } for i in range(n)]
+
+    pm = ProcessManager(supervise=False, cameras_per_process=args.cameras_per_process)
+    consumer = _Consumer(pm, CodeRecorder(HistoryStore(_fresh_db(args.history_db)), expire_sec=15))
+    try:
+        pm.start_cameras(infos)
+        # ウォームアップ（プロセス起動・接続・最初のメトリクス送信まで）
+        consumer.run_for(max(args.warmup, METRICS_REPORT_INTERVAL_SEC * 1.5))
+
+        cam_ids = [info["id"] for info in infos]
+        base = {cid: pm.metrics.worker_snapshot(cid) for cid in cam_ids}
+        pids = _worker_pids(pm)
+        usage0 = _sample_usage(pids)
+        parent0 = process_usage(os.getpid())
+        consumer.reset()
+        t0 = time.perf_counter()
+
+        consumer.run_for(args.duration)
+        # 区間終わりのスナップショットを待つ
+        consumer.run_for(METRICS_REPORT_INTERVAL_SEC * 1.1)
+
+        elapsed = time.perf_counter() - t0
+        usage1 = _sample_usage(pids)
+        parent1 = process_usage(os.getpid())
+        latest = {cid: pm.metrics.worker_snapshot(cid) for cid in cam_ids}
+    finally:
+        pm.shutdown()
+
+    per_camera = {}
+    decode_all = Histogram()
+    drops = frames_worker = 0
+    for cid in cam_ids:
+        d = _decode_hist(latest[cid]).minus(_decode_hist(base[cid])) if base[cid] else _decode_hist(latest[cid])
+        for i, c in enumerate(d.counts):
+            decode_all.counts[i] += c
+        decode_all.count += d.count
+        c1 = (latest[cid] or {}).get("counters", {})
+        c0 = (base[cid] or {}).get("counters", {})
+        cam_drops = c1.get("drops", 0) - c0.get("drops", 0)
+        cam_frames = c1.get("frames", 0) - c0.get("frames", 0)
+        drops += cam_drops
+        frames_worker += cam_frames
+        received = consumer.frames.get(cid, 0)
+        per_camera[cid] = {
+            "fps": round(received / elapsed, 2),
+            "decode_p50_ms": d.percentile(50),
+            "decode_p95_ms": d.percentile(95),
+            "decode_p99_ms": d.percentile(99),
+            "transit_p95_ms": round(_pct(consumer.transit_ms.get(cid, []), 95), 2),
+            "drop_rate": round(cam_drops / cam_frames, 4) if cam_frames else 0.0,
+            "hits_per_frame": round(consumer.hits.get(cid, 0) / received, 3) if received else 0.0,
+        }
+
+    fps = [row["fps"] for row in per_camera.values()]
+    cpu_pct = rss = None
+    if all(usage0.get(p) and usage1.get(p) for p in pids):
+        cpu_pct = sum(usage1[p][0] - usage0[p][0] for p in pids) / elapsed * 100.0 / n
+        rss = sum(usage1[p][1] for p in pids) / n / (1024 * 1024)
+    step = {
+        "cameras": n,
+        "fps_mean": round(sum(fps) / n, 2),
+        "fps_min": min(fps),
+        "decode_p50_ms": decode_all.percentile(50),
+        "decode_p95_ms": decode_all.percentile(95),
+        "decode_p99_ms": decode_all.percentile(99),
+        "transit_p95_ms": round(_pct([v for vs in consumer.transit_ms.values() for v in vs], 95), 2),
+        "history_write_p95_ms": round(_pct(consumer.history_ms, 95), 2),
+        "drop_rate": round(drops / frames_worker, 4) if frames_worker else 0.0,
+        "cpu_pct_per_camera": round(cpu_pct, 1) if cpu_pct is not None else None,
+        "rss_mb_per_camera": round(rss, 1) if rss is not None else None,
+        "parent_cpu_pct": (round((parent1[0] - parent0[0]) / elapsed * 100.0, 1)
+                           if parent0 and parent1 else None),
+        "per_camera": per_camera,
+    }
+    step["saturated"] = bool(args.fps) and step["fps_min"] < args.fps * SATURATION_RATIO
+    return step
+
+
+def compare_baseline(steps, baseline_path):
+    """基準結果と比べて劣化した項目を返す"""
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        base = {s["cameras"]: s for s in json.load(f).get("steps", [])}
+    problems = []
+    for s in steps:
+        b = base.get(s["cameras"])
+        if not b:
+            continue
+        if b["fps_mean"] and s["fps_mean"] < b["fps_mean"] * (1 - REGRESSION_FPS_DROP):
+            problems.append(f"N={s['cameras']} fps {b['fps_mean']} -> {s['fps_mean']}")
+        if b["decode_p95_ms"] and s["decode_p95_ms"] > b["decode_p95_ms"] * (1 + REGRESSION_LATENCY_RISE):
+            problems.append(f"N={s['cameras']} decode p95 {b['decode_p95_ms']}ms -> {s['decode_p95_ms']}ms")
+    return problems
+
+
+def _resolution(text):
+    w, h = text.lower().split("x")
+    return int(w), int(h)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="合成カメラによるエンドツーエンド負荷試験")
+    parser.add_argument("--cameras", type=int, nargs="+", default=[1, 2, 4, 8], help="試す台数（順に実行）")
+    parser.add_argument("--resolution", type=_resolution, default=(1280, 720), help="例: 1280x720")
+    parser.add_argument("--fps", type=float, default=15, help="カメラ毎の生成fps（0で最大速度）")
+    parser.add_argument("--codes", type=int, default=1, help="1フレーム内のコード数")
+    parser.add_argument("--code-size", type=int, default=160)
+    parser.add_argument("--payload-interval", type=float, default=2.0, help="コード内容を変える間隔（秒）")
+    parser.add_argument("--mode", default="all", choices=["all", "datamatrix", "qrcode", "barcode"])
+    parser.add_argument("--cameras-per-process", type=int, default=1)
+    parser.add_argument("--duration", type=float, default=30, help="1段あたりの計測時間（秒）")
+    parser.add_argument("--warmup", type=float, default=5, help="計測前の待ち時間（秒）")
+    parser.add_argument("--history-db", default=os.path.join("data", "load_harness.db"),
+                        help="履歴の書き込み先（本番の履歴DBとは分ける。各段の開始時に作り直す）")
+    parser.add_argument("--output", default=None, help="結果JSONの保存先")
+    parser.add_argument("--baseline", default=None, help="比較する過去の結果JSON（劣化があれば終了コード1）")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    steps = []
+    print(f"{'N':>4} {'fps avg':>8} {'fps min':>8} {'dec p50':>8} {'dec p95':>8} {'dec p99':>8} "
+          f"{'drop%':>6} {'CPU%/cam':>9} {'RSS MB/cam':>10}")
+    for n in args.cameras:
+        step = run_step(n, args)
+        steps.append(step)
+        cpu = "-" if step["cpu_pct_per_camera"] is None else f"{step['cpu_pct_per_camera']:.1f}"
+        rss = "-" if step["rss_mb_per_camera"] is None else f"{step['rss_mb_per_camera']:.0f}"
+        print(f"{n:>4} {step['fps_mean']:>8.1f} {step['fps_min']:>8.1f} {step['decode_p50_ms']:>8} "
+              f"{step['decode_p95_ms']:>8} {step['decode_p99_ms']:>8} {step['drop_rate'] * 100:>6.1f} "
+              f"{cpu:>9} {rss:>10}" + ("  <- 飽和" if step["saturated"] else ""))
+
+    saturated = next((s["cameras"] for s in steps if s["saturated"]), None)
+    if saturated is not None:
+        print(f"飽和: {saturated} 台で目標 {args.fps}fps を維持できません")
+
+    if args.output:
+        os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"params": {k: v for k, v in vars(args).items() if k not in ("output", "baseline")},
+                       "steps": steps}, f, ensure_ascii=False, indent=2)
+
+    if args.baseline:
+        problems = compare_baseline(steps, args.baseline)
+        for p in problems:
+            print(f"[REGRESSION] {p}")
+        if problems:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    mp.set_start_method("spawn")
+    setup_logging()
+    sys.exit(main())
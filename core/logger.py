@@ -1,32 +1,117 @@
 """
 アプリ全体のログ管理（ローテーション対応）
+ログ呼び出し側はキューに積むだけで、ファイル/コンソールへの書き込みは
+親プロセスの QueueListener スレッドがまとめて行う。
+カメラワーカー（子プロセス）は configure_worker_logging() で同じキューへ送る。
+リスナーはエントリポイント（main.py / ヘッドレス / 負荷試験）で setup_logging() を呼んで開始する。
+import しただけではスレッドやファイルを開かない。
 """
+import atexit
 import logging
-from logging.handlers import RotatingFileHandler
+import multiprocessing as mp
 import os
-from config.settings import LOG_DIR, LOG_FILE_BASENAME, LOG_MAX_BYTES, LOG_BACKUP_COUNT
+import time
+from logging.handlers import RotatingFileHandler, QueueHandler, QueueListener
+from config.settings import (
+    LOG_DIR, LOG_FILE_BASENAME, LOG_MAX_BYTES, LOG_BACKUP_COUNT, LOG_RATE_LIMIT_SEC,
+)
 
-_logger = None
+APP_LOGGER_NAME = "multi_cam_qr_app"
+
+_log_queue = None
+_listener = None
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    同じ警告（ロガー名・レベル・メッセージが同一）を window_sec に1回へ抑制する。
+    抑制した件数は次に出力するときにメッセージ末尾へ付記する。
+    INFO以下は対象外。
+    """
+
+    def __init__(self, window_sec=LOG_RATE_LIMIT_SEC, max_keys=1000):
+        super().__init__()
+        self.window_sec = window_sec
+        self.max_keys = max_keys
+        self._last = {}  # key -> (最終出力時刻, 抑制件数)
+
+    def filter(self, record):
+        if record.levelno < logging.WARNING or self.window_sec <= 0:
+            return True
+        key = (record.name, record.levelno, str(record.msg))
+        now = time.monotonic()
+        last, suppressed = self._last.get(key, (0.0, 0))
+        if now - last < self.window_sec:
+            self._last[key] = (last, suppressed + 1)
+            return False
+        if len(self._last) >= self.max_keys:
+            self._last.clear()
+        self._last[key] = (now, 0)
+        if suppressed:
+            record.msg = f"{record.msg}（同一メッセージ {suppressed} 件を抑制）"
+        return True
 
-def get_logger():
-    global _logger
-    if _logger:
-        return _logger
+
+def _make_queue_handler(log_queue):
+    handler = QueueHandler(log_queue)
+    handler.addFilter(RateLimitFilter())
+    return handler
+
+
+def setup_logging():
+    """親プロセスのエントリポイントで1回だけ呼ぶ。ログキューを返す"""
+    global _log_queue, _listener
+    if _listener is not None:
+        return _log_queue
 
     os.makedirs(LOG_DIR, exist_ok=True)
-    logger = logging.getLogger("multi_cam_qr_app")
-    logger.setLevel(logging.INFO)
+    formatter = logging.Formatter("%(asctime)s [%(levelname)s] %(name)s - %(message)s")
 
     log_path = os.path.join(LOG_DIR, LOG_FILE_BASENAME)
-    handler = RotatingFileHandler(log_path, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUP_COUNT, encoding="utf-8")
-    formatter = logging.Formatter("%(asctime)s [%(levelname)s] %(name)s - %(message)s")
-    handler.setFormatter(formatter)
-    logger.addHandler(handler)
+    file_handler = RotatingFileHandler(log_path, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUP_COUNT, encoding="utf-8")
+    file_handler.setFormatter(formatter)
 
     # コンソールにも出す
     stream = logging.StreamHandler()
     stream.setFormatter(formatter)
-    logger.addHandler(stream)
 
-    _logger = logger
-    return _logger
+    _log_queue = mp.Queue()
+    _listener = QueueListener(_log_queue, file_handler, stream, respect_handler_level=True)
+    _listener.start()
+    atexit.register(shutdown_logging)
+
+    root = logging.getLogger()
+    root.setLevel(logging.INFO)
+    root.addHandler(_make_queue_handler(_log_queue))
+    return _log_queue
+
+
+def configure_worker_logging(log_queue):
+    """子プロセスの先頭で呼び、全ログを親のキューへ送る"""
+    if log_queue is None:
+        return
+    root = logging.getLogger()
+    for h in list(root.handlers):
+        root.removeHandler(h)
+    root.setLevel(logging.INFO)
+    root.addHandler(_make_queue_handler(log_queue))
+
+
+def get_log_queue():
+    """setup_logging() 前は None（ワーカーは既定のハンドラのまま）"""
+    return _log_queue
+
+
+def shutdown_logging():
+    """キューに残ったログを書き出してから停止する"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def get_logger():
+    # 出力先は setup_logging() / configure_worker_logging() が root に付ける
+    logger = logging.getLogger(APP_LOGGER_NAME)
+    logger.setLevel(logging.INFO)
+    return logger
@@ -0,0 +1,221 @@
+"""
+パイプライン各段の計測（ヒストグラム/カウンタ）
+  - WorkerMetrics  : camera_worker 内で計測し、定期的にスナップショットを親へ送る
+  - MetricsRegistry: 親プロセスでワーカーのスナップショットとGUI側の計測を集約する
+"""
+import os
+import threading
+import time
+
+# 段ごとの処理時間のバケット境界（ミリ秒）
+LATENCY_BUCKETS_MS = (0.5, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000)
+
+# ワーカー側の段
+WORKER_STAGES = ("capture", "retrieve", "cvt_color", "decode")
+# 親プロセス側の段
+LOCAL_STAGES = ("queue_transit", "gui_render", "history_write", "ptz_rtt")
+
+WORKER_COUNTERS = ("frames", "decode_hits", "drops", "reconnects")
+
+
+def process_usage(pid=None):
+    """
+    プロセスの (CPU秒, RSSバイト)。psutil があれば使い、なければ /proc（Linux）から読む。
+    取得できなければ None
+    """
+    pid = pid or os.getpid()
+    try:
+        import psutil  # 任意依存
+        p = psutil.Process(pid)
+        t = p.cpu_times()
+        return t.user + t.system, p.memory_info().rss
+    except ImportError:
+        pass
+    except Exception:
+        return None
+    try:
+        with open(f"/proc/{pid}/stat", "r") as f:
+            fields = f.read().rsplit(")", 1)[1].split()
+        cpu = (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")  # utime, stime
+        rss = 0
+        with open(f"/proc/{pid}/status", "r") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    rss = int(line.split()[1]) * 1024
+                    break
+        return cpu, rss
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+class Histogram:
+    def __init__(self, buckets=LATENCY_BUCKETS_MS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # 最後は +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.sum += value
+        self.count += 1
+        for i, b in enumerate(self.buckets):
+            if value <= b:
+                self.counts[i] += 1
+                return
+        self.counts[-1] += 1
+
+    def percentile(self, p):
+        """バケット境界から近似したパーセンタイル（p: 0-100）"""
+        if self.count == 0:
+            return 0.0
+        target = self.count * p / 100.0
+        acc = 0
+        for i, c in enumerate(self.counts):
+            acc += c
+            if acc >= target:
+                return self.buckets[i] if i < len(self.buckets) else self.buckets[-1]
+        return self.buckets[-1]
+
+    def to_dict(self):
+        return {"buckets": list(self.buckets), "counts": list(self.counts), "sum": self.sum, "count": self.count}
+
+    @classmethod
+    def from_dict(cls, d):
+        h = cls(d["buckets"])
+        h.counts = list(d["counts"])
+        h.sum = d["sum"]
+        h.count = d["count"]
+        return h
+
+    def minus(self, base):
+        """base（過去の同じヒストグラム）からの増分。区間内の分布を求めるのに使う"""
+        h = Histogram(self.buckets)
+        h.counts = [a - b for a, b in zip(self.counts, base.counts)]
+        h.sum = self.sum - base.sum
+        h.count = self.count - base.count
+        return h
+
+
+class WorkerMetrics:
+    def __init__(self, cam_id):
+        self.cam_id = cam_id
+        self.histograms = {s: Histogram() for s in WORKER_STAGES}
+        self.counters = {c: 0 for c in WORKER_COUNTERS}
+        self.gauges = {}
+        self._fps_t0 = time.perf_counter()
+        self._fps_frames = 0
+
+    def observe(self, stage, ms):
+        h = self.histograms.get(stage)
+        if h is None:
+            h = self.histograms[stage] = Histogram()
+        h.observe(ms)
+
+    def inc(self, name, n=1):
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def set_gauge(self, name, value):
+        self.gauges[name] = value
+
+    def snapshot(self):
+        now = time.perf_counter()
+        elapsed = max(now - self._fps_t0, 1e-6)
+        fps = (self.counters["frames"] - self._fps_frames) / elapsed
+        self._fps_t0 = now
+        self._fps_frames = self.counters["frames"]
+
+        gauges = dict(self.gauges)
+        gauges["fps"] = round(fps, 2)
+        return {
+            "histograms": {k: h.to_dict() for k, h in self.histograms.items()},
+            "counters": dict(self.counters),
+            "gauges": gauges,
+            "ts": time.time(),
+        }
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._workers = {}   # cam_id -> 最新スナップショット
+        self._local = {}     # cam_id -> {stage: Histogram}
+
+    def update_worker(self, cam_id, snapshot):
+        with self._lock:
+            self._workers[cam_id] = snapshot
+
+    def observe_local(self, cam_id, stage, ms):
+        with self._lock:
+            stages = self._local.setdefault(cam_id, {})
+            h = stages.get(stage)
+            if h is None:
+                h = stages[stage] = Histogram()
+            h.observe(ms)
+
+    def worker_snapshot(self, cam_id):
+        """ワーカーから届いた最新のスナップショット（未着ならNone）"""
+        with self._lock:
+            return self._workers.get(cam_id)
+
+    def remove(self, cam_id):
+        with self._lock:
+            self._workers.pop(cam_id, None)
+            self._local.pop(cam_id, None)
+
+    def summary(self):
+        """GUI表示用: {cam_id: {"fps", "p50/p95 per stage", counters...}}"""
+        out = {}
+        with self._lock:
+            cam_ids = set(self._workers) | set(self._local)
+            for cam_id in cam_ids:
+                snap = self._workers.get(cam_id, {})
+                row = dict(snap.get("counters", {}))
+                row.update(snap.get("gauges", {}))
+                hists = {k: Histogram.from_dict(v) for k, v in snap.get("histograms", {}).items()}
+                hists.update(self._local.get(cam_id, {}))
+                for stage, h in hists.items():
+                    row[f"{stage}_p50"] = h.percentile(50)
+                    row[f"{stage}_p95"] = h.percentile(95)
+                out[cam_id] = row
+        return out
+
+    def render_prometheus(self):
+        """Prometheusテキスト形式（処理時間は秒に換算）"""
+        lines = [
+            "# HELP qr_stage_latency_seconds Per-stage processing latency",
+            "# TYPE qr_stage_latency_seconds histogram",
+        ]
+        counter_lines = {}
+        gauge_lines = {}
+        with self._lock:
+            cam_ids = sorted(set(self._workers) | set(self._local), key=str)
+            for cam_id in cam_ids:
+                snap = self._workers.get(cam_id, {})
+                hists = {k: Histogram.from_dict(v) for k, v in snap.get("histograms", {}).items()}
+                hists.update(self._local.get(cam_id, {}))
+                for stage, h in sorted(hists.items()):
+                    labels = f'camera="{_escape(cam_id)}",stage="{stage}"'
+                    acc = 0
+                    for b, c in zip(h.buckets, h.counts):
+                        acc += c
+                        lines.append(f'qr_stage_latency_seconds_bucket{{{labels},le="{b / 1000.0:g}"}} {acc}')
+                    lines.append(f'qr_stage_latency_seconds_bucket{{{labels},le="+Inf"}} {h.count}')
+                    lines.append(f"qr_stage_latency_seconds_sum{{{labels}}} {h.sum / 1000.0:.6f}")
+                    lines.append(f"qr_stage_latency_seconds_count{{{labels}}} {h.count}")
+                for name, v in snap.get("counters", {}).items():
+                    counter_lines.setdefault(name, []).append(f'qr_{name}_total{{camera="{_escape(cam_id)}"}} {v}')
+                for name, v in snap.get("gauges", {}).items():
+                    if isinstance(v, (int, float)):
+                        gauge_lines.setdefault(name, []).append(f'qr_{name}{{camera="{_escape(cam_id)}"}} {v}')
+
+        for name, rows in sorted(counter_lines.items()):
+            lines.append(f"# TYPE qr_{name}_total counter")
+            lines.extend(rows)
+        for name, rows in sorted(gauge_lines.items()):
+            lines.append(f"# TYPE qr_{name} gauge")
+            lines.extend(rows)
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
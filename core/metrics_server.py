@@ -0,0 +1,114 @@
+"""
+ローカル専用のPrometheusエンドポイント（GET /metrics）
+操作用: POST /profile?camera=<id>&kind=cprofile|sampling&seconds=30
+        POST /profile/stop?camera=<id>
+        POST /tracemalloc?camera=<id>&action=start|snapshot|stop  （出力は LOG_DIR）
+        POST /enhance?camera=<id>&stages=clahe,invert  （フォールバック前処理の段。stages= で無効）
+"""
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+from core.enhance import AVAILABLE_STAGES
+from core.logger import get_logger
+
+logger = get_logger()
+
+
+class _Handler(BaseHTTPRequestHandler):
+    registry = None
+    pm = None
+
+    def do_GET(self):
+        if self.path.split("?", 1)[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = self.registry.render_prometheus().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        if self.pm is None or url.path not in ("/profile", "/profile/stop", "/tracemalloc", "/enhance"):
+            self.send_error(404)
+            return
+        params = {k: v[0] for k, v in parse_qs(url.query, keep_blank_values=True).items()}
+        cam_id = self.pm.find_camera_id(params.get("camera", ""))
+        if cam_id is None:
+            self._reply(404, "unknown camera\n")
+            return
+        if url.path == "/profile":
+            try:
+                seconds = float(params.get("seconds", 30))
+            except ValueError:
+                self._reply(400, "invalid seconds\n")
+                return
+            self.pm.start_profile(cam_id, params.get("kind", "cprofile"), seconds)
+        elif url.path == "/tracemalloc":
+            actions = {
+                "start": self.pm.start_tracemalloc,
+                "snapshot": self.pm.tracemalloc_snapshot,
+                "stop": self.pm.stop_tracemalloc,
+            }
+            action = actions.get(params.get("action", "snapshot"))
+            if action is None:
+                self._reply(400, "invalid action\n")
+                return
+            action(cam_id)
+        elif url.path == "/enhance":
+            # 段別の試行/成功数（enhance_<段>_attempts / _rescued）を見て、効かない重い段を外す
+            if "stages" not in params:
+                self._reply(400, "missing stages\n")
+                return
+            stages = [s for s in params["stages"].split(",") if s]
+            unknown = [s for s in stages if s not in AVAILABLE_STAGES]
+            if unknown:
+                self._reply(400, f"unknown stages: {','.join(unknown)}\n")
+                return
+            self.pm.set_enhance_stages(cam_id, stages)
+        else:
+            self.pm.stop_profile(cam_id)
+        self._reply(202, "accepted\n")
+
+    def _reply(self, status, text):
+        body = text.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "text/plain; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, fmt, *args):
+        pass  # アクセスログは出さない
+
+
+class MetricsServer:
+    def __init__(self, registry, host="127.0.0.1", port=9464, pm=None):
+        self.registry = registry
+        self.pm = pm
+        self.host = host
+        self.port = port
+        self._httpd = None
+        self._thread = None
+
+    def start(self):
+        handler = type("MetricsHandler", (_Handler,), {"registry": self.registry, "pm": self.pm})
+        try:
+            self._httpd = ThreadingHTTPServer((self.host, self.port), handler)
+        except OSError as e:
+            logger.error(f"メトリクスエンドポイントを開始できません {self.host}:{self.port}: {e}")
+            return False
+        self._httpd.daemon_threads = True
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name="metrics-server", daemon=True)
+        self._thread.start()
+        logger.info(f"メトリクスエンドポイント: http://{self.host}:{self.port}/metrics")
+        return True
+
+    def stop(self):
+        if self._httpd:
+            self._httpd.shutdown()
+            self._httpd.server_close()
+            self._httpd = None
@@ -1,6 +1,8 @@
 import os
 import time
+import threading
 import cv2
+import numpy as np
 import socket
 import requests
 from urllib.parse import urlparse, urlunparse
@@ -11,12 +13,39 @@ from config.settings import (
     RECONNECT_MAX_TRIES,
     RECONNECT_BASE_DELAY_SEC,
     RECONNECT_MAX_DELAY_SEC,
+    RTSP_TIMEOUT_SEC,
     ONVIF_WSDL_DIR,
+    FFMPEG_CAPTURE_PROFILES,
+    DEFAULT_CAPTURE_PROFILE,
+    DEFAULT_ONVIF_STREAM,
+    CAPTURE_LATENCY_LOG_INTERVAL_SEC,
+    SNAPSHOT_INTERVAL_SEC,
+    SNAPSHOT_REDUCE,
+    SNAPSHOT_TIMEOUT_SEC,
+    SNAPSHOT_ESCALATE_HOLD_SEC,
+    DUAL_MOTION_THRESHOLD,
+    DUAL_MAX_REGIONS,
+    DUAL_MIN_AREA_RATIO,
+    DUAL_FULL_DECODE_INTERVAL_SEC,
 )
+from .latency_meter import CaptureLatencyMeter
+from .enhance import find_candidate_regions
 from .logger import get_logger
 
 logger = get_logger()
 
+# OPENCV_FFMPEG_CAPTURE_OPTIONS はプロセス全体で共有されるため、
+# 設定からVideoCapture生成までを排他してカメラ毎のオプションを確実に反映させる
+_ffmpeg_env_lock = threading.Lock()
+
+# JPEGを縮小しつつグレースケールで展開する imdecode フラグ
+_REDUCED_GRAY_FLAGS = {
+    1: cv2.IMREAD_GRAYSCALE,
+    2: cv2.IMREAD_REDUCED_GRAYSCALE_2,
+    4: cv2.IMREAD_REDUCED_GRAYSCALE_4,
+    8: cv2.IMREAD_REDUCED_GRAYSCALE_8,
+}
+
 # onvif-zeep は 'onvif' モジュール名で提供されます
 try:
     from onvif import ONVIFCamera as ONVIFClient
@@ -41,6 +70,18 @@ class ONVIFCamera(CameraBase):
       - fps: int
       - rtsp_transport: "tcp" | "udp"  # デフォルトは settings.RTSP_TRANSPORT
       - wsdl_dir: str  # 個別指定（未指定ならsettingsのONVIF_WSDL_DIR）
+      - capture_profile: str | dict  # settings.FFMPEG_CAPTURE_PROFILES のキー、または直接オプション指定
+      - stream: "main" | "sub"  # profile_token未指定時に使うストリーム（解像度の大小で選択）
+      - capture_mode: "rtsp" | "snapshot" | "dual"
+          # snapshot: JPEGスナップショットを一定間隔で取得（グレースケール）
+          # dual: 低解像度ストリームで候補領域を検出し、候補があるときだけ高解像度ストリームをデコード
+      - snapshot_url: str  # 直接指定（未指定ならONVIFの GetSnapshotUri で解決）
+      - snapshot_interval: float  # 秒（既定 settings.SNAPSHOT_INTERVAL_SEC）
+      - snapshot_reduce: 1 | 2 | 4 | 8
+      - snapshot_auth: "basic" | "digest"
+      - escalate: bool  # コード検出中はRTSPに切り替える（既定 True）
+      - sub_rtsp_url: str  # dual: 検出用ストリームを直接指定（未指定なら最小解像度のプロファイル）
+      - sub_profile_token: str  # dual: 検出用プロファイルを固定
     """
 
     def __init__(self, camera_id, config):
@@ -52,14 +93,43 @@ class ONVIFCamera(CameraBase):
         self._stream_uri = None
         self._rtsp_url = None
 
+        self._ffmpeg_options = ""
+
         # 連続失敗カウンタ
         self._fail_count = 0
+        self.reconnect_count = 0
+
+        # キャプチャ遅延計測
+        self.latency = CaptureLatencyMeter()
+
+        # スナップショットモード
+        self.capture_mode = str(config.get("capture_mode", "rtsp")).lower()
+        self._session = None
+        self._snapshot_uri = None
+        self._next_snapshot = 0.0
+        self._hot_until = 0.0  # この時刻まではRTSPで連続取得（エスカレーション中）
+
+        # PTZサービス（初回のPTZ操作で作り、以後使い回す）
+        self._ptz = None
+
+        # デュアルストリームモード（検出用の低解像度ストリーム）
+        self._profiles = []
+        self._sub_rtsp_url = None
+        self._sub_cap = None
+        self._sub_scale = (1.0, 1.0)  # 検出用 → 高解像度 の座標倍率 (x, y)
+        self._motion_ref = None  # 動き判定の基準（動きを検出したときだけ更新する縮小フレーム）
+        self._last_regions = []  # 直前に高解像度側でデコードした候補領域
+        self._crop_only = False  # このフレームは候補領域だけを変換する（retrieve_frame で全体を変換しない）
+        self._dual_hits = False  # 直前の候補デコードで読めたか
+        self._next_full_decode = 0.0
 
     def connect(self):
         # 1) RTSP URLが明示指定されていればそれを使う
         if self.config.get("rtsp_url"):
             self._rtsp_url = self._inject_credentials(self.config["rtsp_url"])
             logger.info(f"[ONVIF:{self.camera_id}] 使用するRTSP（指定）: {self._rtsp_url}")
+        elif self.capture_mode == "snapshot" and self.config.get("snapshot_url"):
+            self._rtsp_url = None  # エスカレーション先なし
         else:
             # 2) ONVIFでストリームURIを解決
             if ONVIFClient is None:
@@ -71,36 +141,140 @@ class ONVIFCamera(CameraBase):
         # 3) OpenCV(FFmpeg)のRTSPオプション設定
         self._apply_ffmpeg_rtsp_options()
 
+        if self.capture_mode == "snapshot":
+            ok = self._resolve_snapshot_uri()
+            self._next_snapshot = 0.0
+            self._hot_until = 0.0
+            self.is_running = ok
+            return ok
+
         # 4) VideoCapture オープン
         ok = self._open_capture()
+        if ok and self.capture_mode == "dual":
+            self._open_sub_capture()
         self.is_running = ok
         return ok
 
     def disconnect(self):
         self.is_running = False
-        if self.cap:
-            try:
-                self.cap.release()
-            except Exception:
-                pass
-            self.cap = None
+        self._close_capture()
+        if self._session is not None:
+            self._session.close()
+            self._session = None
+
+    def _close_capture(self):
+        for cap in (self.cap, self._sub_cap):
+            if cap:
+                try:
+                    cap.release()
+                except Exception:
+                    pass
+        self.cap = None
+        self._sub_cap = None
 
     def capture_frame(self):
-        if not self.cap:
+        if not self.grab_frame():
             return None
+        return self.retrieve_frame(color=True)
+
+    def grab_frame(self):
+        """RTSPはgrab()で受信・デコードだけ行い、BGR変換は retrieve_frame() まで遅らせる"""
+        if self.capture_mode == "snapshot":
+            if self.cap and time.monotonic() >= self._hot_until:
+                logger.info(f"[ONVIF:{self.camera_id}] コード検出が途切れたためスナップショット取得に戻ります")
+                self._close_capture()
+            if not self.cap:
+                self._grabbed = self._capture_snapshot()
+                return self._grabbed is not None
+
+        if not self.cap:
+            return False
 
-        ret, frame = self.cap.read()
-        if ret and frame is not None:
+        self._grabbed = None
+        self._crop_only = False
+        t0 = time.perf_counter()
+        # デュアル時は両方を毎回grabしてバッファを溜めない（BGRへの展開は必要なときだけ）
+        if self._sub_cap is not None and not self._sub_cap.grab():
+            logger.warning(f"[ONVIF:{self.camera_id}] 検出用ストリームの取得に失敗したため高解像度のみで続行します")
+            self._sub_cap.release()
+            self._sub_cap = None
+        if self.cap.grab():
             self._fail_count = 0
-            # 任意の解像度/FPS設定（デコーダ側では効かないことも多い）
-            return frame
+            self._record_latency((time.perf_counter() - t0) * 1000.0)
+            return True
 
         # 失敗時は再接続試行
         self._fail_count += 1
         if self._fail_count >= 10:
             logger.warning(f"[ONVIF:{self.camera_id}] フレーム取得失敗が連続しました。再接続を試みます。")
             self._reconnect_with_backoff()
-        return None
+        return False
+
+    def retrieve_frame(self, color=True):
+        if self._grabbed is not None:
+            # スナップショット（取得時点でグレースケール）
+            return super().retrieve_frame(color)
+        if not self.cap:
+            return None
+        ret, frame = self.cap.retrieve()
+        if not ret or frame is None:
+            return None
+        if color or self._crop_only:
+            # 候補領域だけをデコードするフレームは、切り出した部分だけをデコード側でグレーにする
+            return frame
+        return cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+
+    def candidate_regions(self):
+        """
+        デュアルストリーム時、検出用ストリームで見つけたコード候補を高解像度の座標で返す。
+        候補なしなら []（高解像度側はデコード不要）。デュアルでない・検出用がないときは None。
+        見落とし対策として DUAL_FULL_DECODE_INTERVAL_SEC ごとに None（全体デコード）を返す。
+        候補を返したフレームは retrieve_frame(color=False) でもBGRのまま返す（変換は切り出した部分だけ）。
+        """
+        if self._sub_cap is None:
+            return None
+        now = time.monotonic()
+        if DUAL_FULL_DECODE_INTERVAL_SEC > 0 and now >= self._next_full_decode:
+            self._next_full_decode = now + DUAL_FULL_DECODE_INTERVAL_SEC
+            return None
+
+        ret, sub = self._sub_cap.retrieve()
+        if not ret or sub is None:
+            return None
+        sub = cv2.cvtColor(sub, cv2.COLOR_BGR2GRAY)
+
+        # 動き判定は平均ではなくセル単位の最大差分で見る（小さなコードが置かれただけでも拾う）。
+        # 基準は動きを検出したときだけ更新し、ゆっくり入ってくるコードも差分が積み上がって検出できるようにする
+        thumb = cv2.resize(sub, (64, 36), interpolation=cv2.INTER_AREA)
+        moved = (self._motion_ref is None or DUAL_MOTION_THRESHOLD <= 0
+                 or int(cv2.absdiff(thumb, self._motion_ref).max()) >= DUAL_MOTION_THRESHOLD)
+        if moved:
+            self._motion_ref = thumb
+
+        # 候補検出は低解像度側なので動きがなくても毎回行う
+        regions = self._map_regions(sub)
+        if not moved and not self._dual_hits and regions == self._last_regions:
+            # 静止していて、同じ領域は前回デコードして読めなかった
+            return []
+        self._last_regions = regions
+        self._crop_only = bool(regions)
+        return regions
+
+    def _map_regions(self, sub):
+        """低解像度フレームで候補領域を探し、高解像度フレームの座標に直す"""
+        sx, sy = self._sub_scale
+        main_w, main_h = int(sub.shape[1] * sx), int(sub.shape[0] * sy)
+        regions = []
+        for x, y, w, h in find_candidate_regions(sub, DUAL_MAX_REGIONS, DUAL_MIN_AREA_RATIO):
+            # 2本のストリームはフレームが完全には揃わないので1割ずつ広げる
+            mx, my = w // 10 + 1, h // 10 + 1
+            x0 = max(0, int((x - mx) * sx))
+            y0 = max(0, int((y - my) * sy))
+            x1 = min(main_w, int((x + w + mx) * sx))
+            y1 = min(main_h, int((y + h + my) * sy))
+            if x1 > x0 and y1 > y0:
+                regions.append((x0, y0, x1 - x0, y1 - y0))
+        return regions
 
     # ---- 内部メソッド ------------------------------------------------------
 
@@ -138,6 +312,7 @@ class ONVIFCamera(CameraBase):
         if not profiles:
             logger.error(f"[ONVIF:{self.camera_id}] 利用可能なプロファイルがありません")
             return False
+        self._profiles = list(profiles)
 
         token = self.config.get("profile_token")
         if token:
@@ -146,33 +321,59 @@ class ONVIFCamera(CameraBase):
                 logger.warning(f"[ONVIF:{self.camera_id}] 指定プロファイルが見つからないため先頭を使用: {token}")
                 token = profiles[0].token
         else:
-            token = profiles[0].token
+            token = self._select_profile_by_stream(profiles).token
 
         self._profile_token = token
 
         # ストリームURI取得
+        raw_uri = self._get_stream_uri(self._profile_token)
+        if raw_uri is None:
+            return False
+
+        # 認証情報を埋め込み
+        self._stream_uri = raw_uri
+        self._rtsp_url = self._inject_credentials(raw_uri)
+        logger.info(f"[ONVIF:{self.camera_id}] 使用するRTSP（解決）: {self._rtsp_url}")
+        return True
+
+    def _get_stream_uri(self, token):
         stream_setup = {
             "Stream": "RTP-Unicast",
             "Transport": {"Protocol": "RTSP"},
         }
         try:
-            uri_resp = self._media.GetStreamUri(
-                {"StreamSetup": stream_setup, "ProfileToken": self._profile_token}
-            )
+            uri_resp = self._media.GetStreamUri({"StreamSetup": stream_setup, "ProfileToken": token})
         except Exception as e:
             logger.error(f"[ONVIF:{self.camera_id}] ストリームURI取得失敗: {e}")
-            return False
+            return None
 
         # 一部カメラは相対URIや内向きIPを返すことがあるため、必要に応じて補正
         raw_uri = uri_resp.Uri
         if not raw_uri.startswith("rtsp://"):
-            raw_uri = f"rtsp://{ip}{raw_uri}"
+            raw_uri = f"rtsp://{self.config.get('ip')}{raw_uri}"
+        return raw_uri
 
-        # 認証情報を埋め込み
-        self._stream_uri = raw_uri
-        self._rtsp_url = self._inject_credentials(raw_uri)
-        logger.info(f"[ONVIF:{self.camera_id}] 使用するRTSP（解決）: {self._rtsp_url}")
-        return True
+    def _select_profile_by_stream(self, profiles, stream=None):
+        """
+        config["stream"] に応じてプロファイルを選ぶ。
+        main: 最大解像度 / sub: 最小解像度（解像度が取れないカメラは並び順で代用）
+        """
+        stream = str(stream or self.config.get("stream", DEFAULT_ONVIF_STREAM)).lower()
+
+        def _area(p):
+            try:
+                res = p.VideoEncoderConfiguration.Resolution
+                return int(res.Width) * int(res.Height)
+            except Exception:
+                return None
+
+        areas = [_area(p) for p in profiles]
+        if all(a is not None for a in areas):
+            ordered = [p for _, p in sorted(zip(areas, profiles), key=lambda x: x[0], reverse=True)]
+        else:
+            ordered = list(profiles)
+
+        return ordered[-1] if stream == "sub" else ordered[0]
 
     def _inject_credentials(self, url: str) -> str:
         """
@@ -200,25 +401,39 @@ class ONVIFCamera(CameraBase):
         )
         return new_url
 
+    def _resolve_capture_profile(self) -> dict:
+        profile = self.config.get("capture_profile", DEFAULT_CAPTURE_PROFILE)
+        if isinstance(profile, dict):
+            return profile
+        if profile not in FFMPEG_CAPTURE_PROFILES:
+            logger.warning(f"[ONVIF:{self.camera_id}] 未知のキャプチャプロファイルのため既定値を使用: {profile}")
+            profile = DEFAULT_CAPTURE_PROFILE
+        return FFMPEG_CAPTURE_PROFILES.get(profile, {})
+
     def _apply_ffmpeg_rtsp_options(self):
         """
-        OpenCV(FFmpeg)にRTSPオプションを渡す。
+        OpenCV(FFmpeg)に渡すRTSPオプションを組み立てる。
         OpenCVでは環境変数 OPENCV_FFMPEG_CAPTURE_OPTIONS で指定できる。
-        例: "rtsp_transport;tcp|stimeout;5000000"
+        例: "rtsp_transport;tcp|stimeout;5000000|fflags;nobuffer"
+        環境変数への書き込みは _open_capture 内で行う（カメラ毎に値が異なるため）
         """
         transport = self.config.get("rtsp_transport", RTSP_TRANSPORT).lower()
         # ネットワークタイムアウト（マイクロ秒）
-        stimeout_us = int(5 * 1_000_000)
+        stimeout_us = int(RTSP_TIMEOUT_SEC * 1_000_000)
 
-        opts = [
-            f"rtsp_transport;{transport}",
-            f"stimeout;{stimeout_us}",
-        ]
-        os.environ["OPENCV_FFMPEG_CAPTURE_OPTIONS"] = "|".join(opts)
+        opts = {
+            "rtsp_transport": transport,
+            "stimeout": stimeout_us,
+        }
+        opts.update(self._resolve_capture_profile())
+        self._ffmpeg_options = "|".join(f"{k};{v}" for k, v in opts.items())
+        logger.info(f"[ONVIF:{self.camera_id}] FFmpegオプション: {self._ffmpeg_options}")
 
     def _open_capture(self) -> bool:
         # FFmpegバックエンドを明示（Windowsで安定しやすい）
-        cap = cv2.VideoCapture(self._rtsp_url, cv2.CAP_FFMPEG)
+        with _ffmpeg_env_lock:
+            os.environ["OPENCV_FFMPEG_CAPTURE_OPTIONS"] = self._ffmpeg_options
+            cap = cv2.VideoCapture(self._rtsp_url, cv2.CAP_FFMPEG)
 
         # 解像度は受信側で固定できない場合が多いが、試行しておく
         if "resolution" in self.config:
@@ -233,11 +448,76 @@ class ONVIFCamera(CameraBase):
             return False
 
         self.cap = cap
+        self.latency.reset()
         logger.info(f"[ONVIF:{self.camera_id}] RTSP接続に成功")
         return True
 
+    def _open_sub_capture(self):
+        """
+        デュアルストリーム用に検出用（低解像度）ストリームを開く。
+        開けない・高解像度と同じストリームしかない場合は通常のRTSP取得で続行する。
+        """
+        url = self.config.get("sub_rtsp_url")
+        if url:
+            url = self._inject_credentials(url)
+        elif self._profiles:
+            token = self.config.get("sub_profile_token")
+            profile = next((p for p in self._profiles if p.token == token), None) if token else None
+            if profile is None:
+                profile = self._select_profile_by_stream(self._profiles, "sub")
+            if profile.token == self._profile_token:
+                logger.warning(f"[ONVIF:{self.camera_id}] 低解像度プロファイルがないためデュアルストリームを使いません")
+                return False
+            raw_uri = self._get_stream_uri(profile.token)
+            url = self._inject_credentials(raw_uri) if raw_uri else None
+        if not url:
+            logger.warning(f"[ONVIF:{self.camera_id}] 検出用ストリームを解決できないためデュアルストリームを使いません")
+            return False
+
+        with _ffmpeg_env_lock:
+            os.environ["OPENCV_FFMPEG_CAPTURE_OPTIONS"] = self._ffmpeg_options
+            cap = cv2.VideoCapture(url, cv2.CAP_FFMPEG)
+        if not cap.isOpened():
+            logger.warning(f"[ONVIF:{self.camera_id}] 検出用ストリームの接続に失敗: {url}")
+            return False
+
+        main_w, main_h = self.cap.get(cv2.CAP_PROP_FRAME_WIDTH), self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT)
+        sub_w, sub_h = cap.get(cv2.CAP_PROP_FRAME_WIDTH), cap.get(cv2.CAP_PROP_FRAME_HEIGHT)
+        if not (main_w and main_h and sub_w and sub_h):
+            logger.warning(f"[ONVIF:{self.camera_id}] ストリームの解像度が取得できないためデュアルストリームを使いません")
+            cap.release()
+            return False
+
+        self._sub_cap = cap
+        self._sub_rtsp_url = url
+        self._sub_scale = (main_w / sub_w, main_h / sub_h)
+        self._motion_ref = None
+        self._last_regions = []
+        self._dual_hits = False
+        self._next_full_decode = 0.0
+        logger.info(f"[ONVIF:{self.camera_id}] デュアルストリーム: 検出 {int(sub_w)}x{int(sub_h)} / "
+                    f"デコード {int(main_w)}x{int(main_h)}")
+        return True
+
+    def _record_latency(self, read_ms):
+        try:
+            pts_ms = self.cap.get(cv2.CAP_PROP_POS_MSEC)
+        except Exception:
+            pts_ms = None
+        self.latency.record(read_ms, pts_ms)
+        snap = self.latency.pop_snapshot(CAPTURE_LATENCY_LOG_INTERVAL_SEC)
+        if snap:
+            logger.info(
+                f"[ONVIF:{self.camera_id}] キャプチャ遅延 read平均={snap['read_ms_avg']}ms "
+                f"read最大={snap['read_ms_max']}ms 遅れ平均={snap['lag_ms_avg']}ms 遅れ最大={snap['lag_ms_max']}ms"
+            )
+
+    def get_latency_stats(self) -> dict:
+        return self.latency.snapshot()
+
     def _reconnect_with_backoff(self):
         self.disconnect()
+        self.reconnect_count += 1
         delay = RECONNECT_BASE_DELAY_SEC
         for attempt in range(1, RECONNECT_MAX_TRIES + 1):
             logger.info(f"[ONVIF:{self.camera_id}] 再接続試行 {attempt}/{RECONNECT_MAX_TRIES}（待機 {delay:.1f}s）")
@@ -249,23 +529,92 @@ class ONVIFCamera(CameraBase):
             delay = min(delay * 2, RECONNECT_MAX_DELAY_SEC)
         logger.error(f"[ONVIF:{self.camera_id}] 再接続に失敗。以降はフレームNoneを返します。")
 
-    def get_snapshot_jpeg(self, timeout=5.0) -> bytes:
-        if not self._media:
-            return b""
-        try:
-            snap = self._media.GetSnapshotUri({"ProfileToken": self._profile_token})
-            uri = snap.Uri
-            # 基本的にHTTP/HTTPS。Basic/Digest認証が必要な場合はrequestsでauth指定
-            auth = None
+    def notify_detections(self, results):
+        """スナップショットモードでコードを検出したら、しばらくRTSPで連続取得する"""
+        if self.capture_mode == "dual":
+            self._dual_hits = bool(results)
+            return
+        if self.capture_mode != "snapshot" or not results or not self.config.get("escalate", True):
+            return
+        self._hot_until = time.monotonic() + SNAPSHOT_ESCALATE_HOLD_SEC
+        if self.cap is None and self._rtsp_url:
+            logger.info(f"[ONVIF:{self.camera_id}] コードを検出したためRTSP取得に切り替えます")
+            if not self._open_capture():
+                self._hot_until = 0.0
+
+    def _capture_snapshot(self):
+        """取得間隔になるまでは短く待ってNoneを返す（呼び出し側のループを止めない）"""
+        remaining = self._next_snapshot - time.monotonic()
+        if remaining > 0:
+            time.sleep(min(remaining, 0.1))
+            return None
+        interval = float(self.config.get("snapshot_interval", SNAPSHOT_INTERVAL_SEC))
+        self._next_snapshot = time.monotonic() + interval
+
+        t0 = time.perf_counter()
+        data = self.get_snapshot_jpeg(timeout=SNAPSHOT_TIMEOUT_SEC)
+        frame = None
+        if data:
+            reduce = int(self.config.get("snapshot_reduce", SNAPSHOT_REDUCE))
+            flag = _REDUCED_GRAY_FLAGS.get(reduce, cv2.IMREAD_GRAYSCALE)
+            frame = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), flag)
+        if frame is not None:
+            self._fail_count = 0
+            self.latency.record((time.perf_counter() - t0) * 1000.0, None)
+            return frame
+
+        self._fail_count += 1
+        if self._fail_count >= 10:
+            logger.warning(f"[ONVIF:{self.camera_id}] スナップショット取得失敗が連続しました。再接続を試みます。")
+            self._reconnect_with_backoff()
+        return None
+
+    def _resolve_snapshot_uri(self) -> bool:
+        """スナップショットURIは接続時に1回だけ解決してキャッシュする"""
+        uri = self.config.get("snapshot_url")
+        if not uri:
+            if not self._media:
+                logger.error(f"[ONVIF:{self.camera_id}] スナップショットURIを解決できません（ONVIF未接続）")
+                return False
+            try:
+                uri = self._media.GetSnapshotUri({"ProfileToken": self._profile_token}).Uri
+            except Exception as e:
+                logger.error(f"[ONVIF:{self.camera_id}] スナップショットURI取得失敗: {e}")
+                return False
+        self._snapshot_uri = uri
+        logger.info(f"[ONVIF:{self.camera_id}] 使用するスナップショットURI: {uri}")
+        return True
+
+    def _get_session(self):
+        """カメラ毎にkeep-aliveのSessionを使い回す（毎回TCP/TLS接続し直さない）"""
+        if self._session is None:
+            session = requests.Session()
+            session.verify = False
             user = self.config.get("username", "")
             pwd = self.config.get("password", "")
             if user:
-                auth = (user, pwd)
-            resp = requests.get(uri, auth=auth, timeout=timeout, verify=False)
+                if str(self.config.get("snapshot_auth", "basic")).lower() == "digest":
+                    session.auth = requests.auth.HTTPDigestAuth(user, pwd)
+                else:
+                    session.auth = (user, pwd)
+            self._session = session
+        return self._session
+
+    def get_snapshot_jpeg(self, timeout=5.0) -> bytes:
+        if not self._snapshot_uri and not self._resolve_snapshot_uri():
+            return b""
+        try:
+            # 基本的にHTTP/HTTPS。Basic/Digest認証はSessionに設定済み
+            resp = self._get_session().get(self._snapshot_uri, timeout=timeout)
             if resp.ok:
                 return resp.content
+            logger.warning(f"[ONVIF:{self.camera_id}] スナップショット取得失敗: HTTP {resp.status_code}")
         except Exception as e:
             logger.warning(f"[ONVIF:{self.camera_id}] スナップショット取得失敗: {e}")
+            # 壊れた接続をプールに残さない
+            if self._session is not None:
+                self._session.close()
+                self._session = None
         return b""
 
     def list_profiles(self):
@@ -285,16 +634,27 @@ class ONVIFCamera(CameraBase):
             return []
 
     def init_ptz(self):
-        """PTZサービス初期化"""
+        """PTZサービス初期化（rtsp_url 直接指定で未接続ならここでONVIFに接続する）"""
         try:
+            if self._dev is None:
+                if ONVIFClient is None:
+                    raise RuntimeError("onvifモジュールが利用できません")
+                wsdl_dir = self.config.get("wsdl_dir") or ONVIF_WSDL_DIR or None
+                self._dev = ONVIFClient(self.config.get("ip"), int(self.config.get("port", 80)),
+                                        self.config.get("username", ""), self.config.get("password", ""), wsdl_dir)
+            if self._profile_token is None:
+                if self._media is None:
+                    self._media = self._dev.create_media_service()
+                self._profile_token = self.config.get("profile_token") or self._media.GetProfiles()[0].token
             self._ptz = self._dev.create_ptz_service()
         except Exception as e:
             logger.error(f"[ONVIF:{self.camera_id}] PTZ初期化失敗: {e}")
             self._ptz = None
+            raise
 
-    def ptz_move(self, pan=0.0, tilt=0.0, zoom=0.0, speed=0.5):
-        """相対移動"""
-        if not hasattr(self, "_ptz") or self._ptz is None:
+    def ptz_move(self, pan=0.0, tilt=0.0, zoom=0.0):
+        """連続移動（速度指定）。失敗時は例外（次回はサービスを作り直す）"""
+        if self._ptz is None:
             self.init_ptz()
         try:
             self._ptz.ContinuousMove({
@@ -304,14 +664,18 @@ class ONVIFCamera(CameraBase):
                     "Zoom": {"x": zoom, "space": ""}
                 }
             })
-        except Exception as e:
-            logger.error(f"[ONVIF:{self.camera_id}] PTZ移動失敗: {e}")
+        except Exception:
+            self._ptz = None
+            raise
 
     def ptz_stop(self):
+        if self._ptz is None:
+            self.init_ptz()
         try:
             self._ptz.Stop({"ProfileToken": self._profile_token})
-        except Exception as e:
-            logger.error(f"[ONVIF:{self.camera_id}] PTZ停止失敗: {e}")
+        except Exception:
+            self._ptz = None
+            raise
 
     def set_video_encoder_config(self, width=None, height=None, bitrate=None, fps=None):
         """ONVIF経由でエンコーダ設定を変更"""
@@ -1,14 +1,52 @@
 # core/process_manager.py
+import math
 import multiprocessing as mp
+import multiprocessing.connection as mp_connection
 import queue
 import logging
+import os
+import threading
+import time
 import cv2
-from core.qr_reader import QRReader
+from core.qr_reader import QRReader, offset_results
+from core.metrics import WorkerMetrics, MetricsRegistry, process_usage
+from core.profiler import WorkerProfiler, MemoryTracer
+from core.enhance import EnhancementPipeline
+from core.decode_scheduler import AdaptiveDecodeController, budget_from_config
+from core.logger import configure_worker_logging, get_log_queue
+from core.ptz_controller import PTZController
+from config.settings import (
+    FRAME_QUEUE_MAXSIZE,
+    DISPLAY_MAX_FPS,
+    ENHANCE_STAGES,
+    METRICS_REPORT_INTERVAL_SEC,
+    SUPERVISOR_ENABLED,
+    SUPERVISOR_INTERVAL_SEC,
+    WORKER_STARTUP_GRACE_SEC,
+    WORKER_HANG_TIMEOUT_SEC,
+    WORKER_RESTART_BASE_DELAY_SEC,
+    WORKER_RESTART_MAX_DELAY_SEC,
+    WORKER_STABLE_SEC,
+    WORKER_MEMORY_SOFT_MB,
+    WORKER_MEMORY_HARD_MB,
+    WORKER_DRAIN_TIMEOUT_SEC,
+    TRACEMALLOC_FRAMES,
+    CPU_PINNING,
+    CAMERAS_PER_PROCESS,
+    STARTUP_MAX_CONCURRENT_CONNECTS,
+    STARTUP_READY_QUORUM,
+    STARTUP_READY_TIMEOUT_SEC,
+)
 from core.usb_camera import USBCamera
 from core.onvif_camera import ONVIFCamera
+from core.file_camera import FileCamera
+from core.synthetic_camera import SyntheticCamera
 
 logger = logging.getLogger(__name__)
 
+# tracemalloc はプロセス単位のため、ワーカープロセス内で1つを共有する
+_memory_tracer = MemoryTracer()
+
 def _create_camera_from_info(camera_info):
     cam_type = camera_info["type"]
     cam_id = camera_info["id"]
@@ -18,130 +56,865 @@ def _create_camera_from_info(camera_info):
         return USBCamera(cam_id, config)
     elif cam_type == "onvif":
         return ONVIFCamera(cam_id, config)
+    elif cam_type == "file":
+        return FileCamera(cam_id, config)
+    elif cam_type == "synthetic":
+        return SyntheticCamera(cam_id, config)
     else:
         raise ValueError(f"Unsupported camera type: {cam_type}")
 
-def camera_worker(camera_info, frame_queue, cmd_queue):
+def _apply_cpu_affinity(cam_ids, cpus):
+    if not cpus:
+        return
+    try:
+        if hasattr(os, "sched_setaffinity"):
+            os.sched_setaffinity(0, set(cpus))
+        else:
+            import psutil  # Windows/macOS向け（任意依存）
+            psutil.Process().cpu_affinity(list(cpus))
+        logger.info(f"Cameras {cam_ids} pinned to CPUs {sorted(cpus)}")
+    except Exception as e:
+        logger.warning(f"Cameras {cam_ids} CPU affinity not applied: {e}")
+
+def _wait_or_stop(stop_event, seconds, beat):
+    """停止要求が来るまで最大seconds待つ（待機中もハートビートを更新）。停止ならTrue"""
+    deadline = time.monotonic() + seconds
+    while not stop_event.is_set():
+        beat()
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return False
+        stop_event.wait(min(remaining, 1.0))
+    return True
+
+class _CameraState:
+    """1台分のデコード処理に関わるオブジェクト一式"""
+
+    def __init__(self, camera_info):
+        config = camera_info.get("config", {})
+        self.cam_id = camera_info["id"]
+        self.cam_type = camera_info["type"]
+        self.reader = QRReader(mode=camera_info.get("decode_mode", "all"))
+        self.enhancer = EnhancementPipeline(config.get("enhance_stages", ENHANCE_STAGES))
+        self.scheduler = AdaptiveDecodeController(budget_from_config(config))
+        self.metrics = WorkerMetrics(self.cam_id)
+        self.profiler = WorkerProfiler(self.cam_id)
+        self.t_created = time.perf_counter()
+        self.ready_sent = False
+        display_fps = camera_info.get("display_fps", DISPLAY_MAX_FPS)
+        self.display_interval = 1.0 / display_fps if display_fps else None
+        self.next_display = 0.0
+        self.ptz = None  # PTZController（最初のPTZコマンドで作る）
+
+class _ConnectGate:
     """
-    子プロセスとして動作し、カメラからフレームを取得してデコード結果を送信する。
+    全ワーカー共通の同時接続数制限。ワーカー起動のたびに作り、共有セマフォと
+    このワーカーが握っている数（held）を持つ。接続中に強制終了されたワーカーの分は親が reclaim() で返す。
     """
-    cam_id = camera_info["id"]
-    cam_type = camera_info["type"]
-    decode_mode = camera_info.get("decode_mode", "all")
 
-    reader = QRReader(mode=decode_mode)
-    cam = _create_camera_from_info(camera_info)
+    def __init__(self, sem):
+        self.sem = sem
+        self.held = mp.Value("i", 0)
+
+    def acquire(self, timeout):
+        if not self.sem.acquire(timeout=timeout):
+            return False
+        with self.held.get_lock():
+            self.held.value += 1
+        return True
+
+    def release(self):
+        with self.held.get_lock():
+            self.held.value -= 1
+        self.sem.release()
+
+    def reclaim(self):
+        # ワーカー終了後に親から呼ぶ（held のロックを握ったまま殺された場合に備えてロックは取らない）
+        n, self.held.value = self.held.value, 0
+        for _ in range(n):
+            try:
+                self.sem.release()
+            except ValueError:
+                break
 
+def _connect(cam, gate, stop_event, beat):
+    """同時接続数の上限を守って接続する。停止要求で待機を抜けたらNone"""
+    if gate is None:
+        return cam.connect()
+    while not gate.acquire(timeout=0.5):
+        beat()
+        if stop_event.is_set():
+            return None
     try:
-        if not cam.connect():
-            frame_queue.put(("ERROR", f"Camera {cam_id} connection failed"))
-            return
+        return cam.connect()
+    finally:
+        gate.release()
+
+def _camera_loop(camera_info, frame_queue, cmd_queue, stop_event, beat, connect_gate=None):
+    """
+    1台分の 取得→デコード→送信 ループ。ワーカープロセス内のスレッドとして動く。
+    例外や接続失敗はこのカメラの中で再試行し、同じプロセスの他カメラには波及させない。
+    """
+    cam_id = camera_info["id"]
+    st = _CameraState(camera_info)
+    cam = None
+    delay = WORKER_RESTART_BASE_DELAY_SEC
+    failing = False
+
+    try:
+        cam = _create_camera_from_info(camera_info)
+        while not stop_event.is_set():
+            beat()
+            ok = _connect(cam, connect_gate, stop_event, beat)
+            if ok is None:
+                break
+            if not ok:
+                if not failing:
+                    frame_queue.put(("ERROR", f"Camera {cam_id} connection failed"))
+                    failing = True
+                if _wait_or_stop(stop_event, delay, beat):
+                    break
+                delay = min(delay * 2, WORKER_RESTART_MAX_DELAY_SEC)
+                continue
+
+            if failing:
+                frame_queue.put(("STATUS", cam_id, "接続しました"))
+                failing = False
+            delay = WORKER_RESTART_BASE_DELAY_SEC
 
-        while True:
-            # コマンド処理（モード変更など）
             try:
-                while True:
-                    cmd = cmd_queue.get_nowait()
-                    if cmd and cmd[0] == "SET_DECODE_MODE":
-                        reader.set_mode(cmd[1])
-                        logger.info(f"Camera {cam_id} decode mode set to {cmd[1]}")
-            except queue.Empty:
+                finished = _capture_loop(cam, st, frame_queue, cmd_queue, stop_event, beat)
+            except Exception as e:
+                logger.exception(f"Camera {cam_id} loop error")
+                frame_queue.put(("ERROR", f"Camera {cam_id} error: {e}"))
+                try:
+                    cam.disconnect()
+                except Exception:
+                    pass
+                if _wait_or_stop(stop_event, delay, beat):
+                    break
+                continue
+            if finished:
+                break
+    except Exception as e:
+        logger.exception(f"Camera {cam_id} setup error")
+        frame_queue.put(("ERROR", f"Camera {cam_id} error: {e}"))
+    finally:
+        if st.profiler.active:
+            st.profiler.stop()
+        if st.ptz is not None:
+            st.ptz.stop()
+        if cam is not None:
+            try:
+                cam.disconnect()
+            except Exception:
                 pass
 
-            # フレーム取得
-            frame_bgr = cam.capture_frame()
-            if frame_bgr is None:
-                continue
+def _capture_loop(cam, st, frame_queue, cmd_queue, stop_event, beat):
+    """接続済みカメラのフレーム処理。ストリーム終端ならTrue、停止要求ならFalseを返す"""
+    cam_id = cam.camera_id
+    metrics = st.metrics
+    next_report = time.perf_counter() + METRICS_REPORT_INTERVAL_SEC
 
-            # グレースケール化（高速化）
-            gray = cv2.cvtColor(frame_bgr, cv2.COLOR_BGR2GRAY)
+    while not stop_event.is_set():
+        beat()
 
-            # デコード（1回だけ）
-            results = reader.decode(gray)
+        # コマンド処理（モード変更など）
+        try:
+            while True:
+                _handle_command(st, cmd_queue.get_nowait(), frame_queue, cam)
+        except queue.Empty:
+            pass
+
+        done = st.profiler.poll()
+        if done:
+            frame_queue.put(("PROFILE", cam_id, f"プロファイル出力: {done}"))
+
+        now = time.perf_counter()
+        if now >= next_report:
+            next_report = now + METRICS_REPORT_INTERVAL_SEC
+            _report_metrics(cam, st, frame_queue)
+
+        # フレーム取得（grabのみ。画像への展開はデコード/表示するフレームだけ）
+        t0 = time.perf_counter()
+        grabbed = cam.grab_frame()
+        t1 = time.perf_counter()
+        if not grabbed:
+            if getattr(cam, "end_of_stream", False):
+                _report_metrics(cam, st, frame_queue)
+                frame_queue.put(("EOS", cam_id))
+                return True
+            continue
+        metrics.observe("capture", (t1 - t0) * 1000.0)
+        metrics.inc("frames")
+        if not st.ready_sent:
+            st.ready_sent = True
+            frame_queue.put(("READY", cam_id, (t1 - st.t_created) * 1000.0))
+
+        # 負荷が高いときは間引き（デコードしない）。表示は DISPLAY_MAX_FPS まで
+        decoded = st.scheduler.should_decode()
+        show = st.display_interval is not None and t1 >= st.next_display
+        if show:
+            st.next_display = t1 + st.display_interval
+
+        # デュアルストリームのカメラは低解像度側で候補を探す（None: 全体をデコード / []: 候補なし）
+        regions = None
+        if decoded:
+            t_d = time.perf_counter()
+            regions = cam.candidate_regions()
+            if regions is not None:
+                t1 = time.perf_counter()
+                metrics.observe("detect", (t1 - t_d) * 1000.0)
+                if not regions:
+                    metrics.inc("detect_skips")
+        need_decode = decoded and regions != []
+
+        frame = None
+        results = []
+        if need_decode or show:
+            # 表示しないフレームはグレースケール（生フレームなら輝度面そのまま）で受け取る
+            t_r = time.perf_counter()
+            frame = cam.retrieve_frame(color=show)
+            t1 = time.perf_counter()
+            metrics.observe("retrieve", (t1 - t_r) * 1000.0)
+        if frame is not None and need_decode:
+            results = _decode_frame(st, frame, t1, regions)
+            cam.notify_detections(results)
+
+        # GUIへ送信（表示用画像または None＋結果＋送信時刻）
+        msg = (cam_id, st.cam_type, frame if show else None, results,
+               {"sent_at": time.time(), "decoded": decoded and (frame is not None or regions == [])})
+        if results:
+            # 読み取り結果は落とさない
+            frame_queue.put(msg)
+        else:
+            try:
+                frame_queue.put_nowait(msg)
+            except queue.Full:
+                metrics.inc("drops")
+    return False
 
-            # GUIへ送信（カラー画像＋結果）
-            frame_queue.put((cam_id, cam_type, frame_bgr, results))
+def _decode_frame(st, frame_bgr, t1, regions=None):
+    if regions:
+        return _decode_regions(st, frame_bgr, t1, regions)
+    metrics = st.metrics
+    scheduler = st.scheduler
 
+    # グレースケール化（高速化）。スナップショット取得などで最初からグレーのフレームもある
+    gray = frame_bgr if frame_bgr.ndim == 2 else cv2.cvtColor(frame_bgr, cv2.COLOR_BGR2GRAY)
+    t2 = time.perf_counter()
+
+    # 負荷に応じて縮小・対象種別を絞ってデコード（通常は1回だけ）
+    scale = scheduler.scale
+    img = gray if scale >= 1.0 else cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+    mode = scheduler.decode_mode(st.reader.mode)
+    # 連続するフレーム全体なので結果キャッシュを使う（静止しているコードはデコードを省く）
+    results = st.reader.decode(img, mode=mode, use_cache=True)
+    if scale < 1.0 and results:
+        results = offset_results(results, 0, 0, 1.0 / scale)
+    t3 = time.perf_counter()
+
+    metrics.observe("cvt_color", (t2 - t1) * 1000.0)
+    metrics.observe("decode", (t3 - t2) * 1000.0)
+
+    # 読めなかったときだけ候補領域に補正をかけて再試行（負荷制御中は行わない）
+    if not results and st.enhancer.stages and scheduler.level == 0:
+        results = st.enhancer.rescue(gray, lambda x: st.reader.decode(x, mode=mode))
+        metrics.observe("enhance", (time.perf_counter() - t3) * 1000.0)
+        for r in results:
+            metrics.inc(f"enhance_{r['stage']}_rescued")
+
+    scheduler.observe((time.perf_counter() - t2) * 1000.0, results)
+    metrics.inc("decode_hits", len(results))
+    return results
+
+def _decode_regions(st, frame, t1, regions):
+    """候補領域（高解像度フレーム上の矩形）だけを切り出してデコードする"""
+    metrics = st.metrics
+    scheduler = st.scheduler
+    mode = scheduler.decode_mode(st.reader.mode)
+    results = []
+    seen = set()
+    t_cvt = 0.0
+    t2 = time.perf_counter()
+    for x, y, w, h in regions:
+        roi = frame[y:y + h, x:x + w]
+        if roi.ndim == 3:
+            t_c = time.perf_counter()
+            roi = cv2.cvtColor(roi, cv2.COLOR_BGR2GRAY)
+            t_cvt += time.perf_counter() - t_c
+        for r in offset_results(st.reader.decode(roi, mode=mode), x, y):
+            # 候補領域は重なることがあるので同じコードは1件にする
+            key = (r.get("type"), r.get("data"))
+            if key not in seen:
+                seen.add(key)
+                results.append(r)
+    t3 = time.perf_counter()
+
+    metrics.observe("cvt_color", t_cvt * 1000.0)
+    metrics.observe("decode", (t3 - t2 - t_cvt) * 1000.0)
+
+    if not results and st.enhancer.stages and scheduler.level == 0:
+        gray = frame if frame.ndim == 2 else cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        results = st.enhancer.rescue(gray, lambda img: st.reader.decode(img, mode=mode), regions=regions)
+        metrics.observe("enhance", (time.perf_counter() - t3) * 1000.0)
+        for r in results:
+            metrics.inc(f"enhance_{r['stage']}_rescued")
+
+    scheduler.observe((time.perf_counter() - t2) * 1000.0, results)
+    metrics.inc("decode_hits", len(results))
+    return results
+
+def _handle_command(st, cmd, frame_queue, cam=None):
+    if not cmd:
+        return
+    if cmd[0] == "SET_DECODE_MODE":
+        st.reader.set_mode(cmd[1])
+        logger.info(f"Camera {st.cam_id} decode mode set to {cmd[1]}")
+    elif cmd[0] == "SET_ENHANCE_STAGES":
+        st.enhancer.set_stages(cmd[1])
+        logger.info(f"Camera {st.cam_id} enhance stages set to {st.enhancer.stages}")
+    elif cmd[0] in ("PROFILE_START", "PROFILE_STOP"):
+        _handle_profile_command(st.cam_id, st.profiler, cmd, frame_queue)
+    elif cmd[0] in ("TRACEMALLOC_START", "TRACEMALLOC_SNAPSHOT", "TRACEMALLOC_STOP"):
+        _handle_tracemalloc_command(st.cam_id, cmd, frame_queue)
+    elif cmd[0] in ("PTZ_MOVE", "PTZ_STOP"):
+        # SOAP呼び出しはPTZスレッドで行い、キャプチャは止めない
+        if not hasattr(cam, "ptz_move"):
+            frame_queue.put(("PTZ_ACK", st.cam_id, {
+                "cmd": "move" if cmd[0] == "PTZ_MOVE" else "stop", "ok": False, "error": "PTZ非対応のカメラです",
+                "sent_at": (cmd[1] if len(cmd) > 1 else {}).get("sent_at"), "call_ms": 0.0,
+                "coalesced": False,
+            }))
+            return
+        if st.ptz is None:
+            st.ptz = PTZController(cam, frame_queue)
+        st.ptz.submit(cmd)
+
+def camera_worker(camera_slots, frame_queue, cmd_queue, heartbeats=None, cpus=None, log_queue=None,
+                  connect_gate=None):
+    """
+    子プロセスとして動作し、1台以上のカメラをスレッドで並行処理する。
+    （cv2/zbarはデコード中にGILを解放するため、スレッドでも並列に動く）
+    camera_slots: [(slot, camera_info), ...]  slotはheartbeats上の位置
+    cmd_queue   : ("CAM", cam_id, cmd) / ("ADD", slot, camera_info) / ("REMOVE", cam_id)
+                  / ("SHUTDOWN",)  全カメラを正常停止してプロセスを終了（メモリ上限による再起動用）
+    PTZコマンド（("PTZ_MOVE", {...}) / ("PTZ_STOP", {...})）の結果は ("PTZ_ACK", cam_id, {...}) で返す。
+    heartbeats  : 共有Array。各カメラのループが自分のslotに現在時刻を書き込み、親の監視に使う
+    cpus        : このプロセスを固定するCPU番号のリスト
+    log_queue   : 親のログキュー（ログは親プロセスでまとめて書き出す）
+    connect_gate: 全ワーカー共通の同時接続数制限（_ConnectGate）
+    各カメラは最初のフレームを得たら ("READY", cam_id, 起動からのms) を送る。
+    全カメラが終了（ストリーム終端）したらプロセスも正常終了する。
+    """
+    configure_worker_logging(log_queue)
+    _apply_cpu_affinity([info["id"] for _, info in camera_slots], cpus)
+
+    runners = {}  # cam_id -> (thread, stop_event, cmd_queue)
+
+    def _start(slot, info):
+        if heartbeats is not None:
+            def beat(slot=slot):
+                heartbeats[slot] = time.time()
+        else:
+            def beat():
+                pass
+        stop_event = threading.Event()
+        local_q = queue.Queue()
+        th = threading.Thread(
+            target=_camera_loop, args=(info, frame_queue, local_q, stop_event, beat, connect_gate),
+            name=f"camera-{info['id']}", daemon=True
+        )
+        th.start()
+        runners[info["id"]] = (th, stop_event, local_q)
+
+    def _stop(cam_id):
+        th, stop_event, _ = runners.pop(cam_id)
+        stop_event.set()
+        th.join(timeout=5)
+
+    for slot, info in camera_slots:
+        _start(slot, info)
+
+    try:
+        while runners:
+            try:
+                msg = cmd_queue.get(timeout=0.5)
+            except queue.Empty:
+                msg = None
+
+            if msg and msg[0] == "CAM" and msg[1] in runners:
+                runners[msg[1]][2].put(msg[2])
+            elif msg and msg[0] == "ADD":
+                if msg[2]["id"] not in runners:
+                    _start(msg[1], msg[2])
+            elif msg and msg[0] == "REMOVE" and msg[1] in runners:
+                _stop(msg[1])
+            elif msg and msg[0] == "SHUTDOWN":
+                break
+
+            for cam_id, (th, _, _) in list(runners.items()):
+                if not th.is_alive():
+                    runners.pop(cam_id)
     except KeyboardInterrupt:
         pass
     finally:
-        try:
-            cam.disconnect()
-        except Exception:
-            pass
+        for cam_id in list(runners):
+            _stop(cam_id)
+
+def _handle_profile_command(cam_id, profiler, cmd, frame_queue):
+    """
+    ("PROFILE_START", {"kind": "cprofile"|"sampling", "duration": 秒}) / ("PROFILE_STOP",)
+    """
+    try:
+        if cmd[0] == "PROFILE_START":
+            opts = cmd[1] if len(cmd) > 1 and cmd[1] else {}
+            kind = opts.get("kind", "cprofile")
+            duration = opts.get("duration", 30)
+            profiler.start(kind, duration)
+            frame_queue.put(("PROFILE", cam_id, f"プロファイル開始: {kind} {duration}s"))
+        else:
+            path = profiler.stop()
+            msg = f"プロファイル出力: {path}" if path else "プロファイルは実行されていません"
+            frame_queue.put(("PROFILE", cam_id, msg))
+    except Exception as e:
+        frame_queue.put(("PROFILE", cam_id, f"プロファイル操作に失敗: {e}"))
+
+def _handle_tracemalloc_command(cam_id, cmd, frame_queue):
+    """
+    ("TRACEMALLOC_START", {"frames": n}) / ("TRACEMALLOC_SNAPSHOT",) / ("TRACEMALLOC_STOP",)
+    結果は ("PROFILE", cam_id, msg) で返す
+    """
+    try:
+        if cmd[0] == "TRACEMALLOC_START":
+            opts = cmd[1] if len(cmd) > 1 and cmd[1] else {}
+            frames = opts.get("frames", TRACEMALLOC_FRAMES)
+            started = _memory_tracer.start(frames)
+            msg = f"メモリ追跡開始 (frames={frames})" if started else "メモリ追跡はすでに実行中です"
+        elif cmd[0] == "TRACEMALLOC_SNAPSHOT":
+            msg = f"メモリスナップショット: {_memory_tracer.snapshot(f'cam{cam_id}_pid{os.getpid()}')}"
+        else:
+            msg = "メモリ追跡を停止しました" if _memory_tracer.stop() else "メモリ追跡は実行されていません"
+    except Exception as e:
+        msg = f"メモリ追跡の操作に失敗: {e}"
+    frame_queue.put(("PROFILE", cam_id, msg))
+
+def _report_metrics(cam, st, frame_queue):
+    metrics = st.metrics
+    metrics.counters["reconnects"] = getattr(cam, "reconnect_count", 0)
+    for stage, stats in st.enhancer.stats.items():
+        metrics.counters[f"enhance_{stage}_attempts"] = stats["attempts"]
+    metrics.counters["enhance_skipped"] = st.enhancer.skipped
+    for k, v in st.reader.cache.stats.items():
+        metrics.counters[f"decode_cache_{k}"] = v
+    for k, v in st.scheduler.state().items():
+        metrics.set_gauge(k, v)
+    if hasattr(cam, "get_latency_stats"):
+        for k, v in cam.get_latency_stats().items():
+            metrics.set_gauge(f"capture_{k}", v)
+    # メモリとキューの滞留（RSSはプロセス単位なので相乗り中のカメラは同じ値）
+    usage = process_usage()
+    if usage:
+        metrics.set_gauge("rss_mb", round(usage[1] / (1024 * 1024), 1))
+    try:
+        metrics.set_gauge("queue_depth", frame_queue.qsize())
+    except NotImplementedError:  # macOS
+        pass
+    metrics.set_gauge("tracemalloc", int(_memory_tracer.active))
+    try:
+        frame_queue.put_nowait(("METRICS", cam.camera_id, metrics.snapshot()))
+    except queue.Full:
+        pass
+
+class _Worker:
+    """1つのワーカープロセス（1台以上のカメラを担当）とキュー、再起動状態をまとめたもの"""
+
+    def __init__(self, key, capacity, cpus=None, connect_sem=None):
+        self.key = key
+        self.capacity = capacity
+        self.cpus = cpus
+        self.connect_sem = connect_sem
+        self.gate = None
+        self.drain_reason = None  # メモリ上限で正常停止を指示した理由
+        self.drain_at = 0.0
+        self.infos = {}          # cam_id -> camera_info
+        self.slots = {}          # cam_id -> heartbeats上の位置
+        self.finished_cams = set()
+        self.proc = None
+        self.frame_queue = None
+        self.cmd_queue = None
+        self.heartbeats = None
+        self.started_at = 0.0
+        self.restarts = 0
+        self.restart_at = None  # 再起動待ちなら予定時刻
+        self.finished = False
+
+    def free_slot(self):
+        used = set(self.slots.values())
+        return next((i for i in range(self.capacity) if i not in used), None)
+
+    def spawn(self):
+        # 強制終了したプロセスが使っていたキューは壊れている可能性があるため毎回作り直す
+        self.frame_queue = mp.Queue(maxsize=FRAME_QUEUE_MAXSIZE * self.capacity)
+        self.cmd_queue = mp.Queue()
+        self.heartbeats = mp.Array("d", [time.time()] * self.capacity, lock=False)
+        self.gate = _ConnectGate(self.connect_sem) if self.connect_sem is not None else None
+        self.drain_reason = None
+        camera_slots = [
+            (self.slots[cam_id], info)
+            for cam_id, info in self.infos.items()
+            if cam_id not in self.finished_cams
+        ]
+        self.proc = mp.Process(
+            target=camera_worker,
+            args=(camera_slots, self.frame_queue, self.cmd_queue, self.heartbeats, self.cpus, get_log_queue(),
+                  self.gate),
+            daemon=True
+        )
+        self.proc.start()
+        self.started_at = time.time()
+        self.restart_at = None
+        self.finished = False
+
+    def add_camera(self, camera_info):
+        cam_id = camera_info["id"]
+        slot = self.free_slot()
+        self.infos[cam_id] = camera_info
+        self.slots[cam_id] = slot
+        self.finished_cams.discard(cam_id)
+        if self.proc is not None and self.restart_at is None:
+            self.heartbeats[slot] = time.time()
+            self.cmd_queue.put(("ADD", slot, camera_info))
+
+    def remove_camera(self, cam_id):
+        self.infos.pop(cam_id, None)
+        self.slots.pop(cam_id, None)
+        self.finished_cams.discard(cam_id)
+        if self.infos and self.restart_at is None and self.proc.is_alive():
+            self.cmd_queue.put(("REMOVE", cam_id))
+
+    def is_accepting(self):
+        return (
+            len(self.infos) < self.capacity
+            and not self.finished
+            and self.restart_at is None
+            and self.proc is not None
+            and self.proc.is_alive()
+        )
+
+    def terminate(self):
+        proc = self.proc
+        if proc is None:
+            return
+        if proc.is_alive():
+            proc.terminate()
+            proc.join(timeout=2)
+            if proc.is_alive():
+                logger.warning(f"Worker {self.key} process did not exit, killing")
+                proc.kill()
+                proc.join(timeout=1)
+        if self.gate is not None and not proc.is_alive():
+            self.gate.reclaim()
+
+    def memory_limits(self):
+        """(soft MB, hard MB)。担当カメラに個別指定があればその最小値"""
+        def _limit(key, default):
+            values = [info.get("config", {}).get(key) for info in self.infos.values()]
+            values = [v for v in values if v]
+            return min(values) if values else default
+        return _limit("memory_soft_mb", WORKER_MEMORY_SOFT_MB), _limit("memory_hard_mb", WORKER_MEMORY_HARD_MB)
+
+    def hung_cameras(self, now):
+        """ハートビートが途絶えたカメラIDの一覧"""
+        if self.heartbeats is None or now - self.started_at < WORKER_STARTUP_GRACE_SEC:
+            return []
+        return [
+            cam_id
+            for cam_id, slot in self.slots.items()
+            if cam_id not in self.finished_cams
+            and now - max(self.heartbeats[slot], self.started_at) > WORKER_HANG_TIMEOUT_SEC
+        ]
+
 
 class ProcessManager:
-    def __init__(self):
-        self.processes = {}
-        self.queues = {}
-        self.cmd_queues = {}
+    def __init__(self, supervise=SUPERVISOR_ENABLED, cameras_per_process=CAMERAS_PER_PROCESS):
+        self.workers = {}        # worker key -> _Worker
+        self.camera_workers = {}  # cam_id -> _Worker
         self.camera_infos = {}
+        self.cameras_per_process = max(1, int(cameras_per_process))
+        self.metrics = MetricsRegistry()
+        self._lock = threading.RLock()
+        self._events = []  # 監視で発生した ("STATUS", cam_id, text)
+        # wait_frames() を起こすためのパイプ（監視イベント・ワーカー追加・停止要求）
+        self._wake_r, self._wake_w = mp.Pipe(duplex=False)
+        self._next_cpu = 0
+        self._next_key = 0
+        self._connect_sem = mp.BoundedSemaphore(STARTUP_MAX_CONCURRENT_CONNECTS)
+        self._startup = None  # 一括起動の進捗（start_cameras）
+
+        self._supervisor_stop = threading.Event()
+        self._supervisor = None
+        if supervise:
+            self._supervisor = threading.Thread(target=self._supervise_loop, name="worker-supervisor", daemon=True)
+            self._supervisor.start()
+
+    @property
+    def processes(self):
+        with self._lock:
+            return {cam_id: w.proc for cam_id, w in self.camera_workers.items()}
 
     def start_camera(self, camera_info):
         cam_id = camera_info["id"]
 
-        if cam_id in self.processes:
-            proc = self.processes[cam_id]
-            if proc.is_alive():
-                logger.warning(f"Camera {cam_id} already running")
-                return False
-            else:
+        with self._lock:
+            if cam_id in self.camera_workers:
+                if self.is_camera_running(cam_id):
+                    logger.warning(f"Camera {cam_id} already running")
+                    return False
                 logger.info(f"Cleaning up stale process entry for camera {cam_id}")
                 self.stop_camera(cam_id)
 
-        frame_queue = mp.Queue()
-        cmd_queue = mp.Queue()
+            # 空きのあるワーカーに相乗り。なければ新しいプロセスを起動
+            w = None
+            if self.cameras_per_process > 1 and not camera_info.get("config", {}).get("cpu_affinity"):
+                w = next((x for x in self.workers.values() if x.is_accepting()), None)
+            if w is None:
+                key = self._next_key
+                self._next_key += 1
+                w = _Worker(key, self.cameras_per_process, self._resolve_cpus(camera_info), self._connect_sem)
+                w.add_camera(camera_info)
+                w.spawn()
+                self.workers[key] = w
+                self.wakeup()  # 待機中の wait_frames() に新しいキューを監視させる
+            else:
+                w.add_camera(camera_info)
+            self.camera_workers[cam_id] = w
+            self.camera_infos[cam_id] = camera_info
 
-        proc = mp.Process(
-            target=camera_worker,
-            args=(camera_info, frame_queue, cmd_queue),
-            daemon=True
-        )
-        proc.start()
+        logger.info(f"Camera {cam_id} ({camera_info['type']}) started in worker {w.key}")
+        return True
 
-        self.processes[cam_id] = proc
-        self.queues[cam_id] = frame_queue
-        self.cmd_queues[cam_id] = cmd_queue
-        self.camera_infos[cam_id] = camera_info
+    def start_cameras(self, camera_infos, quorum=STARTUP_READY_QUORUM, timeout=STARTUP_READY_TIMEOUT_SEC):
+        """
+        複数カメラの一括起動。ワーカーはすぐに全台起動し、接続は STARTUP_MAX_CONCURRENT_CONNECTS 台ずつ並行に行う。
+        各カメラの最初のフレームで ("READY", cam_id, ms) が、quorum（割合）以上のカメラが揃うか
+        timeout を過ぎると ("SITE_READY", {...}) が get_frames() に流れる。
+        戻り値: 起動したカメラIDのリスト
+        """
+        # 速いカメラ（USB/ファイル/合成）の READY は起動直後に届くので、起動前に待ち対象を登録しておく
+        ids = [info["id"] for info in camera_infos]
+        with self._lock:
+            self._startup = {
+                "t0": time.perf_counter(),
+                "timeout": timeout,
+                "total": len(ids),
+                "need": max(1, math.ceil(len(ids) * quorum)) if ids else 0,
+                "pending": set(ids),
+                "ready": {},
+            }
+        started = [info["id"] for info in camera_infos if self.start_camera(info)]
+        with self._lock:
+            st = self._startup
+            if st is not None:
+                # 起動できなかったカメラは待ち対象から外す
+                failed = set(ids) - set(started)
+                st["pending"] -= failed
+                for cam_id in failed:
+                    st["ready"].pop(cam_id, None)
+                st["total"] = len(started)
+                st["need"] = max(1, math.ceil(len(started) * quorum)) if started else 0
+        logger.info(f"Bulk start: {len(started)}/{len(camera_infos)} cameras launched")
+        return started
 
-        logger.info(f"Camera {cam_id} ({camera_info['type']}) started")
-        return True
+    def startup_status(self):
+        """一括起動の進捗。start_cameras() を呼んでいなければ None"""
+        with self._lock:
+            st = self._startup
+            if st is None:
+                return None
+            return {
+                "total": st["total"],
+                "ready": dict(st["ready"]),
+                "pending": sorted(st["pending"], key=str),
+                "elapsed_ms": (time.perf_counter() - st["t0"]) * 1000.0,
+            }
+
+    def _on_camera_ready(self, cam_id, ms, out):
+        with self._lock:
+            st = self._startup
+            if st is None or cam_id not in st["pending"]:
+                return
+            st["pending"].discard(cam_id)
+            st["ready"][cam_id] = ms
+            self._check_site_ready(out)
+
+    def _check_site_ready(self, out):
+        with self._lock:
+            st = self._startup
+            if st is None:
+                return
+            elapsed = time.perf_counter() - st["t0"]
+            timed_out = elapsed >= st["timeout"]
+            if len(st["ready"]) < st["need"] and not timed_out:
+                return
+            self._startup = None
+        info = {
+            "ready": len(st["ready"]),
+            "total": st["total"],
+            "elapsed_ms": elapsed * 1000.0,
+            "timed_out": len(st["ready"]) < st["need"],
+            "missing": sorted(st["pending"], key=str),
+        }
+        logger.info(f"Site ready: {info['ready']}/{info['total']} cameras in {elapsed:.1f}s"
+                    + (f" (timeout, missing {info['missing']})" if info["timed_out"] else ""))
+        out.append(("SITE_READY", info))
+
+    def _resolve_cpus(self, camera_info):
+        """config["cpu_affinity"] を優先。CPU_PINNING="auto" なら利用可能CPUに順番に割り当てる"""
+        cpus = camera_info.get("config", {}).get("cpu_affinity")
+        if cpus:
+            return list(cpus)
+        if CPU_PINNING != "auto":
+            return None
+        if hasattr(os, "sched_getaffinity"):
+            available = sorted(os.sched_getaffinity(0))
+        else:
+            available = list(range(os.cpu_count() or 1))
+        cpu = available[self._next_cpu % len(available)]
+        self._next_cpu += 1
+        return [cpu]
 
     def stop_camera(self, cam_id):
-        if cam_id in self.processes:
-            proc = self.processes.pop(cam_id)
+        with self._lock:
+            w = self.camera_workers.pop(cam_id, None)
+            self.camera_infos.pop(cam_id, None)
+            if w is None:
+                return
+            w.remove_camera(cam_id)
+            last = not w.infos
+            if last:
+                self.workers.pop(w.key, None)
+        if last:
             try:
-                if proc.is_alive():
-                    proc.terminate()
-                    proc.join(timeout=2)
-                    if proc.is_alive():
-                        logger.warning(f"Camera {cam_id} process did not exit, killing")
-                        proc.kill()
+                w.terminate()
             except Exception as e:
                 logger.error(f"Error stopping camera {cam_id}: {e}")
-
-            self.queues.pop(cam_id, None)
-            self.cmd_queues.pop(cam_id, None)
-            self.camera_infos.pop(cam_id, None)
-            logger.info(f"Camera {cam_id} stopped")
+        self.metrics.remove(cam_id)
+        logger.info(f"Camera {cam_id} stopped")
 
     def stop_all(self):
-        for cam_id in list(self.processes.keys()):
+        for cam_id in list(self.camera_workers.keys()):
             self.stop_camera(cam_id)
 
+    def shutdown(self):
+        self._supervisor_stop.set()
+        self.stop_all()
+        self.wakeup()
+
     def get_frames(self):
         frames = []
-        for cam_id, q in self.queues.items():
+        with self._lock:
+            workers = list(self.workers.values())
+            frames.extend(self._events)
+            self._events.clear()
+        for w in workers:
+            q = w.frame_queue
             try:
                 while True:
-                    frames.append(q.get_nowait())
-            except queue.Empty:
+                    data = q.get_nowait()
+                    if isinstance(data, tuple) and data[0] == "METRICS":
+                        self.metrics.update_worker(data[1], data[2])
+                        continue
+                    if isinstance(data, tuple) and data[0] == "EOS":
+                        w.finished_cams.add(data[1])
+                    if isinstance(data, tuple) and data[0] == "PTZ_ACK" and data[2].get("sent_at"):
+                        # 送信から実行完了の通知が届くまで（キュー往復＋SOAP呼び出し）
+                        data[2]["rtt_ms"] = (time.time() - data[2]["sent_at"]) * 1000.0
+                        self.metrics.observe_local(data[1], "ptz_rtt", data[2]["rtt_ms"])
+                    frames.append(data)
+                    if isinstance(data, tuple) and data[0] == "READY":
+                        self._on_camera_ready(data[1], data[2], frames)
+            except (queue.Empty, OSError, ValueError):
                 pass
+        self._check_site_ready(frames)
         return frames
 
+    def wait_frames(self, timeout=None):
+        """
+        いずれかのワーカーの出力キューにデータが届くか、wakeup() されるまでブロックし、
+        その時点のデータを get_frames() と同じ形式で返す（タイムアウト時は空リストのことがある）。
+        """
+        with self._lock:
+            pending = bool(self._events)
+            readers = [w.frame_queue._reader for w in self.workers.values() if w.frame_queue is not None]
+        if not pending:
+            try:
+                ready = mp_connection.wait(readers + [self._wake_r], timeout)
+            except (OSError, ValueError):
+                # 再起動などでキューが閉じられた直後。次の呼び出しで一覧を取り直す
+                ready = []
+            if self._wake_r in ready:
+                while self._wake_r.poll():
+                    self._wake_r.recv_bytes()
+        return self.get_frames()
+
+    def wakeup(self):
+        """wait_frames() で待っているスレッドを起こす"""
+        with self._lock:
+            try:
+                self._wake_w.send_bytes(b"\0")
+            except OSError:
+                pass
+
     def send_command(self, cam_id, cmd):
-        if cam_id in self.cmd_queues:
-            self.cmd_queues[cam_id].put(cmd)
+        with self._lock:
+            w = self.camera_workers.get(cam_id)
+            if w is None:
+                return False
+            # 再起動後も引き継ぐ設定は camera_info に反映しておく
+            if isinstance(cmd, tuple) and cmd and cmd[0] == "SET_DECODE_MODE":
+                w.infos[cam_id]["decode_mode"] = cmd[1]
+            elif isinstance(cmd, tuple) and cmd and cmd[0] == "SET_ENHANCE_STAGES":
+                w.infos[cam_id].setdefault("config", {})["enhance_stages"] = list(cmd[1])
+            if w.restart_at is not None:
+                return False
+            w.cmd_queue.put(("CAM", cam_id, cmd))
+            return True
+
+    def find_camera_id(self, text):
+        """文字列表現からカメラIDを探す（USBカメラのIDは整数のため）"""
+        for cam_id in list(self.camera_infos):
+            if str(cam_id) == str(text):
+                return cam_id
+        return None
+
+    def set_enhance_stages(self, cam_id, stages):
+        """フォールバック前処理の段をカメラ毎に変更（[]で無効）"""
+        return self.send_command(cam_id, ("SET_ENHANCE_STAGES", list(stages)))
+
+    def start_profile(self, cam_id, kind="cprofile", duration=30):
+        self.send_command(cam_id, ("PROFILE_START", {"kind": kind, "duration": duration}))
+
+    def stop_profile(self, cam_id):
+        self.send_command(cam_id, ("PROFILE_STOP",))
+
+    def ptz_move(self, cam_id, pan, tilt, zoom):
+        """速度 -1.0〜1.0 で連続移動。結果はワーカーから ("PTZ_ACK", cam_id, {...}) で届く"""
+        return self.send_command(cam_id, ("PTZ_MOVE", {"pan": pan, "tilt": tilt, "zoom": zoom, "sent_at": time.time()}))
+
+    def ptz_stop(self, cam_id):
+        return self.send_command(cam_id, ("PTZ_STOP", {"sent_at": time.time()}))
+
+    def start_tracemalloc(self, cam_id, frames=TRACEMALLOC_FRAMES):
+        """cam_id を担当するワーカープロセスで tracemalloc を開始"""
+        return self.send_command(cam_id, ("TRACEMALLOC_START", {"frames": frames}))
+
+    def tracemalloc_snapshot(self, cam_id):
+        """スナップショットと前回との差分を LOG_DIR に書き出させる"""
+        return self.send_command(cam_id, ("TRACEMALLOC_SNAPSHOT",))
+
+    def stop_tracemalloc(self, cam_id):
+        return self.send_command(cam_id, ("TRACEMALLOC_STOP",))
 
     def list_onvif_cameras(self):
         """
@@ -154,5 +927,94 @@ class ProcessManager:
         ]
 
     def is_camera_running(self, cam_id):
-        proc = self.processes.get(cam_id)
-        return proc.is_alive() if proc else False
+        """監視下で再起動待ちのカメラも起動中として扱う"""
+        w = self.camera_workers.get(cam_id)
+        if w is None or cam_id in w.finished_cams:
+            return False
+        return w.restart_at is not None or w.proc.is_alive()
+
+    # ---- 監視 --------------------------------------------------------------
+
+    def _supervise_loop(self):
+        while not self._supervisor_stop.wait(SUPERVISOR_INTERVAL_SEC):
+            try:
+                self._supervise_once()
+            except Exception as e:
+                logger.error(f"Supervisor error: {e}")
+
+    def _supervise_once(self):
+        now = time.time()
+        with self._lock:
+            items = list(self.workers.values())
+
+        for w in items:
+            if w.finished:
+                continue
+
+            if w.restart_at is not None:
+                if now >= w.restart_at:
+                    with self._lock:
+                        if self.workers.get(w.key) is not w:
+                            continue  # 待機中に停止された
+                        w.spawn()
+                    self._post_status(w, f"再起動しました（{w.restarts}回目）")
+                continue
+
+            if not w.proc.is_alive():
+                remaining = [cid for cid in w.infos if cid not in w.finished_cams]
+                if w.proc.exitcode == 0 and not remaining:
+                    w.finished = True
+                    continue
+                reason = w.drain_reason or f"プロセス終了 (exitcode={w.proc.exitcode})"
+                w.terminate()  # 接続枠の回収
+            else:
+                hung = w.hung_cameras(now)
+                if hung:
+                    # スレッドは個別に止められないため、プロセスごと再起動する
+                    reason = f"カメラ {hung} が応答なし"
+                else:
+                    reason = self._check_memory(w, now)
+                    if reason is None:
+                        if w.restarts and now - w.started_at >= WORKER_STABLE_SEC:
+                            w.restarts = 0
+                        continue
+                w.terminate()
+
+            delay = min(WORKER_RESTART_BASE_DELAY_SEC * (2 ** w.restarts), WORKER_RESTART_MAX_DELAY_SEC)
+            w.restarts += 1
+            w.restart_at = now + delay
+            logger.warning(f"Worker {w.key} {reason}; restarting in {delay:.1f}s")
+            self._post_status(w, f"{reason}。{delay:.1f}秒後に再起動します")
+
+    def _check_memory(self, w, now):
+        """
+        ワーカーのRSSを上限と比べる。soft超過なら正常停止を指示し（終了後に通常の再起動経路へ）、
+        hard超過または停止待ちのタイムアウトなら強制終了すべき理由を返す。問題なければNone
+        """
+        soft, hard = w.memory_limits()
+        if not soft and not hard:
+            return None
+        usage = process_usage(w.proc.pid)
+        if usage is None:
+            return None
+        rss_mb = usage[1] / (1024 * 1024)
+        if hard and rss_mb >= hard:
+            logger.error(f"Worker {w.key} RSS {rss_mb:.0f}MB exceeds hard limit {hard}MB")
+            return f"メモリ使用量が強制上限を超過 ({rss_mb:.0f}MB >= {hard}MB)"
+        if w.drain_reason:
+            if now - w.drain_at > WORKER_DRAIN_TIMEOUT_SEC:
+                return f"{w.drain_reason}（停止待ちタイムアウト）"
+            return None
+        if soft and rss_mb >= soft:
+            logger.warning(f"Worker {w.key} RSS {rss_mb:.0f}MB exceeds soft limit {soft}MB; draining")
+            w.drain_reason = f"メモリ使用量が上限を超過 ({rss_mb:.0f}MB >= {soft}MB)"
+            w.drain_at = now
+            w.cmd_queue.put(("SHUTDOWN",))
+            self._post_status(w, f"{w.drain_reason}。再起動のため停止します")
+        return None
+
+    def _post_status(self, w, text):
+        with self._lock:
+            for cam_id in w.infos:
+                self._events.append(("STATUS", cam_id, text))
+            self.wakeup()
@@ -0,0 +1,174 @@
+"""
+ワーカー内のオンデマンドプロファイラ
+  - cprofile: cProfile で計測し .pstats と上位関数の .txt を出力
+  - sampling: 別スレッドから対象スレッドのスタックを定期採取し collapsed-stack(.collapsed) を出力
+             （flamegraph.pl / speedscope でそのまま読める）
+  - MemoryTracer: tracemalloc のスナップショットと前回との差分を出力（プロセス単位）
+"""
+import cProfile
+import io
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from datetime import datetime
+
+from config.settings import (
+    LOG_DIR, PROFILE_SAMPLE_INTERVAL_MS, PROFILE_MAX_DURATION_SEC, TRACEMALLOC_FRAMES, TRACEMALLOC_TOP,
+)
+
+
+class WorkerProfiler:
+    def __init__(self, cam_id, out_dir=LOG_DIR):
+        self.cam_id = cam_id
+        self.out_dir = out_dir
+        self.kind = None
+        self._deadline = 0.0
+        self._profile = None
+        self._sampler = None
+        self._stop_event = None
+        self._stacks = None
+
+    @property
+    def active(self):
+        return self.kind is not None
+
+    def start(self, kind="cprofile", duration=30.0):
+        """呼び出したスレッドを対象に計測を開始する"""
+        if self.active:
+            raise RuntimeError(f"profiler already running ({self.kind})")
+        duration = max(1.0, min(float(duration), PROFILE_MAX_DURATION_SEC))
+
+        if kind == "cprofile":
+            self._profile = cProfile.Profile()
+            self._profile.enable()
+        elif kind == "sampling":
+            self._stacks = Counter()
+            self._stop_event = threading.Event()
+            target = threading.get_ident()
+            self._sampler = threading.Thread(
+                target=self._sample_loop, args=(target,), name=f"sampler-{self.cam_id}", daemon=True
+            )
+            self._sampler.start()
+        else:
+            raise ValueError(f"Unsupported profiler kind: {kind}")
+
+        self.kind = kind
+        self._deadline = time.monotonic() + duration
+
+    def poll(self):
+        """期限が来ていれば停止して出力ファイルのパスを返す。それ以外はNone"""
+        if self.active and time.monotonic() >= self._deadline:
+            return self.stop()
+        return None
+
+    def stop(self):
+        """計測を停止し出力ファイルのパスを返す"""
+        if not self.active:
+            return None
+        os.makedirs(self.out_dir, exist_ok=True)
+        base = os.path.join(self.out_dir, f"profile_cam{self.cam_id}_{datetime.now().strftime('%Y%m%d_%H%M%S')}")
+
+        if self.kind == "cprofile":
+            self._profile.disable()
+            path = base + ".pstats"
+            self._profile.dump_stats(path)
+            buf = io.StringIO()
+            pstats.Stats(self._profile, stream=buf).sort_stats("cumulative").print_stats(40)
+            with open(base + ".txt", "w", encoding="utf-8") as f:
+                f.write(buf.getvalue())
+            self._profile = None
+        else:
+            self._stop_event.set()
+            self._sampler.join(timeout=2)
+            path = base + ".collapsed"
+            with open(path, "w", encoding="utf-8") as f:
+                for stack, count in self._stacks.most_common():
+                    f.write(f"{stack} {count}\n")
+            self._sampler = None
+            self._stacks = None
+
+        self.kind = None
+        return path
+
+    def _sample_loop(self, target_ident):
+        interval = PROFILE_SAMPLE_INTERVAL_MS / 1000.0
+        while not self._stop_event.wait(interval):
+            frame = sys._current_frames().get(target_ident)
+            if frame is None:
+                continue
+            names = []
+            while frame is not None:
+                code = frame.f_code
+                names.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                frame = frame.f_back
+            self._stacks[";".join(reversed(names))] += 1
+
+
+class MemoryTracer:
+    """
+    tracemalloc はプロセス全体が対象のため、ワーカープロセスに1つだけ置き、どのカメラのスレッドからでも操作する。
+    snapshot() は上位の確保箇所と、前回スナップショットからの増加分を .txt に書き、
+    生データも .tracemalloc（tracemalloc.Snapshot.load で読める）として保存する。
+    """
+
+    def __init__(self, out_dir=LOG_DIR):
+        self.out_dir = out_dir
+        self._lock = threading.Lock()
+        self._last = None
+        self._seq = 0
+
+    @property
+    def active(self):
+        return tracemalloc.is_tracing()
+
+    def start(self, frames=TRACEMALLOC_FRAMES):
+        with self._lock:
+            if tracemalloc.is_tracing():
+                return False
+            tracemalloc.start(int(frames))
+            self._last = None
+            return True
+
+    def snapshot(self, label):
+        """スナップショットを取り、出力ファイルのパスを返す"""
+        with self._lock:
+            if not tracemalloc.is_tracing():
+                raise RuntimeError("tracemalloc is not running")
+            snap = tracemalloc.take_snapshot().filter_traces((
+                tracemalloc.Filter(False, tracemalloc.__file__),
+                tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+            ))
+            os.makedirs(self.out_dir, exist_ok=True)
+            self._seq += 1
+            stamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+            base = os.path.join(self.out_dir, f"tracemalloc_{label}_{stamp}_{self._seq:03d}")
+            snap.dump(base + ".tracemalloc")
+
+            current, peak = tracemalloc.get_traced_memory()
+            lines = [f"traced current={current / 1024 / 1024:.1f}MB peak={peak / 1024 / 1024:.1f}MB", ""]
+            if self._last is not None:
+                lines.append(f"== 前回からの増加 上位{TRACEMALLOC_TOP} ==")
+                lines.extend(str(s) for s in snap.compare_to(self._last, "lineno")[:TRACEMALLOC_TOP])
+                lines.append("")
+            lines.append(f"== 確保量 上位{TRACEMALLOC_TOP} ==")
+            lines.extend(str(s) for s in snap.statistics("lineno")[:TRACEMALLOC_TOP])
+            top = snap.statistics("traceback")[:1]
+            if top:
+                lines.append("")
+                lines.append("== 最大の確保箇所のスタック ==")
+                lines.extend(top[0].traceback.format())
+            with open(base + ".txt", "w", encoding="utf-8") as f:
+                f.write("\n".join(lines) + "\n")
+            self._last = snap
+            return base + ".txt"
+
+    def stop(self):
+        with self._lock:
+            was = tracemalloc.is_tracing()
+            tracemalloc.stop()
+            self._last = None
+            return was
@@ -0,0 +1,81 @@
+"""
+ワーカー内のPTZ実行（カメラ1台につき1スレッド）
+キャプチャループはコマンドを submit() するだけで、SOAP呼び出しはこのスレッドで行う。
+実行待ちの間に届いた移動コマンドは最新の速度1件にまとめる（ボタン連打や押しっぱなしで
+カメラへの要求が溜まらないように）。停止は待ちの移動を打ち消す。
+実行結果は ("PTZ_ACK", cam_id, {...}) で親へ返す。まとめて送らなかったコマンドにも
+coalesced=True の応答を返す（応答はすべてこのスレッドから送り、キャプチャループは待たせない）。
+"""
+import threading
+import time
+
+from core.logger import get_logger
+
+logger = get_logger()
+
+
+class PTZController:
+    def __init__(self, cam, frame_queue):
+        self.cam = cam
+        self.frame_queue = frame_queue
+        self._cond = threading.Condition()
+        self._pending = None  # (kind, sent_at, args)
+        self._dropped = []  # 後続にまとめて送らなかったコマンド [(kind, sent_at), ...]
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name=f"ptz-{cam.camera_id}", daemon=True)
+        self._thread.start()
+
+    def submit(self, cmd):
+        """("PTZ_MOVE", {"pan", "tilt", "zoom", "sent_at"}) / ("PTZ_STOP", {"sent_at"})"""
+        kind = "move" if cmd[0] == "PTZ_MOVE" else "stop"
+        args = cmd[1] if len(cmd) > 1 and cmd[1] else {}
+        with self._cond:
+            if self._pending is not None:
+                self._dropped.append(self._pending[:2])
+            self._pending = (kind, args.get("sent_at"), args)
+            self._cond.notify()
+
+    def stop(self, timeout=2.0):
+        with self._cond:
+            self._running = False
+            self._cond.notify()
+        self._thread.join(timeout)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while self._running and self._pending is None:
+                    self._cond.wait()
+                if not self._running:
+                    return
+                kind, sent_at, args = self._pending
+                self._pending = None
+                dropped, self._dropped = self._dropped, []
+            for d_kind, d_sent_at in dropped:
+                self._ack(d_kind, d_sent_at, True, None, 0.0, coalesced=True)
+            self._execute(kind, sent_at, args)
+
+    def _execute(self, kind, sent_at, args):
+        t0 = time.perf_counter()
+        ok, error = True, None
+        try:
+            # ContinuousMove はカメラ側のタイムアウトで止まることがあるため、同じ速度でも毎回送る
+            if kind == "move":
+                self.cam.ptz_move(float(args.get("pan", 0.0)), float(args.get("tilt", 0.0)),
+                                  float(args.get("zoom", 0.0)))
+            else:
+                self.cam.ptz_stop()
+        except Exception as e:
+            ok, error = False, str(e)
+            logger.error(f"[PTZ:{self.cam.camera_id}] {kind} 失敗: {e}")
+        self._ack(kind, sent_at, ok, error, (time.perf_counter() - t0) * 1000.0)
+
+    def _ack(self, kind, sent_at, ok, error, call_ms, coalesced=False):
+        self.frame_queue.put(("PTZ_ACK", self.cam.camera_id, {
+            "cmd": kind,
+            "ok": ok,
+            "error": error,
+            "sent_at": sent_at,
+            "call_ms": call_ms,
+            "coalesced": coalesced,  # True: 後続のコマンドにまとめたため送信していない
+        }))
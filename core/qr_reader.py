@@ -1,27 +1,49 @@
 # core/qr_reader.py
+import multiprocessing as mp
+import os
+import cv2
 import zxingcpp
 from pyzbar import pyzbar
 from pyzbar.pyzbar import ZBarSymbol
 
+from config.settings import DECODE_CACHE_SIZE
+from core.decode_cache import DecodeCache
+
 class QRReader:
-    def __init__(self, mode="all"):
+    def __init__(self, mode="all", cache_size=DECODE_CACHE_SIZE):
         """
         mode: "datamatrix", "qrcode", "barcode", "all"
+        cache_size: decode(use_cache=True) で使う結果キャッシュの大きさ（0で無効）
         """
         self.mode = mode
+        self.cache = DecodeCache(cache_size)
 
     def set_mode(self, mode: str):
         self.mode = mode
 
-    def decode(self, gray_frame):
+    def decode(self, gray_frame, mode=None, use_cache=False):
         """
         gray_frame: OpenCVの単一チャンネル画像（uint8）
+        mode: 一時的に対象を絞る場合に指定（未指定なら self.mode）
+        use_cache: 連続するフレーム全体を渡す場合に指定。前回読めたコードの周辺がほぼ変わっていなければ
+                   デコーダを呼ばずに前回の結果を返す（切り出し画像など毎回別の画像には使わない）
         戻り値: [{data, rect, polygon, type}]
         """
+        mode = mode or self.mode
+        if not (use_cache and self.cache.enabled):
+            return self._decode(gray_frame, mode)
+
+        results = self.cache.lookup(gray_frame, mode)
+        if results is None:
+            results = self._decode(gray_frame, mode)
+            self.cache.store(gray_frame, mode, results)
+        return results
+
+    def _decode(self, gray_frame, mode):
         results = []
 
         # --- DataMatrix: zxing-cpp ---
-        if self.mode in ("datamatrix", "all"):
+        if mode in ("datamatrix", "all"):
             try:
                 # DataMatrix専用にフォーマットを絞る
                 dm_results = zxingcpp.read_barcodes(
@@ -48,10 +70,10 @@ class QRReader:
                 pass
 
         # --- QRコード & バーコード: pyzbar ---
-        if self.mode in ("qrcode", "barcode", "all"):
-            if self.mode == "qrcode":
+        if mode in ("qrcode", "barcode", "all"):
+            if mode == "qrcode":
                 symbols = [ZBarSymbol.QRCODE]
-            elif self.mode == "barcode":
+            elif mode == "barcode":
                 symbols = [
                     ZBarSymbol.CODE128, ZBarSymbol.CODE39, ZBarSymbol.CODE93,
                     ZBarSymbol.EAN8, ZBarSymbol.EAN13, ZBarSymbol.UPCA, ZBarSymbol.UPCE,
@@ -59,7 +81,6 @@ class QRReader:
                 ]
             else:
                 symbols = None  # all
-            decoded_objs = pyzbar.decode(gray_frame, symbols=symbols)
 
             try:
                 decoded_objs = pyzbar.decode(gray_frame, symbols=symbols)
@@ -75,3 +96,91 @@ class QRReader:
                 pass
 
         return results
+
+    def decode_batch(self, paths, workers=None, chunksize=16, reduce=1):
+        """
+        画像ファイル群をプロセスプールで並列にデコードする。
+        完了した順に (path, results) を逐次返す（読み込めない画像は results=None）。
+        reduce: JPEGを 1/2, 1/4, 1/8 で縮小デコードする（読めなければ等倍で再試行）
+        """
+        workers = workers or os.cpu_count() or 1
+        ctx = mp.get_context("spawn")
+        with ctx.Pool(workers, initializer=_init_batch_worker, initargs=(self.mode,)) as pool:
+            tasks = ((p, reduce) for p in paths)
+            for item in pool.imap_unordered(_scan_image, tasks, chunksize=chunksize):
+                yield item
+
+
+# ---- バッチデコード（プロセスプール側） ------------------------------------
+
+_REDUCED_FLAGS = {
+    2: cv2.IMREAD_REDUCED_GRAYSCALE_2,
+    4: cv2.IMREAD_REDUCED_GRAYSCALE_4,
+    8: cv2.IMREAD_REDUCED_GRAYSCALE_8,
+}
+
+_batch_reader = None
+
+
+def _init_batch_worker(mode):
+    global _batch_reader
+    _batch_reader = QRReader(mode=mode)
+
+
+def load_gray(path, reduce=1):
+    """グレースケールで読み込む。JPEGはデコーダ側で縮小（IDCTスケーリング）して高速化"""
+    flag = _REDUCED_FLAGS.get(reduce)
+    if flag is not None and path.lower().endswith((".jpg", ".jpeg")):
+        return cv2.imread(path, flag), reduce
+    return cv2.imread(path, cv2.IMREAD_GRAYSCALE), 1
+
+
+def _scan_image(task):
+    path, reduce = task
+    try:
+        gray, scale = load_gray(path, reduce)
+        if gray is None:
+            return path, None
+        results = _batch_reader.decode(gray)
+        if scale > 1:
+            if results:
+                results = offset_results(results, 0, 0, float(scale))
+            else:
+                gray = cv2.imread(path, cv2.IMREAD_GRAYSCALE)
+                results = _batch_reader.decode(gray) if gray is not None else []
+        return path, results
+    except Exception:
+        return path, None
+
+
+def mode_for_types(types):
+    """
+    読み取れたシンボル種別の集合から、それだけを対象にするデコードモードを返す。
+    種別が混在している/不明ならNone
+    """
+    if not types:
+        return None
+    if types == {"DataMatrix"}:
+        return "datamatrix"
+    if types == {"QRCODE"}:
+        return "qrcode"
+    if not types & {"DataMatrix", "QRCODE"}:
+        return "barcode"
+    return None
+
+
+def offset_results(results, dx, dy, scale=1.0):
+    """
+    部分画像/縮小画像でのデコード結果を元画像の座標に戻す
+    (x, y) -> (x * scale + dx, y * scale + dy)
+    """
+    out = []
+    for r in results:
+        r = dict(r)
+        if r.get("polygon"):
+            r["polygon"] = [(int(px * scale + dx), int(py * scale + dy)) for px, py in r["polygon"]]
+        if r.get("rect"):
+            x, y, w, h = r["rect"]
+            r["rect"] = (int(x * scale + dx), int(y * scale + dy), int(w * scale), int(h * scale))
+        out.append(r)
+    return out
@@ -0,0 +1,354 @@
+"""
+読み取り結果の外部出力（MES等への連携用）
+各シンクは専用スレッドで非同期にバッチ送信する。
+送信失敗時はバックオフしながら再試行し、その間のデータはディスクにスプールして復旧後に古い順に再送する。
+スプールは <name>.jsonl に追記し、再送時は番号付きの断片 <name>.jsonl.N に改名してから
+バッチ単位で読み出す。送れた位置は <name>.jsonl.N.offset に記録し、断片は送り切ってから削除する
+（再送中に落ちても未送信分はディスクに残る。直前のバッチは二重に届くことがある）。
+  - JsonlFileSink  : ローテーション付きJSONLファイル
+  - UnixSocketSink : UNIXドメインソケットへ1行1レコードのJSONを流す
+  - WebhookSink    : HTTP POST（JSON配列）
+"""
+import json
+import os
+import socket
+import threading
+import time
+from collections import deque
+
+import requests
+
+from config.settings import (
+    RESULT_SINKS,
+    SINK_BATCH_SIZE,
+    SINK_FLUSH_INTERVAL_SEC,
+    SINK_MAX_BUFFER,
+    SINK_RETRY_BASE_DELAY_SEC,
+    SINK_RETRY_MAX_DELAY_SEC,
+    SINK_SPOOL_DIR,
+    SINK_SPOOL_MAX_BYTES,
+)
+from core.logger import get_logger
+
+logger = get_logger()
+
+
+class ResultSink:
+    def __init__(self, name, batch_size=SINK_BATCH_SIZE, flush_interval=SINK_FLUSH_INTERVAL_SEC,
+                 max_buffer=SINK_MAX_BUFFER, spool_dir=SINK_SPOOL_DIR):
+        self.name = name
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_buffer = max_buffer
+        self.spool_path = os.path.join(spool_dir, f"{name}.jsonl")
+        self.sent = 0
+        self.spooled = 0
+        self.dropped = 0
+
+        self._buf = deque()
+        self._cond = threading.Condition()
+        self._spool_lock = threading.Lock()
+        self._closing = False
+        self._delay = SINK_RETRY_BASE_DELAY_SEC
+        self._retry_at = 0.0  # 障害中は次の再試行時刻
+        self._thread = threading.Thread(target=self._run, name=f"sink-{name}", daemon=True)
+        self._thread.start()
+
+    # ---- サブクラスで実装 --------------------------------------------------
+
+    def send_batch(self, records):
+        """records を送る。失敗時は例外を投げる"""
+        raise NotImplementedError
+
+    def close_transport(self):
+        pass
+
+    # ---- 公開API -----------------------------------------------------------
+
+    def submit(self, record):
+        """呼び出し側をブロックしない。バッファが溢れたら古いものからスプールへ回す"""
+        with self._cond:
+            self._buf.append(record)
+            overflow = []
+            while len(self._buf) > self.max_buffer:
+                overflow.append(self._buf.popleft())
+            if len(self._buf) >= self.batch_size:
+                self._cond.notify()
+        if overflow:
+            self._spool(overflow)
+
+    def close(self, timeout=5.0):
+        with self._cond:
+            self._closing = True
+            self._cond.notify()
+        self._thread.join(timeout=timeout)
+        self.close_transport()
+
+    # ---- 内部処理 ----------------------------------------------------------
+
+    def _run(self):
+        while True:
+            with self._cond:
+                if len(self._buf) < self.batch_size and not self._closing:
+                    # バッチが溜まるか flush_interval が経過するまで待つ
+                    self._cond.wait(self.flush_interval)
+                batch = [self._buf.popleft() for _ in range(min(self.batch_size, len(self._buf)))]
+                closing = self._closing and not self._buf
+
+            if batch:
+                self._deliver(batch)
+            elif time.monotonic() >= self._retry_at:
+                self._drain_spool()
+            if closing:
+                return
+
+    def _deliver(self, batch):
+        now = time.monotonic()
+        if now < self._retry_at or (self._closing and self._retry_at):
+            self._spool(batch)
+            return
+        # 復旧後は古いデータ（スプール）から順に送る
+        if not self._drain_spool():
+            self._spool(batch)
+            return
+        try:
+            self.send_batch(batch)
+            self.sent += len(batch)
+            self._on_success()
+        except Exception as e:
+            self._on_failure(e)
+            self._spool(batch)
+
+    def _on_success(self):
+        if self._retry_at:
+            logger.info(f"[SINK:{self.name}] 送信が復旧しました")
+        self._delay = SINK_RETRY_BASE_DELAY_SEC
+        self._retry_at = 0.0
+
+    def _on_failure(self, err):
+        logger.warning(f"[SINK:{self.name}] 送信失敗（{self._delay:.1f}秒後に再試行）: {err}")
+        self.close_transport()
+        self._retry_at = time.monotonic() + self._delay
+        self._delay = min(self._delay * 2, SINK_RETRY_MAX_DELAY_SEC)
+
+    def _spool(self, records):
+        with self._spool_lock:
+            os.makedirs(os.path.dirname(self.spool_path), exist_ok=True)
+            if self._spool_bytes() >= SINK_SPOOL_MAX_BYTES:
+                self.dropped += len(records)
+                logger.error(f"[SINK:{self.name}] スプール上限のため {len(records)} 件を破棄しました")
+                return
+            with open(self.spool_path, "a", encoding="utf-8") as f:
+                for r in records:
+                    f.write(json.dumps(r, ensure_ascii=False) + "\n")
+            self.spooled += len(records)
+
+    def _segments(self):
+        """再送待ちの断片 [(番号, パス), ...]（古い順）"""
+        spool_dir = os.path.dirname(self.spool_path) or "."
+        prefix = os.path.basename(self.spool_path) + "."
+        try:
+            names = os.listdir(spool_dir)
+        except OSError:
+            return []
+        return sorted((int(n[len(prefix):]), os.path.join(spool_dir, n))
+                      for n in names if n.startswith(prefix) and n[len(prefix):].isdigit())
+
+    def _spool_bytes(self):
+        total = 0
+        for path in [self.spool_path] + [p for _, p in self._segments()]:
+            try:
+                total += os.path.getsize(path)
+            except OSError:
+                pass
+        return total
+
+    def _drain_spool(self):
+        """スプールを古い順に送り切ったらTrue。途中で失敗したらFalse（未送信分はディスクに残す）"""
+        resent = 0
+        while True:
+            with self._spool_lock:
+                segments = self._segments()
+                if not segments:
+                    if not os.path.exists(self.spool_path):
+                        break
+                    # 断片を送り切ってから新しい追記分を断片にするので、送信順は追記順のまま
+                    seq = 1
+                    segment = f"{self.spool_path}.{seq}"
+                    _remove_quietly(segment + ".offset")
+                    os.replace(self.spool_path, segment)
+                    segments = [(seq, segment)]
+            ok, n = self._send_segment(segments[0][1])
+            resent += n
+            if not ok:
+                return False
+        if resent:
+            self._on_success()
+            logger.info(f"[SINK:{self.name}] スプール {resent} 件を再送しました")
+        return True
+
+    def _send_segment(self, path):
+        """断片をバッチ単位で送る。戻り値: (送り切ったか, 送った件数)"""
+        offset_path = path + ".offset"
+        sent = 0
+        with open(path, "rb") as f:
+            f.seek(_read_offset(offset_path))
+            while True:
+                batch = []
+                while len(batch) < self.batch_size:
+                    line = f.readline()
+                    if not line:
+                        break
+                    if not line.strip():
+                        continue
+                    try:
+                        batch.append(json.loads(line))
+                    except ValueError:
+                        # 書き込み中に落ちた行など
+                        logger.warning(f"[SINK:{self.name}] スプールの壊れた行を読み飛ばしました")
+                if not batch:
+                    break
+                try:
+                    self.send_batch(batch)
+                except Exception as e:
+                    self._on_failure(e)
+                    return False, sent
+                self.sent += len(batch)
+                sent += len(batch)
+                _write_offset(offset_path, f.tell())
+        # 断片を先に消す（間で落ちて位置の記録だけ残っても、次の断片を作るときに消している）
+        _remove_quietly(path)
+        _remove_quietly(offset_path)
+        return True, sent
+
+
+def _read_offset(path):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return int(f.read().strip() or 0)
+    except (OSError, ValueError):
+        return 0
+
+
+def _write_offset(path, offset):
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(str(offset))
+    os.replace(tmp, path)
+
+
+def _remove_quietly(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+class JsonlFileSink(ResultSink):
+    def __init__(self, name, path, max_bytes=10 * 1024 * 1024, backup_count=5, **kwargs):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        super().__init__(name, **kwargs)
+
+    def send_batch(self, records):
+        with open(self.path, "a", encoding="utf-8") as f:
+            for r in records:
+                f.write(json.dumps(r, ensure_ascii=False) + "\n")
+            size = f.tell()
+        if self.max_bytes and size >= self.max_bytes:
+            self._rotate()
+
+    def _rotate(self):
+        for i in range(self.backup_count - 1, 0, -1):
+            src = f"{self.path}.{i}"
+            if os.path.exists(src):
+                os.replace(src, f"{self.path}.{i + 1}")
+        if self.backup_count > 0:
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+
+
+class UnixSocketSink(ResultSink):
+    def __init__(self, name, path, timeout=5.0, **kwargs):
+        self.path = path
+        self.timeout = timeout
+        self._sock = None
+        super().__init__(name, **kwargs)
+
+    def send_batch(self, records):
+        if self._sock is None:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(self.timeout)
+            sock.connect(self.path)
+            self._sock = sock
+        data = "".join(json.dumps(r, ensure_ascii=False) + "\n" for r in records)
+        self._sock.sendall(data.encode("utf-8"))
+
+    def close_transport(self):
+        if self._sock is not None:
+            try:
+                self._sock.close()
+            except OSError:
+                pass
+            self._sock = None
+
+
+class WebhookSink(ResultSink):
+    def __init__(self, name, url, timeout=5.0, headers=None, **kwargs):
+        self.url = url
+        self.timeout = timeout
+        self._session = requests.Session()
+        if headers:
+            self._session.headers.update(headers)
+        super().__init__(name, **kwargs)
+
+    def send_batch(self, records):
+        resp = self._session.post(self.url, json=records, timeout=self.timeout)
+        resp.raise_for_status()
+
+    def close_transport(self):
+        # 接続を張り直すだけでSession自体は使い続ける
+        self._session.close()
+
+
+_SINK_TYPES = {
+    "jsonl": JsonlFileSink,
+    "unix": UnixSocketSink,
+    "webhook": WebhookSink,
+}
+
+
+class SinkManager:
+    def __init__(self, sinks=None):
+        self.sinks = list(sinks or [])
+
+    @classmethod
+    def from_config(cls, entries=RESULT_SINKS):
+        """
+        entries: [{"type": "jsonl"|"unix"|"webhook", "name": str, ...各シンクの引数}]
+        """
+        sinks = []
+        for i, entry in enumerate(entries):
+            entry = dict(entry)
+            sink_type = entry.pop("type")
+            name = entry.pop("name", f"{sink_type}{i}")
+            sink_cls = _SINK_TYPES.get(sink_type)
+            if sink_cls is None:
+                logger.error(f"未知のシンク種別: {sink_type}")
+                continue
+            try:
+                sinks.append(sink_cls(name, **entry))
+            except Exception as e:
+                logger.error(f"シンク {name} の初期化に失敗: {e}")
+        return cls(sinks)
+
+    def publish(self, record):
+        for sink in self.sinks:
+            sink.submit(record)
+
+    def close(self):
+        for sink in self.sinks:
+            sink.close()
@@ -0,0 +1,138 @@
+"""
+合成映像カメラ（負荷試験用）。移動・回転するQRコードを描いたフレームを指定の解像度/fpsで生成する。
+"""
+import math
+import time
+import zlib
+
+import cv2
+import numpy as np
+
+from .camera_base import CameraBase
+from config.settings import DEFAULT_FPS
+from .logger import get_logger
+
+logger = get_logger()
+
+
+class SyntheticCamera(CameraBase):
+    """
+    任意のconfigキー:
+      - resolution: (w, h)  # 既定 (1280, 720)
+      - fps: int  # 0なら待機せず最大速度で生成
+      - codes: int  # 画面内のコード数（既定 1）
+      - code_size: int  # コード1辺の画素数（既定 160）
+      - speed: float  # 移動速度 px/秒（既定 120）
+      - rotate: float  # 回転速度 度/秒（既定 30）
+      - payload_interval: float  # この秒数ごとに内容を変える（重複排除で履歴書き込みが止まらないように）
+      - frames: int  # 生成するフレーム数（0/未指定なら無制限）
+    """
+
+    def __init__(self, camera_id, config):
+        super().__init__(camera_id, config)
+        self.end_of_stream = False
+        self._encoder = None
+        self._background = None
+        self._patches = {}  # payload -> コード画像
+        self._count = 0
+        self._interval = 0.0
+        self._next_t = 0.0
+        self._t0 = 0.0
+
+    def connect(self):
+        w, h = self.config.get("resolution", (1280, 720))
+        fps = float(self.config.get("fps", DEFAULT_FPS))
+        self._size = (int(w), int(h))
+        self._interval = 1.0 / fps if fps > 0 else 0.0
+        self._encoder = cv2.QRCodeEncoder.create()
+
+        # ノイズ入りの背景は1回だけ作る（hash() は実行ごとに変わるため、基準と同じ背景になるよう crc32 で固定）
+        rng = np.random.default_rng(zlib.crc32(str(self.camera_id).encode("utf-8")))
+        noise = rng.integers(90, 170, size=(self._size[1] // 8 + 1, self._size[0] // 8 + 1), dtype=np.uint8)
+        bg = cv2.resize(noise, self._size, interpolation=cv2.INTER_LINEAR)
+        self._background = cv2.cvtColor(bg, cv2.COLOR_GRAY2BGR)
+
+        self._patches.clear()
+        self._count = 0
+        self._t0 = self._next_t = time.perf_counter()
+        self.end_of_stream = False
+        self.is_running = True
+        logger.info(f"[SIM:{self.camera_id}] 合成映像 {self._size[0]}x{self._size[1]} "
+                    f"{fps:.0f}fps コード{self.config.get('codes', 1)}個")
+        return True
+
+    def disconnect(self):
+        self.is_running = False
+
+    def capture_frame(self):
+        if not self.is_running:
+            return None
+        limit = int(self.config.get("frames", 0) or 0)
+        if limit and self._count >= limit:
+            self.end_of_stream = True
+            self.is_running = False
+            return None
+
+        self._wait_pace()
+        self._count += 1
+        return self._render(time.perf_counter() - self._t0)
+
+    # ---- 内部メソッド ------------------------------------------------------
+
+    def _wait_pace(self):
+        if self._interval <= 0:
+            return
+        now = time.perf_counter()
+        if self._next_t > now:
+            time.sleep(self._next_t - now)
+            self._next_t += self._interval
+        else:
+            self._next_t = now + self._interval
+
+    def _patch(self, payload):
+        patch = self._patches.get(payload)
+        if patch is None:
+            size = int(self.config.get("code_size", 160))
+            qr = self._encoder.encode(payload)
+            qr = cv2.resize(qr, (size, size), interpolation=cv2.INTER_NEAREST)
+            # 余白（クワイエットゾーン）を付けて回転時に欠けないよう対角線の大きさにする
+            side = int(size * 1.5)
+            pad = (side - size) // 2
+            patch = cv2.copyMakeBorder(qr, pad, side - size - pad, pad, side - size - pad,
+                                       cv2.BORDER_CONSTANT, value=255)
+            if len(self._patches) > 64:
+                self._patches.clear()
+            self._patches[payload] = patch
+        return patch
+
+    def _render(self, t):
+        frame = self._background.copy()
+        w, h = self._size
+        n = max(1, int(self.config.get("codes", 1)))
+        speed = float(self.config.get("speed", 120.0))
+        rotate = float(self.config.get("rotate", 30.0))
+        period = float(self.config.get("payload_interval", 2.0))
+        epoch = int(t / period) if period > 0 else 0
+
+        for i in range(n):
+            patch = self._patch(f"SIM-{self.camera_id}-{i}-{epoch:06d}")
+            side = patch.shape[0]
+            if side >= w or side >= h:
+                continue
+            # 画面内を往復する軌跡（コード毎に位相をずらす）
+            span_x, span_y = w - side, h - side
+            x = int(_bounce(speed * t + i * span_x / n, span_x))
+            y = int(_bounce(speed * 0.6 * t + i * span_y / n, span_y))
+            angle = (rotate * t + i * 37.0) % 360.0
+            m = cv2.getRotationMatrix2D((side / 2, side / 2), angle, 1.0)
+            rotated = cv2.warpAffine(patch, m, (side, side), flags=cv2.INTER_LINEAR, borderValue=255)
+            frame[y:y + side, x:x + side] = rotated[:, :, None]
+        return frame
+
+
+def _bounce(pos, span):
+    """0..span を往復する位置"""
+    if span <= 0:
+        return 0
+    pos = math.fmod(pos, 2 * span)
+    return pos if pos <= span else 2 * span - pos
@@ -3,10 +3,33 @@
 """
 import cv2
 from .camera_base import CameraBase
+from .logger import get_logger
+
+logger = get_logger()
+
+# 対応する生フレームの形式 -> 1画素あたりのバイト数
+_RAW_FORMATS = {
+    "YUYV": 2.0,
+    "NV12": 1.5,
+}
+
+
+def _fourcc_str(value):
+    v = int(value)
+    return "".join(chr((v >> (8 * i)) & 0xFF) for i in range(4))
+
 
 class USBCamera(CameraBase):
+    """
+    任意のconfigキー:
+      - resolution: (w, h)
+      - fps: int
+      - raw_luma: bool  # V4L2でYUYV/NV12を変換せずに受け取り、デコードには輝度面をそのまま使う
+    """
+
     def connect(self):
         self.cap = cv2.VideoCapture(self.camera_id)
+        self._raw_format = None
         # 解像度設定（可能なら）
         if "resolution" in self.config:
             w, h = self.config["resolution"]
@@ -15,6 +38,8 @@ class USBCamera(CameraBase):
         if "fps" in self.config:
             self.cap.set(cv2.CAP_PROP_FPS, self.config["fps"])
         ok = self.cap.isOpened()
+        if ok and self.config.get("raw_luma"):
+            self._enable_raw_luma()
         self.is_running = ok
         return ok
 
@@ -27,5 +52,43 @@ class USBCamera(CameraBase):
     def capture_frame(self):
         if not getattr(self, "cap", None):
             return None
-        ret, frame = self.cap.read()
-        return frame if ret else None
+        if not self.grab_frame():
+            return None
+        return self.retrieve_frame(color=True)
+
+    def grab_frame(self):
+        if not getattr(self, "cap", None):
+            return False
+        return self.cap.grab()
+
+    def retrieve_frame(self, color=True):
+        ret, frame = self.cap.retrieve()
+        if not ret or frame is None:
+            return None
+        if self._raw_format is None:
+            return frame if color else cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+
+        # 生フレーム（1次元のバイト列で返るバックエンドもあるため寸法を付け直す）
+        w, h = self._frame_size
+        if self._raw_format == "YUYV":
+            packed = frame.reshape(h, w, 2)
+            return cv2.cvtColor(packed, cv2.COLOR_YUV2BGR_YUYV) if color else packed[:, :, 0]
+        planes = frame.reshape(h * 3 // 2, w)  # NV12: 輝度面 h 行の後に色差面
+        return cv2.cvtColor(planes, cv2.COLOR_YUV2BGR_NV12) if color else planes[:h]
+
+    def _enable_raw_luma(self):
+        """生フォーマットでの受け取りを試し、使えなければ通常のBGR取得に戻す"""
+        self.cap.set(cv2.CAP_PROP_CONVERT_RGB, 0)
+        fmt = _fourcc_str(self.cap.get(cv2.CAP_PROP_FOURCC))
+        w = int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+        h = int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        if fmt in _RAW_FORMATS and self.cap.grab():
+            ret, frame = self.cap.retrieve()
+            bpp = _RAW_FORMATS[fmt]
+            if ret and frame is not None and frame.size == int(w * h * bpp):
+                self._raw_format = fmt
+                self._frame_size = (w, h)
+                logger.info(f"[USB:{self.camera_id}] 生フレーム({fmt})の輝度面を直接使用します")
+                return
+        self.cap.set(cv2.CAP_PROP_CONVERT_RGB, 1)
+        logger.warning(f"[USB:{self.camera_id}] 生フレーム取得に未対応のためBGRで取得します（形式: {fmt!r}）")
@@ -1,7 +1,9 @@
 from PyQt5.QtWidgets import (
-    QDialog, QVBoxLayout, QHBoxLayout, QLabel, QLineEdit, QComboBox, QPushButton, QFormLayout, QMessageBox
+    QDialog, QVBoxLayout, QHBoxLayout, QLabel, QLineEdit, QComboBox, QPushButton, QFormLayout, QMessageBox,
+    QCheckBox, QDoubleSpinBox
 )
 from core.onvif_camera import ONVIFCamera
+from config.settings import FFMPEG_CAPTURE_PROFILES, DEFAULT_CAPTURE_PROFILE, SNAPSHOT_INTERVAL_SEC
 
 class CameraConfigDialog(QDialog):
     def __init__(self, parent=None):
@@ -10,7 +12,7 @@ class CameraConfigDialog(QDialog):
         self.setMinimumWidth(400)
 
         self.type_combo = QComboBox()
-        self.type_combo.addItems(["usb", "onvif"])
+        self.type_combo.addItems(["usb", "onvif", "file"])
         self.type_combo.currentTextChanged.connect(self.update_fields)
 
         self.id_input = QLineEdit()
@@ -23,6 +25,28 @@ class CameraConfigDialog(QDialog):
         self.pass_input = QLineEdit()
         self.rtsp_input = QLineEdit()
 
+        self.capture_profile_combo = QComboBox()
+        self.capture_profile_combo.addItems(list(FFMPEG_CAPTURE_PROFILES.keys()))
+        self.capture_profile_combo.setCurrentText(DEFAULT_CAPTURE_PROFILE)
+        self.stream_combo = QComboBox()
+        self.stream_combo.addItems(["main", "sub"])
+        self.capture_mode_combo = QComboBox()
+        self.capture_mode_combo.addItem("RTSP（連続）", "rtsp")
+        self.capture_mode_combo.addItem("スナップショット（定期取得）", "snapshot")
+        self.capture_mode_combo.addItem("デュアル（サブで検出・メインでデコード）", "dual")
+        self.snapshot_interval = QDoubleSpinBox()
+        self.snapshot_interval.setRange(0.1, 60.0)
+        self.snapshot_interval.setSingleStep(0.5)
+        self.snapshot_interval.setValue(SNAPSHOT_INTERVAL_SEC)
+        self.escalate_check = QCheckBox("コード検出中はRTSPに切り替える")
+        self.escalate_check.setChecked(True)
+
+        self.file_path_input = QLineEdit()
+        self.pace_combo = QComboBox()
+        self.pace_combo.addItems(["realtime", "fast"])
+        self.loop_check = QCheckBox("終端で先頭に戻る")
+        self.loop_check.setChecked(True)
+
         self.profile_combo = QComboBox()
         self.profile_combo.setEnabled(False)
         self.profile_btn = QPushButton("プロファイル取得")
@@ -39,8 +63,16 @@ class CameraConfigDialog(QDialog):
         form.addRow("ユーザー名", self.user_input)
         form.addRow("パスワード", self.pass_input)
         form.addRow("RTSP URL", self.rtsp_input)
+        form.addRow("キャプチャプロファイル", self.capture_profile_combo)
+        form.addRow("ストリーム (main/sub)", self.stream_combo)
+        form.addRow("取得方式", self.capture_mode_combo)
+        form.addRow("スナップショット間隔（秒）", self.snapshot_interval)
+        form.addRow("", self.escalate_check)
         form.addRow("ONVIFプロファイル", self.profile_combo)
         form.addRow("", self.profile_btn)
+        form.addRow("ファイル/ディレクトリ/glob", self.file_path_input)
+        form.addRow("再生ペース", self.pace_combo)
+        form.addRow("", self.loop_check)
 
         btn_layout = QHBoxLayout()
         ok_btn = QPushButton("OK")
@@ -59,8 +91,13 @@ class CameraConfigDialog(QDialog):
 
     def update_fields(self, cam_type):
         is_onvif = (cam_type == "onvif")
-        for w in [self.ip_input, self.port_input, self.user_input, self.pass_input, self.rtsp_input, self.profile_combo, self.profile_btn]:
+        for w in [self.ip_input, self.port_input, self.user_input, self.pass_input, self.rtsp_input, self.profile_combo, self.profile_btn,
+                  self.capture_profile_combo, self.stream_combo, self.capture_mode_combo,
+                  self.snapshot_interval, self.escalate_check]:
             w.setEnabled(is_onvif)
+        is_file = (cam_type == "file")
+        for w in [self.file_path_input, self.pace_combo, self.loop_check]:
+            w.setEnabled(is_file)
 
     def fetch_profiles(self):
         ip = self.ip_input.text().strip()
@@ -92,8 +129,10 @@ class CameraConfigDialog(QDialog):
 
         config = {
             "resolution": (w, h),
-            "fps": int(self.fps_input.text() or 30)
         }
+        # 動画ファイルは未指定ならファイル自体のFPSで再生するため、触っていない既定値は書かない
+        if cam_type != "file" or self.fps_input.isModified():
+            config["fps"] = int(self.fps_input.text() or 30)
 
         if cam_type == "onvif":
             config.update({
@@ -102,7 +141,22 @@ class CameraConfigDialog(QDialog):
                 "username": self.user_input.text().strip(),
                 "password": self.pass_input.text().strip(),
                 "rtsp_url": self.rtsp_input.text().strip(),
-                "profile_token": self.profile_combo.currentData()
+                "profile_token": self.profile_combo.currentData(),
+                "capture_profile": self.capture_profile_combo.currentText(),
+                "stream": self.stream_combo.currentText(),
+                "capture_mode": self.capture_mode_combo.currentData(),
+                "snapshot_interval": self.snapshot_interval.value(),
+                "escalate": self.escalate_check.isChecked(),
+            })
+
+        if cam_type == "file":
+            path = self.file_path_input.text().strip()
+            if not path:
+                return None
+            config.update({
+                "path": path,
+                "pace": self.pace_combo.currentText(),
+                "loop": self.loop_check.isChecked(),
             })
 
         return {
@@ -0,0 +1,74 @@
+import threading
+import time
+
+from PyQt5.QtCore import QThread, pyqtSignal
+
+from core.logger import get_logger
+
+logger = get_logger()
+
+
+class FrameReceiver(QThread):
+    """
+    ワーカーの出力を待ち受けるGUIプロセス内のスレッド。
+    ProcessManager.wait_frames() でブロックし、届いたものをシグナルでGUIスレッドへ渡す。
+
+      event_received(tuple)     : ("ERROR"|"STATUS"|"PROFILE"|"EOS"|"READY"|"SITE_READY"|"PTZ_ACK", ...) をそのまま
+      results_received(cam_id, cam_type, results)
+                                : 結果付きフレームは間引かずに毎回（履歴記録用）
+      frame_ready(cam_id)       : 表示待ちフレームがある。take_frame() で最新の1枚を取り出す
+
+    表示用フレームはカメラ毎に最新の1枚だけ保持し、GUIが取り出す前に届いた分は上書きする
+    （1回の描画周期でカメラ毎に描くのは最大1枚）。
+    """
+
+    event_received = pyqtSignal(object)
+    results_received = pyqtSignal(object, str, object)
+    frame_ready = pyqtSignal(object)
+
+    def __init__(self, pm, parent=None):
+        super().__init__(parent)
+        self.pm = pm
+        self._running = True
+        self._lock = threading.Lock()
+        self._pending = {}  # cam_id -> (frame, 描画する結果, meta)
+        self._overlay = {}  # cam_id -> 最後にデコードしたフレームの結果
+
+    def run(self):
+        while self._running:
+            try:
+                frames = self.pm.wait_frames(timeout=0.5)
+            except Exception as e:
+                logger.error(f"フレーム受信エラー: {e}")
+                time.sleep(0.1)
+                continue
+            for data in frames:
+                if data and data[0] in ("ERROR", "STATUS", "PROFILE", "EOS", "READY", "SITE_READY", "PTZ_ACK"):
+                    self.event_received.emit(data)
+                    continue
+
+                cam_id, cam_type, frame, results, meta = data
+                self.pm.metrics.observe_local(cam_id, "queue_transit", (time.time() - meta["sent_at"]) * 1000.0)
+                if results:
+                    self.results_received.emit(cam_id, cam_type, results)
+                with self._lock:
+                    if meta.get("decoded", True):
+                        self._overlay[cam_id] = results
+                    if frame is None:
+                        # 表示間引きで画像なし（結果は上で通知済み）
+                        continue
+                    # デコードしなかったフレームにも直前のデコード結果の枠を描く
+                    prev = self._pending.get(cam_id)
+                    self._pending[cam_id] = (frame, self._overlay.get(cam_id, results), meta)
+                if prev is None:
+                    self.frame_ready.emit(cam_id)
+
+    def take_frame(self, cam_id):
+        """最新の表示待ちフレーム (frame, 描画する結果, meta) を取り出す。なければ None"""
+        with self._lock:
+            return self._pending.pop(cam_id, None)
+
+    def stop(self, timeout_ms=2000):
+        self._running = False
+        self.pm.wakeup()
+        self.wait(timeout_ms)
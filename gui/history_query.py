@@ -0,0 +1,88 @@
+import sqlite3
+import threading
+import time
+
+from PyQt5.QtCore import QThread, pyqtSignal
+
+from core.logger import get_logger
+
+logger = get_logger()
+
+
+class HistoryQueryWorker(QThread):
+    """
+    履歴検索を実行するスレッド。読み取り専用の接続を1本持ち、submit() された条件で検索する。
+    実行中に新しい条件が submit() されたら実行中の検索は interrupt() で打ち切り、最新の条件だけを実行する。
+
+      results_ready(seq, rows, elapsed_ms) : 最新の依頼の結果（打ち切った依頼の結果は通知しない）
+      failed(seq, message)
+    """
+
+    results_ready = pyqtSignal(int, object, float)
+    failed = pyqtSignal(int, str)
+
+    def __init__(self, store, parent=None):
+        super().__init__(parent)
+        self.store = store
+        self._cond = threading.Condition()
+        self._pending = None  # (seq, filters)
+        self._seq = 0
+        self._running = True
+        self._conn = None
+        self._busy = False
+
+    def submit(self, **filters):
+        """検索を依頼して依頼番号を返す。古い依頼は破棄/中断する"""
+        with self._cond:
+            self._seq += 1
+            self._pending = (self._seq, filters)
+            if self._busy and self._conn is not None:
+                self._conn.interrupt()
+            self._cond.notify()
+            return self._seq
+
+    def stop(self, timeout_ms=2000):
+        with self._cond:
+            self._running = False
+            if self._busy and self._conn is not None:
+                self._conn.interrupt()
+            self._cond.notify()
+        self.wait(timeout_ms)
+
+    def run(self):
+        try:
+            while True:
+                with self._cond:
+                    while self._running and self._pending is None:
+                        self._cond.wait()
+                    if not self._running:
+                        return
+                    seq, filters = self._pending
+                    self._pending = None
+                    self._busy = True
+                self._execute(seq, filters)
+        finally:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def _execute(self, seq, filters):
+        t0 = time.perf_counter()
+        try:
+            if self._conn is None:
+                self._conn = self.store.open_reader()
+            rows = self.store.query(conn=self._conn, **filters)
+            error = None
+        except sqlite3.Error as e:
+            rows, error = None, str(e)
+        finally:
+            with self._cond:
+                self._busy = False
+                superseded = seq != self._seq
+        if superseded:
+            return
+        if error is not None:
+            logger.warning(f"履歴検索に失敗しました: {error}")
+            self.failed.emit(seq, error)
+            return
+        self.results_ready.emit(seq, rows, (time.perf_counter() - t0) * 1000.0)
@@ -2,13 +2,34 @@ from PyQt5.QtWidgets import (
     QDialog, QVBoxLayout, QHBoxLayout, QLabel, QLineEdit, QPushButton, QTableWidget,
     QTableWidgetItem, QFileDialog, QFormLayout, QSpinBox
 )
+from PyQt5.QtCore import QTimer
+
+from gui.history_query import HistoryQueryWorker
 
 class HistoryWindow(QDialog):
+    """
+    履歴の検索画面（モードレス）。検索は HistoryQueryWorker のスレッドで行い、
+    検索中もメイン画面の映像更新は止まらない。条件を変えると少し待ってから自動で検索し直す。
+    """
+
+    # 入力中に毎キー検索しないための待ち時間
+    SEARCH_DELAY_MS = 300
+
     def __init__(self, store, parent=None):
         super().__init__(parent)
         self.setWindowTitle("QR読み取り履歴")
         self.setMinimumSize(800, 500)
+        self.setModal(False)
         self.store = store
+        self._seq = 0
+
+        self.worker = HistoryQueryWorker(store, self)
+        self.worker.results_ready.connect(self._on_results)
+        self.worker.failed.connect(self._on_failed)
+        self.worker.start()
+        self._search_timer = QTimer(self)
+        self._search_timer.setSingleShot(True)
+        self._search_timer.timeout.connect(self.refresh)
 
         # フィルタ
         self.ts_from = QLineEdit()
@@ -29,12 +50,16 @@ class HistoryWindow(QDialog):
         self.search_btn = QPushButton("検索")
         self.export_btn = QPushButton("CSVエクスポート")
 
+        self.status_label = QLabel("")
+
         btns = QHBoxLayout()
         btns.addWidget(self.search_btn)
         btns.addWidget(self.export_btn)
+        btns.addWidget(self.status_label)
+        btns.addStretch()
 
-        self.table = QTableWidget(0, 4)
-        self.table.setHorizontalHeaderLabels(["時刻", "カメラID", "種別", "内容"])
+        self.table = QTableWidget(0, 5)
+        self.table.setHorizontalHeaderLabels(["時刻", "カメラID", "種別", "内容", "照合"])
         self.table.horizontalHeader().setStretchLastSection(True)
 
         layout = QVBoxLayout()
@@ -45,23 +70,47 @@ class HistoryWindow(QDialog):
 
         self.search_btn.clicked.connect(self.refresh)
         self.export_btn.clicked.connect(self.export_csv)
+        for edit in (self.ts_from, self.ts_to, self.cam_id, self.keyword):
+            edit.textChanged.connect(self._schedule_refresh)
+        self.limit.valueChanged.connect(self._schedule_refresh)
 
         self.refresh()
 
+    def _schedule_refresh(self, *_):
+        self._search_timer.start(self.SEARCH_DELAY_MS)
+
     def refresh(self):
-        rows = self.store.query(
+        """検索を依頼する（結果は _on_results で反映。実行中の古い検索は中断される）"""
+        self._search_timer.stop()
+        self._seq = self.worker.submit(
             ts_from=self.ts_from.text().strip() or None,
             ts_to=self.ts_to.text().strip() or None,
             camera_id=self.cam_id.text().strip() or None,
             keyword=self.keyword.text().strip() or None,
             limit=self.limit.value()
         )
-        self.table.setRowCount(0)
-        for r in rows:
-            row = self.table.rowCount()
-            self.table.insertRow(row)
+        self.status_label.setText("検索中...")
+
+    def _on_results(self, seq, rows, elapsed_ms):
+        if seq != self._seq:
+            return
+        self.table.setUpdatesEnabled(False)
+        self.table.setRowCount(len(rows))
+        for row, r in enumerate(rows):
             for col, val in enumerate(r):
-                self.table.setItem(row, col, QTableWidgetItem(str(val)))
+                self.table.setItem(row, col, QTableWidgetItem("" if val is None else str(val)))
+        self.table.setUpdatesEnabled(True)
+        self.status_label.setText(f"{len(rows)} 件（{elapsed_ms:.0f} ms）")
+
+    def _on_failed(self, seq, message):
+        if seq == self._seq:
+            self.status_label.setText(f"検索に失敗しました: {message}")
+
+    def done(self, result):
+        # ×ボタン・Escのどちらで閉じてもここを通る
+        self._search_timer.stop()
+        self.worker.stop()
+        super().done(result)
 
     def export_csv(self):
         rows = []
@@ -71,6 +120,7 @@ class HistoryWindow(QDialog):
                 self.table.item(row, 1).text(),
                 self.table.item(row, 2).text(),
                 self.table.item(row, 3).text(),
+                self.table.item(row, 4).text(),
             ])
         path, _ = QFileDialog.getSaveFileName(self, "CSVとして保存", "data/exports/qr_history.csv", "CSV (*.csv)")
         if path:
@@ -0,0 +1,102 @@
+from collections import deque
+
+from PyQt5.QtCore import QTimer
+from PyQt5.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QPlainTextEdit, QComboBox, QLabel
+
+from config.settings import LOG_VIEW_MAX_LINES
+
+# (表示名, 表示するレベル)
+LEVEL_FILTERS = [
+    ("すべて", None),
+    ("読み取りのみ", {"CODE"}),
+    ("WARN以上", {"WARN", "ERROR"}),
+    ("ERRORのみ", {"ERROR"}),
+]
+
+
+def _infer_level(text):
+    if text.startswith("[ERROR]"):
+        return "ERROR"
+    if text.startswith("[WARN]"):
+        return "WARN"
+    return "INFO"
+
+
+class LogView(QWidget):
+    """
+    上限行数付きのログ表示。append() は溜めるだけで、flush() でまとめて描画する。
+    （1行ごとに QTextEdit.append すると行数が増えるほど再レイアウトが重くなるため）
+    flush() を明示的に呼ばなくても、append() から FLUSH_INTERVAL_MS 後に自動で反映される。
+    """
+
+    FLUSH_INTERVAL_MS = 100
+
+    def __init__(self, max_lines=LOG_VIEW_MAX_LINES, parent=None):
+        super().__init__(parent)
+        self.entries = deque(maxlen=max_lines)  # (level, cam_id, text)
+        self._pending = []
+        self._cameras = set()
+        self._flush_timer = QTimer(self)
+        self._flush_timer.setSingleShot(True)
+        self._flush_timer.timeout.connect(self.flush)
+
+        self.view = QPlainTextEdit()
+        self.view.setReadOnly(True)
+        self.view.setMaximumBlockCount(max_lines)
+
+        self.cam_filter = QComboBox()
+        self.cam_filter.addItem("全カメラ", None)
+        self.level_filter = QComboBox()
+        for name, levels in LEVEL_FILTERS:
+            self.level_filter.addItem(name, levels)
+        self.cam_filter.currentIndexChanged.connect(self._refilter)
+        self.level_filter.currentIndexChanged.connect(self._refilter)
+
+        bar = QHBoxLayout()
+        bar.addWidget(QLabel("カメラ"))
+        bar.addWidget(self.cam_filter)
+        bar.addWidget(QLabel("種別"))
+        bar.addWidget(self.level_filter)
+        bar.addStretch()
+
+        layout = QVBoxLayout()
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.addLayout(bar)
+        layout.addWidget(self.view)
+        self.setLayout(layout)
+
+    def append(self, text, level=None, cam_id=None):
+        """level: "INFO" / "WARN" / "ERROR" / "CODE"（省略時は先頭の [ERROR] 等から判定）"""
+        self._pending.append((level or _infer_level(text), cam_id, text))
+        if not self._flush_timer.isActive():
+            self._flush_timer.start(self.FLUSH_INTERVAL_MS)
+
+    def flush(self):
+        """溜まった行をまとめて追加する（GUIの描画周期ごとに1回呼ぶ）"""
+        if not self._pending:
+            return
+        pending, self._pending = self._pending, []
+        self.entries.extend(pending)
+
+        for _, cam_id, _ in pending:
+            if cam_id is not None and cam_id not in self._cameras:
+                self._cameras.add(cam_id)
+                self.cam_filter.addItem(str(cam_id), cam_id)
+
+        lines = [text for entry in pending if self._match(entry) for text in (entry[2],)]
+        if lines:
+            self.view.appendPlainText("\n".join(lines))
+
+    def _match(self, entry):
+        level, cam_id, _ = entry
+        cam = self.cam_filter.currentData()
+        levels = self.level_filter.currentData()
+        if cam is not None and cam_id != cam:
+            return False
+        if levels is not None and level not in levels:
+            return False
+        return True
+
+    def _refilter(self):
+        self.view.setPlainText("\n".join(e[2] for e in self.entries if self._match(e)))
+        self.view.verticalScrollBar().setValue(self.view.verticalScrollBar().maximum())
@@ -1,21 +1,38 @@
 from PyQt5.QtWidgets import (
-    QMainWindow, QWidget, QVBoxLayout, QLabel, QPushButton, QTextEdit, QHBoxLayout,
+    QMainWindow, QWidget, QVBoxLayout, QLabel, QPushButton, QHBoxLayout,
     QLineEdit, QComboBox, QGroupBox, QFormLayout, QSpinBox
 )
 from PyQt5.QtGui import QImage, QPixmap
-from PyQt5.QtCore import QTimer, Qt
+from PyQt5.QtCore import Qt
 import cv2
 import numpy as np
+import threading
 import time
 
 from core.process_manager import ProcessManager
 from core.logger import get_logger
-from core.history_store import HistoryStore, now_iso
+from core.history_store import HistoryStore
+from core.code_recorder import CodeRecorder
+from core.code_matcher import CodeMatcher
+from core.result_sinks import SinkManager
+from core.metrics_server import MetricsServer
+from core.headless import load_camera_infos
+from config.settings import METRICS_ENABLED, METRICS_HOST, METRICS_PORT
 from gui.camera_config_dialog import CameraConfigDialog
 from gui.history_window import HistoryWindow
+from gui.metrics_panel import MetricsPanel
+from gui.log_view import LogView
+from gui.frame_receiver import FrameReceiver
 
 logger = get_logger()
 
+# 照合結果ごとの枠の色（BGR）。照合なしは従来どおり緑
+MATCH_COLORS = {
+    "matched": (0, 255, 0),
+    "duplicate": (0, 165, 255),
+    "unknown": (0, 0, 255),
+}
+
 class MainWindow(QMainWindow):
     def __init__(self):
         super().__init__()
@@ -24,12 +41,19 @@ class MainWindow(QMainWindow):
 
         self.pm = ProcessManager()
         self.video_labels = {}
+        self.history_window = None
         self.history = HistoryStore()
+        self.sinks = SinkManager.from_config()
+        self.matcher = CodeMatcher()
+        self.matcher.start_watcher()
+        self.recorder = CodeRecorder(self.history, expire_sec=15, sinks=self.sinks, matcher=self.matcher)
 
         # 上部操作バー
         self.add_btn = QPushButton("カメラ追加")
+        self.bulk_btn = QPushButton("設定から一括起動")
         self.stop_btn = QPushButton("全カメラ停止")
         self.history_btn = QPushButton("履歴を開く")
+        self.manifest_btn = QPushButton("照合リスト再読込")
 
         # 読み取り対象選択UI
         self.decode_mode_combo = QComboBox()
@@ -39,8 +63,10 @@ class MainWindow(QMainWindow):
 
         top_layout = QHBoxLayout()
         top_layout.addWidget(self.add_btn)
+        top_layout.addWidget(self.bulk_btn)
         top_layout.addWidget(self.stop_btn)
         top_layout.addWidget(self.history_btn)
+        top_layout.addWidget(self.manifest_btn)
         top_layout.addWidget(self.decode_mode_combo)
         top_bar = QWidget()
         top_bar.setLayout(top_layout)
@@ -69,6 +95,8 @@ class MainWindow(QMainWindow):
         grid = QFormLayout()
         grid.addRow("対象カメラ", self.ptz_cam_select)
         grid.addRow("スピード(%)", self.ptz_speed)
+        self.ptz_status = QLabel("応答: -")
+        grid.addRow("PTZ応答", self.ptz_status)
 
         btn_row1 = QHBoxLayout()
         btn_row1.addWidget(btn_left); btn_row1.addWidget(btn_up); btn_row1.addWidget(btn_right)
@@ -82,29 +110,68 @@ class MainWindow(QMainWindow):
         v_ptz.addLayout(btn_row2)
         ptz_group.setLayout(v_ptz)
 
+        # 診断パネル（プロファイル取得）
+        diag_group = QGroupBox("診断")
+        self.diag_cam_select = QComboBox()
+        self.profile_kind = QComboBox()
+        self.profile_kind.addItems(["cprofile", "sampling"])
+        self.profile_sec = QSpinBox()
+        self.profile_sec.setRange(1, 300)
+        self.profile_sec.setValue(30)
+        self.profile_start_btn = QPushButton("プロファイル開始")
+        self.profile_stop_btn = QPushButton("プロファイル停止")
+        self.mem_start_btn = QPushButton("メモリ追跡開始")
+        self.mem_snap_btn = QPushButton("メモリスナップショット")
+        self.mem_stop_btn = QPushButton("メモリ追跡停止")
+
+        diag_layout = QHBoxLayout()
+        diag_layout.addWidget(QLabel("対象カメラ"))
+        diag_layout.addWidget(self.diag_cam_select)
+        diag_layout.addWidget(self.profile_kind)
+        diag_layout.addWidget(QLabel("秒数"))
+        diag_layout.addWidget(self.profile_sec)
+        diag_layout.addWidget(self.profile_start_btn)
+        diag_layout.addWidget(self.profile_stop_btn)
+        diag_layout.addWidget(self.mem_start_btn)
+        diag_layout.addWidget(self.mem_snap_btn)
+        diag_layout.addWidget(self.mem_stop_btn)
+        diag_group.setLayout(diag_layout)
+
         # ログ
-        self.result_log = QTextEdit()
-        self.result_log.setReadOnly(True)
+        self.result_log = LogView()
+
+        # 計測パネル
+        self.metrics_panel = MetricsPanel(self.pm.metrics)
+        self.metrics_server = None
+        if METRICS_ENABLED:
+            self.metrics_server = MetricsServer(self.pm.metrics, METRICS_HOST, METRICS_PORT, pm=self.pm)
+            self.metrics_server.start()
 
         # レイアウト
         root = QVBoxLayout()
         root.addWidget(top_bar)
         root.addWidget(video_wrap)
         root.addWidget(ptz_group)
+        root.addWidget(diag_group)
+        root.addWidget(self.metrics_panel)
         root.addWidget(self.result_log)
         container = QWidget()
         container.setLayout(root)
         self.setCentralWidget(container)
 
-        # タイマー
-        self.timer = QTimer()
-        self.timer.timeout.connect(self.update_frames)
-        self.timer.start(30)
+        # ワーカー出力の受信（ポーリングせず、届いたときだけシグナルで通知される）
+        self.receiver = FrameReceiver(self.pm, self)
+        self.receiver.event_received.connect(self._on_event)
+        self.receiver.results_received.connect(self._on_results)
+        self.receiver.frame_ready.connect(self._on_frame_ready)
+        self.receiver.start()
 
         # シグナル
         self.add_btn.clicked.connect(self.add_camera)
+        self.bulk_btn.clicked.connect(self.start_from_profiles)
         self.stop_btn.clicked.connect(self.stop_all_cameras)
         self.history_btn.clicked.connect(self.open_history)
+        self.manifest_btn.clicked.connect(self.reload_manifest)
 
         btn_up.clicked.connect(lambda: self._ptz_move(0, +1, 0))
         btn_down.clicked.connect(lambda: self._ptz_move(0, -1, 0))
@@ -113,9 +180,11 @@ class MainWindow(QMainWindow):
         btn_zoomin.clicked.connect(lambda: self._ptz_move(0, 0, +1))
         btn_zoomout.clicked.connect(lambda: self._ptz_move(0, 0, -1))
         btn_stop.clicked.connect(self._ptz_stop)
-
-        self.seen_codes = {}  # {コード文字列: 最終読み取り時刻}
-        self.code_expire_sec = 15
+        self.profile_start_btn.clicked.connect(self._start_profile)
+        self.profile_stop_btn.clicked.connect(self._stop_profile)
+        self.mem_start_btn.clicked.connect(lambda: self._diag_command(self.pm.start_tracemalloc))
+        self.mem_snap_btn.clicked.connect(lambda: self._diag_command(self.pm.tracemalloc_snapshot))
+        self.mem_stop_btn.clicked.connect(lambda: self._diag_command(self.pm.stop_tracemalloc))
 
     def add_camera(self):
         dialog = CameraConfigDialog(self)
@@ -132,16 +201,43 @@ class MainWindow(QMainWindow):
 
             camera_info["decode_mode"] = self.current_decode_mode
             if self.pm.start_camera(camera_info):
-                label = QLabel(f"{camera_info['type'].upper()} Cam {camera_info['id']}")
-                label.setFixedHeight(300)
-                label.setMinimumWidth(480)
-                self.video_labels[camera_info['id']] = label
-                self.video_area.insertWidget(self.video_area.count() - 1, label)
-                self.result_log.append(f"[INFO] {camera_info['type']} カメラ {camera_info['id']} を追加しました")
+                self._add_video_label(camera_info)
+                self.result_log.append(f"[INFO] {camera_info['type']} カメラ {camera_info['id']} を追加しました",
+                                       cam_id=camera_info['id'])
                 self._refresh_ptz_cam_list()
+                self._refresh_diag_cam_list()
             else:
                 self.result_log.append(f"[ERROR] カメラ {camera_info['id']} の起動に失敗しました")
 
+    def start_from_profiles(self):
+        """camera_profiles.json の全カメラを並行して起動する（未起動のものだけ）"""
+        try:
+            infos = load_camera_infos()
+        except Exception as e:
+            self.result_log.append(f"[ERROR] カメラ設定の読み込みに失敗しました: {e}")
+            return
+        infos = [info for info in infos if not self.pm.is_camera_running(info["id"])]
+        if not infos:
+            self.result_log.append("[WARN] 起動するカメラがありません")
+            return
+        for info in infos:
+            info.setdefault("decode_mode", self.current_decode_mode)
+        started = self.pm.start_cameras(infos)
+        for info in infos:
+            if info["id"] in started:
+                self._add_video_label(info)
+                self.video_labels[info["id"]].setText(f"Cam {info['id']}: 接続待ち")
+        self.result_log.append(f"[INFO] {len(started)}/{len(infos)} 台の起動を開始しました")
+        self._refresh_ptz_cam_list()
+        self._refresh_diag_cam_list()
+
+    def _add_video_label(self, camera_info):
+        label = QLabel(f"{camera_info['type'].upper()} Cam {camera_info['id']}")
+        label.setFixedHeight(300)
+        label.setMinimumWidth(480)
+        self.video_labels[camera_info['id']] = label
+        self.video_area.insertWidget(self.video_area.count() - 1, label)
+
     def stop_all_cameras(self):
         self.pm.stop_all()
         for i in reversed(range(self.video_area.count() - 1)):
@@ -154,59 +250,88 @@ class MainWindow(QMainWindow):
             self._refresh_ptz_cam_list()
         except AttributeError:
             self.ptz_cam_select.clear()
+        self._refresh_diag_cam_list()
         self.result_log.append("[INFO] 全カメラを停止しました")
 
-    def update_frames(self):
-        frames = self.pm.get_frames()
-        for data in frames:
-            if isinstance(data, tuple) and data[0] == "ERROR":
-                self.result_log.append(f"[ERROR] {data[1]}")
-                continue
-
-            cam_id, cam_type, frame_bgr, results = data
-            if frame_bgr is None:
-                continue
+    def _on_event(self, data):
+        if data[0] == "ERROR":
+            self.result_log.append(f"[ERROR] {data[1]}")
+        elif data[0] == "STATUS":
+            self.result_log.append(f"[WARN] カメラ {data[1]}: {data[2]}", cam_id=data[1])
+            if data[1] in self.video_labels:
+                self.video_labels[data[1]].setText(f"Cam {data[1]}: {data[2]}")
+        elif data[0] == "PROFILE":
+            self.result_log.append(f"[INFO][PROFILE:{data[1]}] {data[2]}", cam_id=data[1])
+        elif data[0] == "EOS":
+            self.result_log.append(f"[INFO] カメラ {data[1]} の再生が終了しました", cam_id=data[1])
+        elif data[0] == "READY":
+            self.result_log.append(f"[INFO] カメラ {data[1]} 準備完了（{data[2] / 1000:.1f}秒）", cam_id=data[1])
+        elif data[0] == "SITE_READY":
+            info = data[1]
+            if info["timed_out"]:
+                self.result_log.append(
+                    f"[WARN] 起動タイムアウト: {info['ready']}/{info['total']} 台のみ準備完了"
+                    f"（未応答: {', '.join(map(str, info['missing']))}）")
+            else:
+                self.result_log.append(
+                    f"[INFO] サイト準備完了: {info['ready']}/{info['total']} 台（{info['elapsed_ms'] / 1000:.1f}秒）")
+        elif data[0] == "PTZ_ACK":
+            self._on_ptz_ack(data[1], data[2])
+
+    def _on_results(self, cam_id, cam_type, results):
+        # === 履歴/ログは15秒ルールを順守 ===
+        t0 = time.perf_counter()
+        recorded = self.recorder.record(cam_id, cam_type, results)
+        if recorded:
+            self.pm.metrics.observe_local(cam_id, "history_write", (time.perf_counter() - t0) * 1000.0)
+        for ts, res in recorded:
+            match = f" ({res['match']})" if res.get("match") else ""
+            self.result_log.append(f"[{res.get('type','')}][{ts}][{cam_type}:{cam_id}] {res['data']}{match}",
+                                   level="CODE", cam_id=cam_id)
+
+    def _on_frame_ready(self, cam_id):
+        item = self.receiver.take_frame(cam_id)
+        if item is None:
+            return
+        frame_bgr, results, _meta = item
 
+        t0 = time.perf_counter()
+        if frame_bgr.ndim == 2:
+            display = cv2.cvtColor(frame_bgr, cv2.COLOR_GRAY2BGR)
+        else:
             display = frame_bgr.copy()
-            now_t = time.time()
-            ts = now_iso()
-
-            for res in results:
-                code = res["data"] or ""
-                # === 描画は毎回行う（15秒ルールに関わらず） ===
-                # 枠
-                if res.get("polygon"):
-                    pts = np.array(res["polygon"], dtype=np.int32)
-                    cv2.polylines(display, [pts], True, (0, 255, 0), 2)
-                    anchor = (pts[0][0], max(0, pts[0][1] - 10))
-                elif res.get("rect"):
-                    x, y, w, h = res["rect"]
-                    cv2.rectangle(display, (x, y), (x + w, y + h), (0, 255, 0), 2)
-                    anchor = (x, max(0, y - 10))
-                else:
-                    anchor = (10, 30)
-
-                # ラベル
-                label = f"{res.get('type','')}: {code}" if code else f"{res.get('type','')}"
-                cv2.putText(display, label, anchor, cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 0), 2)
-
-                # === 履歴/ログは15秒ルールを順守 ===
-                last = self.seen_codes.get(code, 0)
-                if code and (now_t - last >= self.code_expire_sec):
-                    self.seen_codes[code] = now_t
-                    self.history.add_record(ts, str(cam_id), cam_type, code)
-                    self.result_log.append(f"[{res.get('type','')}][{ts}][{cam_type}:{cam_id}] {code}")
-
-            # 表示（アスペクト比維持）
-            rgb = cv2.cvtColor(display, cv2.COLOR_BGR2RGB)
-            h, w, ch = rgb.shape
-            qimg = QImage(rgb.data, w, h, ch * w, QImage.Format_RGB888)
-            if cam_id in self.video_labels:
-                label = self.video_labels[cam_id]
-                pixmap = QPixmap.fromImage(qimg).scaled(
-                    label.width(), label.height(), Qt.KeepAspectRatio, Qt.SmoothTransformation
-                )
-                label.setPixmap(pixmap)
+
+        for res in results:
+            code = res["data"] or ""
+            color = MATCH_COLORS.get(self.recorder.match_status.get(code), (0, 255, 0))
+            # === 描画は毎回行う（15秒ルールに関わらず） ===
+            # 枠
+            if res.get("polygon"):
+                pts = np.array(res["polygon"], dtype=np.int32)
+                cv2.polylines(display, [pts], True, color, 2)
+                anchor = (pts[0][0], max(0, pts[0][1] - 10))
+            elif res.get("rect"):
+                x, y, w, h = res["rect"]
+                cv2.rectangle(display, (x, y), (x + w, y + h), color, 2)
+                anchor = (x, max(0, y - 10))
+            else:
+                anchor = (10, 30)
+
+            # ラベル
+            label = f"{res.get('type','')}: {code}" if code else f"{res.get('type','')}"
+            cv2.putText(display, label, anchor, cv2.FONT_HERSHEY_SIMPLEX, 0.6, color, 2)
+
+        # 表示（アスペクト比維持）
+        rgb = cv2.cvtColor(display, cv2.COLOR_BGR2RGB)
+        h, w, ch = rgb.shape
+        qimg = QImage(rgb.data, w, h, ch * w, QImage.Format_RGB888)
+        if cam_id in self.video_labels:
+            label = self.video_labels[cam_id]
+            pixmap = QPixmap.fromImage(qimg).scaled(
+                label.width(), label.height(), Qt.KeepAspectRatio, Qt.SmoothTransformation
+            )
+            label.setPixmap(pixmap)
+        self.pm.metrics.observe_local(cam_id, "gui_render", (time.perf_counter() - t0) * 1000.0)
 
     def _on_decode_mode_changed(self, idx):
         text = self.decode_mode_combo.currentText()
@@ -223,7 +348,7 @@ class MainWindow(QMainWindow):
         self.result_log.append(f"[INFO] 読み取りモードを {mode} に変更しました")
 
         # 修正: 全カメラに即時反映
-        for cam_id in list(self.pm.processes.keys()):
+        for cam_id in list(self.pm.camera_infos.keys()):
             self.pm.send_command(cam_id, ("SET_DECODE_MODE", mode))
 
     def _refresh_ptz_cam_list(self):
@@ -231,6 +356,29 @@ class MainWindow(QMainWindow):
         for cid in self.pm.list_onvif_cameras():
             self.ptz_cam_select.addItem(str(cid), cid)
 
+    def _refresh_diag_cam_list(self):
+        self.diag_cam_select.clear()
+        for cid in self.pm.camera_infos.keys():
+            self.diag_cam_select.addItem(str(cid), cid)
+
+    def _start_profile(self):
+        cam_id = self.diag_cam_select.currentData()
+        if cam_id is None:
+            self.result_log.append("[WARN] カメラが選択されていません")
+            return
+        self.pm.start_profile(cam_id, self.profile_kind.currentText(), self.profile_sec.value())
+
+    def _stop_profile(self):
+        cam_id = self.diag_cam_select.currentData()
+        if cam_id is not None:
+            self.pm.stop_profile(cam_id)
+
+    def _diag_command(self, func):
+        """選択中カメラのワーカーへ診断コマンドを送る（結果は PROFILE メッセージでログに出る）"""
+        cam_id = self.diag_cam_select.currentData()
+        if cam_id is not None and not func(cam_id):
+            self.result_log.append(f"[WARN] カメラ {cam_id} は再起動中のため送信できません", cam_id=cam_id)
+
     def _ptz_move(self, x, y, z):
         cam_id = self.ptz_cam_select.currentData()
         if cam_id is None:
@@ -240,27 +388,61 @@ class MainWindow(QMainWindow):
         pan = x * speed
         tilt = y * speed
         zoom = z * speed
-        ok = self.pm.send_command(cam_id, {"cmd": "ptz_move", "pan": pan, "tilt": tilt, "zoom": zoom})
-        if not ok:
-            self.result_log.append("[ERROR] PTZコマンド送信に失敗しました")
+        # 実行はワーカー内で非同期。結果は PTZ_ACK で届く
+        if not self.pm.ptz_move(cam_id, pan, tilt, zoom):
+            self.result_log.append("[ERROR] PTZコマンド送信に失敗しました（カメラ再起動中）", cam_id=cam_id)
 
     def _ptz_stop(self):
         cam_id = self.ptz_cam_select.currentData()
         if cam_id is None:
             return
-        self.pm.send_command(cam_id, {"cmd": "ptz_stop"})
+        if not self.pm.ptz_stop(cam_id):
+            self.result_log.append("[ERROR] PTZ停止の送信に失敗しました（カメラ再起動中）", cam_id=cam_id)
+
+    def _on_ptz_ack(self, cam_id, ack):
+        rtt = f"{ack['rtt_ms']:.0f} ms" if ack.get("rtt_ms") is not None else "-"
+        if not ack["ok"]:
+            self.result_log.append(f"[ERROR] PTZ {ack['cmd']} 失敗 (カメラ {cam_id}): {ack['error']}", cam_id=cam_id)
+            self.ptz_status.setText(f"応答: 失敗 ({rtt})")
+            return
+        if ack["coalesced"]:
+            # 後続の操作にまとめて送らなかったもの（表示は実行したコマンドの応答で更新する）
+            return
+        self.ptz_status.setText(f"応答: {ack['cmd']} {rtt}（SOAP {ack['call_ms']:.0f} ms）")
+
+    def reload_manifest(self):
+        # 大きなリストでもGUIを止めないよう別スレッドで読み込む（結果はログに出る）
+        threading.Thread(target=self.matcher.reload, name="manifest-reload", daemon=True).start()
+        self.result_log.append("[INFO] 照合リストを再読込します")
 
     def open_history(self):
-        dlg = HistoryWindow(self.history, self)
-        dlg.exec_()
+        # モードレスで開く（検索中・表示中もメイン画面の映像は更新し続ける）
+        if self.history_window is None:
+            self.history_window = HistoryWindow(self.history, self)
+            self.history_window.finished.connect(self._on_history_closed)
+            self.history_window.show()
+        else:
+            self.history_window.raise_()
+            self.history_window.activateWindow()
+
+    def _on_history_closed(self, _result):
+        self.history_window.deleteLater()
+        self.history_window = None
 
     def closeEvent(self, event):
         """ウィンドウが閉じられるときの終了処理"""
         self.result_log.append("[INFO] アプリ終了処理中...")
+        if self.history_window is not None:
+            self.history_window.close()
+        self.receiver.stop()
         try:
-            self.pm.stop_all()
+            self.pm.shutdown()
         except Exception as e:
             logger.error(f"終了処理中にエラー: {e}")
+        if self.metrics_server:
+            self.metrics_server.stop()
+        self.matcher.stop_watcher()
+        self.sinks.close()
 
         # 念のため残っている子プロセスを強制終了
         import multiprocessing as mp
@@ -0,0 +1,55 @@
+from PyQt5.QtWidgets import QGroupBox, QVBoxLayout, QTableWidget, QTableWidgetItem
+from PyQt5.QtCore import QTimer
+
+# (見出し, summary()のキー)
+COLUMNS = [
+    ("カメラID", None),
+    ("FPS", "fps"),
+    ("取得p50(ms)", "capture_p50"),
+    ("デコードp50(ms)", "decode_p50"),
+    ("デコードp95(ms)", "decode_p95"),
+    ("補正p50(ms)", "enhance_p50"),
+    ("制御段階", "decode_level"),
+    ("間引き", "decode_stride"),
+    ("縮小率", "decode_scale"),
+    ("転送p50(ms)", "queue_transit_p50"),
+    ("描画p50(ms)", "gui_render_p50"),
+    ("履歴書込p50(ms)", "history_write_p50"),
+    ("読取数", "decode_hits"),
+    ("破棄", "drops"),
+    ("再接続", "reconnects"),
+    ("RSS(MB)", "rss_mb"),
+    ("キュー滞留", "queue_depth"),
+]
+
+
+class MetricsPanel(QGroupBox):
+    def __init__(self, registry, parent=None, interval_ms=1000):
+        super().__init__("パイプライン計測", parent)
+        self.registry = registry
+
+        self.table = QTableWidget(0, len(COLUMNS))
+        self.table.setHorizontalHeaderLabels([c[0] for c in COLUMNS])
+        self.table.horizontalHeader().setStretchLastSection(True)
+        self.table.setMaximumHeight(160)
+
+        layout = QVBoxLayout()
+        layout.addWidget(self.table)
+        self.setLayout(layout)
+
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.refresh)
+        self.timer.start(interval_ms)
+
+    def refresh(self):
+        summary = self.registry.summary()
+        self.table.setRowCount(len(summary))
+        for row, cam_id in enumerate(sorted(summary, key=str)):
+            values = summary[cam_id]
+            for col, (_, key) in enumerate(COLUMNS):
+                if key is None:
+                    text = str(cam_id)
+                else:
+                    v = values.get(key, "")
+                    text = f"{v:.1f}" if isinstance(v, float) else str(v)
+                self.table.setItem(row, col, QTableWidgetItem(text))
@@ -1,10 +1,48 @@
 import sys
+import argparse
 import multiprocessing as mp
-from PyQt5.QtWidgets import QApplication
-from gui.main_window import MainWindow
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Multi-Cam QR Reader")
+    parser.add_argument("--headless", action="store_true", help="GUIなしで起動する")
+    parser.add_argument("--cameras", default=None, help="カメラ設定JSON（既定: config/camera_profiles.json）")
+    parser.add_argument("--replay", action="append", default=[], help="録画ファイル/画像ディレクトリを再生カメラとして追加")
+    parser.add_argument("--pace", choices=["realtime", "fast"], default="realtime", help="再生ペース")
+    parser.add_argument("--no-loop", action="store_true", help="再生を1周で終了する")
+    parser.add_argument("--duration", type=float, default=None, help="ヘッドレス実行時間（秒）")
+    return parser.parse_args()
+
+
+def run_headless_mode(args):
+    from core.headless import load_camera_infos, run_headless
+
+    infos = load_camera_infos(args.cameras) if args.cameras else load_camera_infos()
+    for i, path in enumerate(args.replay):
+        infos.append({
+            "type": "file",
+            "id": f"replay{i}",
+            "config": {"path": path, "pace": args.pace, "loop": not args.no_loop},
+        })
+    if not infos:
+        print("カメラが指定されていません（--cameras または --replay）", file=sys.stderr)
+        return 1
+    run_headless(infos, duration=args.duration)
+    return 0
+
 
 if __name__ == "__main__":
     mp.set_start_method("spawn")
+    args = parse_args()
+
+    from core.logger import setup_logging
+    setup_logging()
+    if args.headless:
+        sys.exit(run_headless_mode(args))
+
+    from PyQt5.QtWidgets import QApplication
+    from gui.main_window import MainWindow
+
     app = QApplication(sys.argv)
     window = MainWindow()
     window.show()
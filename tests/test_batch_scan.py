@@ -0,0 +1,46 @@
+"""
+一括再スキャンの対象画像の列挙（ディレクトリ/glob/再帰/重複）
+"""
+import os
+import shutil
+import tempfile
+import unittest
+
+from core.batch_scan import iter_image_paths
+
+
+class IterImagePathsTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp, True)
+        for rel in ("a.jpg", "b.PNG", "notes.txt", "sub/c.jpeg", "sub/deep/d.tif", "sub/e.csv"):
+            path = os.path.join(self.tmp, rel)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            open(path, "wb").close()
+
+    def _rel(self, paths):
+        return sorted(os.path.relpath(p, self.tmp).replace(os.sep, "/") for p in paths)
+
+    def test_directory_lists_images_only(self):
+        self.assertEqual(self._rel(iter_image_paths([self.tmp])), ["a.jpg", "b.PNG"])
+
+    def test_directory_recursive(self):
+        self.assertEqual(self._rel(iter_image_paths([self.tmp], recursive=True)),
+                         ["a.jpg", "b.PNG", "sub/c.jpeg", "sub/deep/d.tif"])
+
+    def test_glob_patterns(self):
+        self.assertEqual(self._rel(iter_image_paths([os.path.join(self.tmp, "*.jpg")])), ["a.jpg"])
+        pattern = os.path.join(self.tmp, "**", "*")
+        self.assertEqual(self._rel(iter_image_paths([pattern], recursive=True)),
+                         ["a.jpg", "b.PNG", "sub/c.jpeg", "sub/deep/d.tif"])
+
+    def test_overlapping_patterns_yield_each_path_once(self):
+        paths = list(iter_image_paths([self.tmp, os.path.join(self.tmp, "*.jpg"), self.tmp]))
+        self.assertEqual(self._rel(paths), ["a.jpg", "b.PNG"])
+
+    def test_missing_pattern_yields_nothing(self):
+        self.assertEqual(list(iter_image_paths([os.path.join(self.tmp, "none", "*.jpg")])), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,84 @@
+"""
+照合（マニフェスト/接頭辞/正規表現の規則）と再読込時の照合済み状態
+"""
+import os
+import shutil
+import tempfile
+import unittest
+
+from core.code_matcher import DUPLICATE, MATCHED, UNKNOWN, CodeMatcher
+
+
+class CodeMatcherTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp, True)
+        self.path = os.path.join(self.tmp, "manifest.txt")
+
+    def _write(self, *lines):
+        with open(self.path, "w", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+
+    def test_disabled_without_manifest_or_rules(self):
+        matcher = CodeMatcher(self.path, rules=[])
+        self.assertFalse(matcher.enabled)
+        self.assertIsNone(matcher.register("ABC"))
+
+    def test_matched_duplicate_unknown(self):
+        self._write("# コメント", "ABC", "", "DEF")
+        matcher = CodeMatcher(self.path, rules=[])
+        self.assertTrue(matcher.enabled)
+        self.assertEqual(matcher.register("ABC"), MATCHED)
+        self.assertEqual(matcher.register("ABC"), DUPLICATE)
+        self.assertEqual(matcher.register("XYZ"), UNKNOWN)
+        self.assertEqual(matcher.register("DEF"), MATCHED)
+        self.assertEqual(matcher.stats, {MATCHED: 2, DUPLICATE: 1, UNKNOWN: 1})
+
+    def test_prefix_and_regex_rules(self):
+        self._write("prefix:ORD-", r"regex:SN\d{4}")
+        matcher = CodeMatcher(self.path, rules=[{"name": "lot", "prefix": "LOT."}])
+        self.assertEqual(matcher.lookup("ORD-1"), "prefix:ORD-")
+        self.assertEqual(matcher.lookup("SN1234"), r"regex:SN\d{4}")
+        self.assertEqual(matcher.lookup("LOT.7"), "lot")
+        # 接頭辞は文字どおりに比較する（"." は任意文字ではない）
+        self.assertIsNone(matcher.lookup("LOTX7"))
+        # 正規表現は全体一致
+        self.assertIsNone(matcher.lookup("SN12345"))
+
+    def test_regex_backreference_and_named_groups(self):
+        # 規則ごとにコンパイルするため、他の規則があってもグループ番号・名前はずれない
+        self._write(r"regex:SN(\d)\1", r"regex:(?P<x>[A-Z])-(?P=x)")
+        matcher = CodeMatcher(self.path, rules=[{"name": "z", "regex": r"Z(\d)"}, {"name": "x", "regex": r"(?P<x>\d+)X"}])
+        self.assertEqual(matcher.lookup("SN11"), r"regex:SN(\d)\1")
+        self.assertIsNone(matcher.lookup("SN12"))
+        self.assertEqual(matcher.lookup("A-A"), r"regex:(?P<x>[A-Z])-(?P=x)")
+        self.assertEqual(matcher.lookup("12X"), "x")
+        self.assertEqual(matcher.lookup("Z5"), "z")
+
+    def test_invalid_regex_keeps_previous_index(self):
+        self._write("ABC")
+        matcher = CodeMatcher(self.path, rules=[])
+        self._write("ABC", "regex:SN(")
+        self.assertFalse(matcher.reload())
+        self.assertEqual(matcher.lookup("ABC"), "manifest")
+
+    def test_reload_keeps_seen_for_codes_still_listed(self):
+        self._write("ABC", "DEF")
+        matcher = CodeMatcher(self.path, rules=[])
+        self.assertEqual(matcher.register("ABC"), MATCHED)
+        self.assertEqual(matcher.register("DEF"), MATCHED)
+
+        # DEF はリストから外れる（照合済み状態も消える）。GHI は新しい規則で照合される
+        self._write("ABC", "prefix:GH")
+        self.assertTrue(matcher.reload())
+        self.assertEqual(matcher.register("ABC"), DUPLICATE)
+        self.assertEqual(matcher.register("DEF"), UNKNOWN)
+        self.assertEqual(matcher.register("GHI"), MATCHED)
+
+        self._write("ABC", "DEF")
+        self.assertTrue(matcher.reload())
+        self.assertEqual(matcher.register("DEF"), MATCHED)
+
+
+if __name__ == "__main__":
+    unittest.main()
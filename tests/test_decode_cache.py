@@ -0,0 +1,102 @@
+"""
+デコード結果キャッシュの一致判定・期限・LRU（合成画像で確認）
+"""
+import unittest
+from unittest import mock
+
+import numpy as np
+
+from core.decode_cache import DecodeCache
+
+
+def _frame(seed=0):
+    """8画素角の白黒モジュールを敷き詰めた画像（コードの見た目の代わり）"""
+    rng = np.random.default_rng(seed)
+    modules = rng.integers(0, 2, size=(30, 40), dtype=np.uint8) * 255
+    return np.repeat(np.repeat(modules, 8, axis=0), 8, axis=1)
+
+
+def _result(data, x, y, w=40, h=40):
+    return {"data": data, "rect": (x, y, w, h), "polygon": None, "type": "QRCODE"}
+
+
+class DecodeCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.now = 100.0
+        patcher = mock.patch("core.decode_cache.time.monotonic", side_effect=lambda: self.now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_hit_on_same_or_noisy_region(self):
+        cache = DecodeCache(max_entries=8, max_age_sec=1.0, tolerance=6.0)
+        frame = _frame()
+        self.assertIsNone(cache.lookup(frame, "all"))
+        cache.store(frame, "all", [_result("A", 50, 50)])
+
+        hit = cache.lookup(frame, "all")
+        self.assertEqual([r["data"] for r in hit], ["A"])
+        # 返した結果を書き換えてもキャッシュには影響しない
+        hit[0]["data"] = "X"
+
+        # センサーノイズ程度の揺れと、コードから離れた場所の変化ではデコードし直さない
+        noisy = frame.astype(np.int16) + np.random.default_rng(1).integers(-8, 9, size=frame.shape)
+        noisy = np.clip(noisy, 0, 255).astype(np.uint8)
+        noisy[180:240, 220:320] = 0
+        self.assertEqual([r["data"] for r in cache.lookup(noisy, "all")], ["A"])
+        self.assertEqual(cache.stats, {"hits": 2, "misses": 1, "evictions": 0})
+
+    def test_miss_on_changed_region_mode_or_shape(self):
+        cache = DecodeCache(max_entries=8, max_age_sec=1.0, tolerance=6.0)
+        frame = _frame()
+        cache.store(frame, "all", [_result("A", 50, 50)])
+
+        changed = frame.copy()
+        changed[50:90, 50:90] = _frame(2)[50:90, 50:90]
+        self.assertIsNone(cache.lookup(changed, "all"))
+        self.assertIsNone(cache.lookup(frame, "qrcode"))
+        self.assertIsNone(cache.lookup(frame[:200], "all"))
+        self.assertEqual(cache.stats["misses"], 3)
+
+    def test_no_regions_or_unlocated_results_always_miss(self):
+        cache = DecodeCache(max_entries=8)
+        frame = _frame()
+        cache.store(frame, "all", [])
+        self.assertIsNone(cache.lookup(frame, "all"))
+        cache.store(frame, "all", [_result("A", 50, 50), {"data": "B", "rect": None}])
+        self.assertIsNone(cache.lookup(frame, "all"))
+        self.assertEqual(cache.stats["hits"], 0)
+
+    def test_entries_expire_after_max_age(self):
+        cache = DecodeCache(max_entries=8, max_age_sec=1.0)
+        frame = _frame()
+        cache.store(frame, "all", [_result("A", 50, 50)])
+        self.now += 0.9
+        self.assertIsNotNone(cache.lookup(frame, "all"))
+        self.now += 0.2
+        self.assertIsNone(cache.lookup(frame, "all"))
+
+    def test_lru_eviction(self):
+        cache = DecodeCache(max_entries=2, max_age_sec=10.0)
+        frame = _frame()
+        a, b, c = _result("A", 0, 0), _result("B", 100, 0), _result("C", 200, 100)
+        cache.store(frame, "all", [a])
+        cache.store(frame, "all", [b])
+        # A を使って最近使ったものにすると、C を入れたとき B が追い出される
+        cache.store(frame, "all", [a])
+        cache.store(frame, "all", [c])
+        self.assertEqual(cache.stats["evictions"], 1)
+        kept = sorted(r["data"] for _, _, rs in cache._entries.values() for r in rs)
+        self.assertEqual(kept, ["A", "C"])
+
+    def test_clear(self):
+        cache = DecodeCache(max_entries=8)
+        frame = _frame()
+        cache.store(frame, "all", [_result("A", 50, 50)])
+        cache.clear()
+        self.assertIsNone(cache.lookup(frame, "all"))
+        self.assertTrue(cache.enabled)
+        self.assertFalse(DecodeCache(max_entries=0).enabled)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,60 @@
+"""
+履歴の検索条件（期間/カメラ/キーワード/照合結果/件数）と読み取り専用接続での検索
+"""
+import os
+import shutil
+import sqlite3
+import tempfile
+import unittest
+
+from core.history_store import HistoryStore
+
+
+class HistoryQueryTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp, True)
+        self.store = HistoryStore(os.path.join(self.tmp, "history.db"))
+        self.store.add_records([
+            ("2025-01-01 09:00:00", 0, "usb", "ORD-001", "matched"),
+            ("2025-01-01 10:00:00", "cam1", "onvif", "ORD-002", "unknown"),
+            ("2025-01-02 09:00:00", 0, "usb", "SN-100"),
+        ])
+        self.store.add_record("2025-01-03 09:00:00", "cam1", "onvif", "ORD-001", "duplicate")
+
+    def _payloads(self, **filters):
+        return [(row[0], row[3]) for row in self.store.query(**filters)]
+
+    def test_no_filters_newest_first(self):
+        rows = self.store.query()
+        self.assertEqual([r[0] for r in rows], ["2025-01-03 09:00:00", "2025-01-02 09:00:00",
+                                                "2025-01-01 10:00:00", "2025-01-01 09:00:00"])
+        self.assertEqual(rows[1], ("2025-01-02 09:00:00", "0", "usb", "SN-100", None))
+
+    def test_filters(self):
+        self.assertEqual(self._payloads(ts_from="2025-01-01 10:00:00", ts_to="2025-01-02 23:59:59"),
+                         [("2025-01-02 09:00:00", "SN-100"), ("2025-01-01 10:00:00", "ORD-002")])
+        # 整数のカメラIDも文字列として記録・検索する
+        self.assertEqual(self._payloads(camera_id=0),
+                         [("2025-01-02 09:00:00", "SN-100"), ("2025-01-01 09:00:00", "ORD-001")])
+        self.assertEqual(self._payloads(keyword="001"),
+                         [("2025-01-03 09:00:00", "ORD-001"), ("2025-01-01 09:00:00", "ORD-001")])
+        self.assertEqual(self._payloads(match_status="unknown"), [("2025-01-01 10:00:00", "ORD-002")])
+        self.assertEqual(self._payloads(camera_id="cam1", keyword="ORD", match_status="duplicate"),
+                         [("2025-01-03 09:00:00", "ORD-001")])
+        self.assertEqual(self._payloads(limit=2), [("2025-01-03 09:00:00", "ORD-001"),
+                                                   ("2025-01-02 09:00:00", "SN-100")])
+
+    def test_reader_connection(self):
+        conn = self.store.open_reader()
+        self.addCleanup(conn.close)
+        self.assertEqual(self.store.query(keyword="SN", conn=conn), self.store.query(keyword="SN"))
+        with self.assertRaises(sqlite3.OperationalError):
+            conn.execute("DELETE FROM qr_history")
+        # 書き込みは読み取り用の接続を開いたままでも行え、次の検索に反映される
+        self.store.add_record("2025-01-04 09:00:00", "cam2", "file", "SN-200")
+        self.assertEqual(len(self.store.query(keyword="SN", conn=conn)), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
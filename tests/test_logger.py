@@ -0,0 +1,62 @@
+"""
+同一警告の抑制（RateLimitFilter）
+"""
+import logging
+import unittest
+from unittest import mock
+
+from core.logger import RateLimitFilter
+
+
+def _record(msg, level=logging.WARNING, name="multi_cam_qr_app"):
+    return logging.LogRecord(name, level, __file__, 0, msg, None, None)
+
+
+class RateLimitFilterTest(unittest.TestCase):
+    def setUp(self):
+        self.now = 1000.0
+        patcher = mock.patch("core.logger.time.monotonic", side_effect=lambda: self.now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_suppresses_repeats_within_window_and_reports_count(self):
+        f = RateLimitFilter(window_sec=10.0)
+        self.assertTrue(f.filter(_record("接続失敗")))
+        self.now += 1.0
+        self.assertFalse(f.filter(_record("接続失敗")))
+        self.now += 1.0
+        self.assertFalse(f.filter(_record("接続失敗")))
+
+        # 窓は最後に出力した時刻から数える
+        self.now += 8.5
+        record = _record("接続失敗")
+        self.assertTrue(f.filter(record))
+        self.assertEqual(record.getMessage(), "接続失敗（同一メッセージ 2 件を抑制）")
+        self.now += 1.0
+        self.assertFalse(f.filter(_record("接続失敗")))
+
+    def test_keys_by_message_level_and_logger(self):
+        f = RateLimitFilter(window_sec=10.0)
+        self.assertTrue(f.filter(_record("A")))
+        self.assertTrue(f.filter(_record("B")))
+        self.assertTrue(f.filter(_record("A", level=logging.ERROR)))
+        self.assertTrue(f.filter(_record("A", name="other")))
+        self.assertFalse(f.filter(_record("A")))
+
+    def test_info_and_disabled_window_pass_through(self):
+        f = RateLimitFilter(window_sec=10.0)
+        for _ in range(3):
+            self.assertTrue(f.filter(_record("起動", level=logging.INFO)))
+        f = RateLimitFilter(window_sec=0)
+        for _ in range(3):
+            self.assertTrue(f.filter(_record("接続失敗")))
+
+    def test_key_table_is_bounded(self):
+        f = RateLimitFilter(window_sec=10.0, max_keys=3)
+        for i in range(10):
+            self.assertTrue(f.filter(_record(f"msg{i}")))
+            self.assertLessEqual(len(f._last), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
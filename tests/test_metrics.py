@@ -0,0 +1,87 @@
+"""
+パイプライン計測のヒストグラムとPrometheus出力
+"""
+import unittest
+
+from core.metrics import Histogram, MetricsRegistry
+
+
+class HistogramTest(unittest.TestCase):
+    def _hist(self, *values):
+        h = Histogram((1, 2, 5))
+        for v in values:
+            h.observe(v)
+        return h
+
+    def test_percentile_uses_bucket_bounds(self):
+        self.assertEqual(Histogram().percentile(50), 0.0)
+        h = self._hist(0.5, 1.5, 3, 10)
+        self.assertEqual(h.counts, [1, 1, 1, 1])
+        self.assertEqual(h.percentile(25), 1)
+        self.assertEqual(h.percentile(50), 2)
+        self.assertEqual(h.percentile(75), 5)
+        # +Inf に入った値は最後の境界で近似する
+        self.assertEqual(h.percentile(100), 5)
+
+    def test_minus_gives_interval_distribution(self):
+        base = self._hist(0.5, 0.5)
+        now = Histogram.from_dict(base.to_dict())
+        for v in (3, 4, 10):
+            now.observe(v)
+        delta = now.minus(base)
+        self.assertEqual(delta.counts, [0, 0, 2, 1])
+        self.assertEqual(delta.count, 3)
+        self.assertAlmostEqual(delta.sum, 17.0)
+        self.assertEqual(delta.percentile(50), 5)
+
+    def test_from_dict_round_trip(self):
+        h = self._hist(0.5, 3, 3)
+        copy = Histogram.from_dict(h.to_dict())
+        self.assertEqual(copy.buckets, h.buckets)
+        self.assertEqual(copy.counts, h.counts)
+        self.assertEqual((copy.sum, copy.count), (h.sum, h.count))
+        # 復元したものを更新しても元には影響しない
+        copy.observe(0.1)
+        self.assertEqual(h.count, 3)
+
+
+class PrometheusTest(unittest.TestCase):
+    def test_render_prometheus(self):
+        registry = MetricsRegistry()
+        decode = Histogram((1, 2, 5))
+        for v in (0.5, 1.5, 10):
+            decode.observe(v)
+        registry.update_worker('cam"1', {
+            "histograms": {"decode": decode.to_dict()},
+            "counters": {"frames": 42},
+            "gauges": {"fps": 14.5, "decode_mode": "all"},
+        })
+        registry.observe_local('cam"1', "gui_render", 3.0)
+
+        lines = registry.render_prometheus().splitlines()
+        labels = 'camera="cam\\"1",stage="decode"'
+        self.assertIn("# TYPE qr_stage_latency_seconds histogram", lines)
+        self.assertIn(f'qr_stage_latency_seconds_bucket{{{labels},le="0.001"}} 1', lines)
+        self.assertIn(f'qr_stage_latency_seconds_bucket{{{labels},le="0.002"}} 2', lines)
+        self.assertIn(f'qr_stage_latency_seconds_bucket{{{labels},le="0.005"}} 2', lines)
+        self.assertIn(f'qr_stage_latency_seconds_bucket{{{labels},le="+Inf"}} 3', lines)
+        self.assertIn(f"qr_stage_latency_seconds_sum{{{labels}}} 0.012000", lines)
+        self.assertIn(f"qr_stage_latency_seconds_count{{{labels}}} 3", lines)
+        self.assertIn('qr_stage_latency_seconds_count{camera="cam\\"1",stage="gui_render"} 1', lines)
+        self.assertIn("# TYPE qr_frames_total counter", lines)
+        self.assertIn('qr_frames_total{camera="cam\\"1"} 42', lines)
+        self.assertIn("# TYPE qr_fps gauge", lines)
+        self.assertIn('qr_fps{camera="cam\\"1"} 14.5', lines)
+        # 数値でないゲージは出さない
+        self.assertFalse(any("decode_mode" in line for line in lines))
+
+    def test_removed_camera_is_not_rendered(self):
+        registry = MetricsRegistry()
+        registry.observe_local("cam1", "gui_render", 1.0)
+        registry.remove("cam1")
+        self.assertNotIn("cam1", registry.render_prometheus())
+        self.assertEqual(registry.summary(), {})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,158 @@
+"""
+結果シンクの障害時スプールと復旧後の再送順序（ローカルのHTTPサーバー/UNIXソケットを相手に確認）
+"""
+import http.server
+import json
+import os
+import shutil
+import socket
+import socketserver
+import tempfile
+import threading
+import time
+import unittest
+from unittest import mock
+
+from core import result_sinks
+from core.result_sinks import UnixSocketSink, WebhookSink
+
+
+def _wait_for(cond, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if cond():
+            return True
+        time.sleep(0.02)
+    return cond()
+
+
+class _WebhookHandler(http.server.BaseHTTPRequestHandler):
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        server = self.server
+        with server.lock:
+            # budget: 残り受け付け回数（None なら無制限、0 なら 503 を返し続ける）
+            ok = server.budget is None or server.budget > 0
+            if ok:
+                if server.budget is not None:
+                    server.budget -= 1
+                server.received.extend(json.loads(body))
+        self.send_response(200 if ok else 503)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+class _LineHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        for line in self.rfile:
+            with self.server.lock:
+                self.server.received.append(json.loads(line))
+
+
+class SinkSpoolTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.spool_dir = os.path.join(self.tmp, "spool")
+        patches = [
+            mock.patch.object(result_sinks, "SINK_RETRY_BASE_DELAY_SEC", 0.05),
+            mock.patch.object(result_sinks, "SINK_RETRY_MAX_DELAY_SEC", 0.2),
+        ]
+        for p in patches:
+            p.start()
+            self.addCleanup(p.stop)
+        self.addCleanup(shutil.rmtree, self.tmp, True)
+
+    def _spool_files(self):
+        return sorted(os.listdir(self.spool_dir)) if os.path.isdir(self.spool_dir) else []
+
+    def _start_http(self):
+        server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), _WebhookHandler)
+        server.lock = threading.Lock()
+        server.received = []
+        server.budget = None
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        return server
+
+    def _webhook(self, server):
+        return WebhookSink("hook", f"http://127.0.0.1:{server.server_address[1]}/", timeout=2.0,
+                           batch_size=4, flush_interval=0.05, spool_dir=self.spool_dir)
+
+    def test_webhook_spools_while_down_and_resends_in_order(self):
+        server = self._start_http()
+        server.budget = 0
+        sink = self._webhook(server)
+        self.addCleanup(sink.close)
+
+        for i in range(10):
+            sink.submit({"seq": i})
+        self.assertTrue(_wait_for(lambda: sink.spooled == 10))
+        self.assertIn("hook.jsonl", self._spool_files())
+        for i in range(10, 20):
+            sink.submit({"seq": i})
+        self.assertTrue(_wait_for(lambda: sink.spooled == 20))
+        self.assertEqual(server.received, [])
+
+        server.budget = None
+        for i in range(20, 25):
+            sink.submit({"seq": i})
+        self.assertTrue(_wait_for(lambda: len(server.received) == 25))
+        self.assertEqual([r["seq"] for r in server.received], list(range(25)))
+        self.assertTrue(_wait_for(lambda: self._spool_files() == []))
+
+    def test_interrupted_drain_keeps_unsent_records_and_resumes(self):
+        server = self._start_http()
+        server.budget = 0
+        sink = self._webhook(server)
+        for i in range(12):
+            sink.submit({"seq": i})
+        self.assertTrue(_wait_for(lambda: sink.spooled == 12))
+
+        # 再送の途中（1バッチ送った後）で再び落ちる
+        server.budget = 1
+        self.assertTrue(_wait_for(lambda: len(server.received) == 4))
+        self.assertTrue(_wait_for(lambda: "hook.jsonl.1.offset" in self._spool_files()))
+        sink.close()
+        self.assertIn("hook.jsonl.1", self._spool_files())
+
+        # 再起動したシンクが続きから送る（送信済みの分は再送しない）
+        server.budget = None
+        sink = self._webhook(server)
+        self.addCleanup(sink.close)
+        self.assertTrue(_wait_for(lambda: len(server.received) == 12))
+        time.sleep(0.2)
+        self.assertEqual([r["seq"] for r in server.received], list(range(12)))
+        self.assertTrue(_wait_for(lambda: self._spool_files() == []))
+
+    @unittest.skipUnless(hasattr(socket, "AF_UNIX"), "UNIXドメインソケットが使えない環境")
+    def test_unix_socket_spools_until_listener_appears(self):
+        path = os.path.join(self.tmp, "sink.sock")
+        sink = UnixSocketSink("sock", path, timeout=2.0, batch_size=4, flush_interval=0.05,
+                              spool_dir=self.spool_dir)
+        self.addCleanup(sink.close)
+
+        for i in range(10):
+            sink.submit({"seq": i})
+        self.assertTrue(_wait_for(lambda: sink.spooled == 10))
+
+        server = socketserver.ThreadingUnixStreamServer(path, _LineHandler)
+        server.daemon_threads = True
+        server.lock = threading.Lock()
+        server.received = []
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+
+        for i in range(10, 14):
+            sink.submit({"seq": i})
+        self.assertTrue(_wait_for(lambda: len(server.received) == 14))
+        self.assertEqual([r["seq"] for r in server.received], list(range(14)))
+        self.assertTrue(_wait_for(lambda: self._spool_files() == []))
+
+
+if __name__ == "__main__":
+    unittest.main()